@@ -1,18 +1,29 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
 from datetime import datetime
-import sqlite3
+import math
 import os
-import csv
-import joblib
-import smtplib
-import requests
-import pandas as pd
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from ml.fuzzy_logic import fuzzy_risk_level
-import requests
-from twilio.rest import Client
+import threading
+import time
+from ml.fuzzy_logic import fuzzy_risk_level_batch
+from ml.tree_evaluator import TreeEnsemble, file_sha256
+from cache import LRUCache
+from db_pool import SQLitePool
+from event_stream import EventStream
+from exposure import ExposureTracker
+from latest_readings import LatestReadings
+from log_writer import SensorLogWriter
+from notifications import NotificationDispatcher
+from retention import RetentionJob, query_history_with_archive
+from retention import ensure_schema as ensure_archive_schema
+from ring_buffer import RingBufferStore
+from rollups import METRICS as ROLLUP_METRICS, choose_resolution, query_rollups, update_rollups
+from rollups import ensure_schema as ensure_rollup_schema
+from sensor_history import ensure_schema as ensure_history_schema
+from sensor_history import to_epoch
+from sensor_export import EXPORT_FORMATS, encode_csv, encode_ndjson, gzip_stream, iter_export_rows
+from threshold_rules import compile_thresholds, evaluate_flags, format_flags, threshold_matrix
+from ws_publisher import WebSocketPublisher
 
 app = Flask(__name__)
 CORS(app)
@@ -26,6 +37,9 @@ SENDER_PASSWORD = os.getenv("SENDER_PASSWORD")
 TWILIO_ACCOUNT_SID = os.getenv("TWILIO_ACCOUNT_SID")
 TWILIO_AUTH_TOKEN = os.getenv("TWILIO_AUTH_TOKEN")
 TWILIO_PHONE_NUMBER = os.getenv("TWILIO_PHONE_NUMBER")
+SMTP_HOST = os.getenv("SMTP_HOST", "smtp.gmail.com")
+SMTP_PORT = int(os.getenv("SMTP_PORT", "587"))
+SMTP_STARTTLS = os.getenv("SMTP_STARTTLS", "1") == "1"
 
 
 # === Path Setup ===
@@ -39,103 +53,222 @@ print(f"\n✅ Using Database File: {DB_FILE}\n")
 
 
 # === Model Load ===
-model = joblib.load(os.path.join(BASE_DIR, 'ml', 'risk_predictor.pkl'))
-label_encoder = joblib.load(os.path.join(BASE_DIR, 'ml', 'label_encoder.pkl'))
-
-WS_SERVER_URL = "http://192.168.118.148:8000/broadcast"
+# Models are loaded on first use (or by warm_up()) rather than at import, so
+# worker processes and tests start without unpickling XGBoost/scikit-learn.
+MODEL_FILE = os.path.join(BASE_DIR, 'ml', 'risk_predictor.pkl')
+LABEL_ENCODER_FILE = os.path.join(BASE_DIR, 'ml', 'label_encoder.pkl')
+# Flattened copy of the model's trees (see ml/tree_export.py); scores small
+# batches far faster than the XGBoost wrapper. Ignored if exported from a
+# different model file.
+TREES_FILE = os.path.join(BASE_DIR, 'ml', 'risk_predictor_trees.npz')
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def _load_model(name):
+    with _models_lock:
+        if name not in _models:
+            if name == 'trees':
+                trees = None
+                if os.path.exists(TREES_FILE):
+                    trees = TreeEnsemble.load(TREES_FILE)
+                    if trees.model_sha256 != file_sha256(MODEL_FILE):
+                        trees = None
+                if trees is None:
+                    print("⚠️ Exported trees missing or stale, run ml/tree_export.py; using XGBoost model")
+                _models['trees'] = trees
+            else:
+                import joblib
+                path = MODEL_FILE if name == 'model' else LABEL_ENCODER_FILE
+                _models[name] = joblib.load(path)
+        return _models[name]
+
+
+def get_model():
+    return _load_model('model')
+
+
+def get_label_encoder():
+    return _load_model('label_encoder')
+
+
+def get_risk_trees():
+    return _load_model('trees')
+
+
+def warm_up():
+    """Load every model up front so the first request doesn't pay for it."""
+    started = time.perf_counter()
+    get_risk_trees()
+    get_label_encoder()
+    get_model()
+    print(f"✅ Models loaded in {time.perf_counter() - started:.2f}s")
+
+
+def predict_risk_classes(features):
+    # Past a few hundred rows XGBoost's native multi-threaded predict wins
+    risk_trees = get_risk_trees()
+    if risk_trees is not None and len(features) <= 256:
+        return risk_trees.predict(features)
+    return get_model().predict(features)
+
+
+WS_SERVER_URL = os.getenv("WS_SERVER_URL", "http://192.168.118.148:8000/broadcast")
+ws_publisher = WebSocketPublisher(
+    WS_SERVER_URL,
+    max_queue=int(os.getenv("WS_QUEUE_SIZE", "1000")),
+    overflow=os.getenv("WS_QUEUE_OVERFLOW", "drop_oldest"),
+    timeout=float(os.getenv("WS_TIMEOUT", "2.0")),
+    encoding=os.getenv("WS_WIRE_FORMAT", "json"),
+)
+
+# Server-Sent Events for dashboards (/api/stream)
+events = EventStream(
+    replay_size=int(os.getenv("SSE_REPLAY_SIZE", "1000")),
+    buffer_size=int(os.getenv("SSE_BUFFER_SIZE", "256")),
+    heartbeat=float(os.getenv("SSE_HEARTBEAT", "15")),
+)
 
 os.makedirs(os.path.join(BASE_DIR, 'logs'), exist_ok=True)
 
+db = SQLitePool(DB_FILE)
+
+# Rollups are kept per user and for the whole site (one site per deployment)
+SITE_ID = os.getenv("SITE_ID", "default")
+
+# === Worker Caches ===
+# device_id -> user_id and user_id -> worker profile; both only change via
+# /assign_user, /register or the auto-worker branch of resolve_worker.
+CACHE_TTL = float(os.getenv("WORKER_CACHE_TTL", "300"))
+device_cache = LRUCache(maxsize=4096, ttl=CACHE_TTL)
+profile_cache = LRUCache(maxsize=4096, ttl=CACHE_TTL)
+
+# Latest reading per user and overall, for the polling dashboards
+latest_readings = LatestReadings()
+
 # === Database Setup ===
 def initialize_database():
-    conn = sqlite3.connect(DB_FILE)
-    c = conn.cursor()
-
-    # Create sensor_data table
-    c.execute('''CREATE TABLE IF NOT EXISTS sensor_data (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    timestamp TEXT,
-                    temperature REAL,
-                    humidity REAL,
-                    voc REAL,
-                    co REAL,
-                    pm1 REAL,
-                    pm25 REAL,
-                    pm10 REAL,
-                    user_id TEXT
-                )''')
-
-    # Create workers table
-    c.execute('''CREATE TABLE IF NOT EXISTS workers (
-        worker_id TEXT PRIMARY KEY,
-        password TEXT,
-        name TEXT,
-        age INTEGER,
-        health_condition TEXT,
-        work_environment TEXT,
-        email TEXT,
-        phone_number TEXT
-    )''')
-
-    # Create device_assignments table
-    c.execute('''CREATE TABLE IF NOT EXISTS device_assignments (
-                    device_id TEXT PRIMARY KEY,
-                    assigned_user_id TEXT
-                )''')
-
-    conn.commit()
-    conn.close()
+    with db.connection() as conn:
+        c = conn.cursor()
+
+        # Create sensor_data table
+        c.execute('''CREATE TABLE IF NOT EXISTS sensor_data (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        timestamp TEXT,
+                        temperature REAL,
+                        humidity REAL,
+                        voc REAL,
+                        co REAL,
+                        pm1 REAL,
+                        pm25 REAL,
+                        pm10 REAL,
+                        user_id TEXT
+                    )''')
+
+        # Create workers table
+        c.execute('''CREATE TABLE IF NOT EXISTS workers (
+            worker_id TEXT PRIMARY KEY,
+            password TEXT,
+            name TEXT,
+            age INTEGER,
+            health_condition TEXT,
+            work_environment TEXT,
+            email TEXT,
+            phone_number TEXT
+        )''')
+
+        # Create device_assignments table
+        c.execute('''CREATE TABLE IF NOT EXISTS device_assignments (
+                        device_id TEXT PRIMARY KEY,
+                        assigned_user_id TEXT
+                    )''')
+
+        # Integer epoch column and indexes for time-range queries
+        ensure_history_schema(c)
+        ensure_rollup_schema(c)
+        ensure_archive_schema(c)
+
     print("✅ Database initialized with all tables.")
 
 
-if not os.path.exists(DATA_LOG):
-    with open(DATA_LOG, 'w', newline='') as f:
-        writer = csv.writer(f)
-        writer.writerow(['timestamp', 'temperature', 'humidity', 'voc', 'co', 'pm1', 'pm25', 'pm10', 'user_id'])
+# === Sensor Log ===
+# New readings go to rotating segments under logs/segments; the old single
+# DATA_LOG file is kept as read-only history (see log_writer.iter_log_rows).
+SEGMENT_DIR = os.path.join(BASE_DIR, 'logs', 'segments')
+sensor_log = SensorLogWriter(
+    SEGMENT_DIR,
+    flush_rows=int(os.getenv("LOG_FLUSH_ROWS", "500")),
+    flush_interval=float(os.getenv("LOG_FLUSH_INTERVAL", "2.0")),
+    max_bytes=int(os.getenv("LOG_MAX_BYTES", str(64 * 1024 * 1024))),
+    columnar=os.getenv("LOG_COLUMNAR") or None,
+)
+
+
+# === Recent-window buffers ===
+# Last RING_CAPACITY readings per worker in memory-mapped files, for
+# rolling-window stats without going through SQLite.
+ring_buffers = RingBufferStore(
+    os.path.join(BASE_DIR, 'logs', 'ringbuf'),
+    capacity=int(os.getenv("RING_CAPACITY", "4096")),
+)
+
+
+# === Exposure ===
+# 8-hour TWA and 15-minute STEL per worker, checkpointed so restarts keep them
+exposure = ExposureTracker(
+    checkpoint_path=os.path.join(BASE_DIR, 'logs', 'exposure_checkpoint.json'),
+    checkpoint_interval=float(os.getenv("EXPOSURE_CHECKPOINT_INTERVAL", "60")),
+    max_hold=float(os.getenv("EXPOSURE_MAX_HOLD", "600")),
+)
+
+
+# === Retention ===
+# sensor_data keeps RETENTION_DAYS of readings; older rows move to Parquet
+# partitions under logs/archive, which the history API still reads.
+ARCHIVE_DIR = os.path.join(BASE_DIR, 'logs', 'archive')
+retention = RetentionJob(
+    db,
+    ARCHIVE_DIR,
+    horizon_days=float(os.getenv("RETENTION_DAYS", "30")),
+    interval=float(os.getenv("RETENTION_INTERVAL", "3600")),
+    batch_size=int(os.getenv("RETENTION_BATCH_SIZE", "5000")),
+)
+
+
+# === Notifications ===
+notifier = NotificationDispatcher(
+    sender_email=SENDER_EMAIL,
+    sender_password=SENDER_PASSWORD,
+    smtp_host=SMTP_HOST,
+    smtp_port=SMTP_PORT,
+    smtp_starttls=SMTP_STARTTLS,
+    twilio_sid=TWILIO_ACCOUNT_SID,
+    twilio_token=TWILIO_AUTH_TOKEN,
+    twilio_from=TWILIO_PHONE_NUMBER,
+    workers=int(os.getenv("NOTIFY_WORKERS", "2")),
+    max_queue=int(os.getenv("NOTIFY_QUEUE_SIZE", "1000")),
+)
 
 
 # === Email Function ===
 def send_email_alert(to_email, subject, body):
-    try:
-        if not to_email:
-            print("❌ No email provided, skipping email alert.")
-            return
+    if not to_email:
+        print("❌ No email provided, skipping email alert.")
+        return
 
-        msg = MIMEMultipart()
-        msg['From'] = SENDER_EMAIL
-        msg['To'] = to_email
-        msg['Subject'] = subject
-
-        msg.attach(MIMEText(body, 'plain'))
-
-        server = smtplib.SMTP('smtp.gmail.com', 587)
-        server.starttls()
-        server.login(SENDER_EMAIL, SENDER_PASSWORD)
-        server.send_message(msg)
-        server.quit()
-
-        print("✅ Email sent successfully!")
-
-    except Exception as e:
-        print(f"❌ Failed to send email: {e}")
+    if notifier.send_email(to_email, subject, body):
+        print("✅ Email alert queued")
 
 
 # === SMS Function ===
 def send_sms_alert(to_phone, message):
-    try:
-        if not to_phone:
-            print("❌ No phone number provided, skipping SMS alert.")
-            return
-
-        client = Client(TWILIO_ACCOUNT_SID, TWILIO_AUTH_TOKEN)
-        client.messages.create(
-            body=message,
-            from_=TWILIO_PHONE_NUMBER,
-            to=to_phone
-        )
-        print("✅ SMS sent successfully!")
-    except Exception as e:
-        print(f"❌ Failed to send SMS: {e}")
+    if not to_phone:
+        print("❌ No phone number provided, skipping SMS alert.")
+        return
+
+    if notifier.send_sms(to_phone, message):
+        print("✅ SMS alert queued")
 
 
 # === Personalized Measures ===
@@ -162,48 +295,73 @@ def generate_personalized_measures(worker, flags):
 
 
 def get_adaptive_thresholds(worker):
-    thresholds = {'co': 35, 'pm25': 35, 'voc': 0.5}
+    return dict(compile_thresholds(worker).limits)
 
-    if worker['age'] >= 60:
-        thresholds['co'] = 25
-
-    health = worker['health_condition'].lower()
-    if 'asthma' in health or 'respiratory' in health:
-        thresholds.update({'pm25': 20, 'voc': 0.3})
-    if 'heart' in health or 'cardio' in health:
-        thresholds['co'] = min(thresholds['co'], 25)
-        thresholds['pm25'] = min(thresholds['pm25'], 25)
-
-    env = worker['work_environment'].lower()
-    if 'welding' in env or 'chemical' in env:
-        thresholds['co'] = min(thresholds['co'], 25)
-        thresholds['voc'] = min(thresholds['voc'], 0.3)
 
-    return thresholds
+# === API Routes ===
 
+def load_latest_reading(user_id=None):
+    with db.connection() as conn:
+        c = conn.cursor()
+        if user_id:
+            c.execute('SELECT * FROM sensor_data WHERE user_id = ? ORDER BY id DESC LIMIT 1', (user_id,))
+        else:
+            c.execute('SELECT * FROM sensor_data ORDER BY id DESC LIMIT 1')
+        row = c.fetchone()
+    return dict(row) if row else None
 
-# === API Routes ===
 
 @app.route('/api/latest', methods=['GET'])
 def get_latest_data():
+    """
+    Latest reading overall, or for ?user_id=. Served from memory; the
+    response carries an ETag so unchanged polls get a bodyless 304.
+    """
     try:
-        conn = sqlite3.connect(DB_FILE)
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
+        user_id = request.args.get('user_id')
+        row = latest_readings.get(user_id, load=lambda: load_latest_reading(user_id))
 
-        c.execute('SELECT * FROM sensor_data ORDER BY id DESC LIMIT 1')
-        row = c.fetchone()
-        conn.close()
+        if not row:
+            return jsonify({'error': 'No sensor data found'}), 404
 
-        if row:
-            return jsonify(dict(row)), 200
+        etag = LatestReadings.etag(row)
+        if request.if_none_match.contains(etag):
+            response = app.response_class(status=304)
         else:
-            return jsonify({'error': 'No sensor data found'}), 404
+            response = jsonify(row)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'no-cache'
+        return response
 
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/stream', methods=['GET'])
+def stream_readings():
+    """
+    Server-Sent Events stream of new readings ("reading" events, each the
+    stored row plus its risk result). Query params: user_id (that worker's
+    readings) or role (role=admin gets every worker's readings). A client
+    reconnecting with Last-Event-ID (or ?last_event_id=) gets the events it
+    missed, as far as the replay buffer reaches.
+    """
+    try:
+        last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+        subscriber = events.subscribe(
+            user_id=request.args.get('user_id'),
+            role=request.args.get('role'),
+            last_event_id=int(last_event_id) if last_event_id else None,
+        )
+    except ValueError:
+        return jsonify({'error': 'Last-Event-ID must be an integer'}), 400
+
+    return Response(events.stream(subscriber), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no',
+    })
+
+
 @app.route('/register', methods=['POST'])
 def register():
     try:
@@ -217,21 +375,19 @@ def register():
         email = data.get('email')
         phone_number = data.get('phone_number')
 
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
+        with db.connection() as conn:
+            c = conn.cursor()
+            c.execute('SELECT * FROM workers WHERE worker_id = ?', (worker_id,))
+            existing_user = c.fetchone()
 
-        c.execute('SELECT * FROM workers WHERE worker_id = ?', (worker_id,))
-        existing_user = c.fetchone()
+            if existing_user:
+                return jsonify({'message': 'User already exists'}), 400
 
-        if existing_user:
-            conn.close()
-            return jsonify({'message': 'User already exists'}), 400
+            c.execute('''INSERT INTO workers (worker_id, password, name, age, health_condition, work_environment, email, phone_number)
+                         VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+                      (worker_id, password, name, age, health_condition, work_environment, email, phone_number))
 
-        c.execute('''INSERT INTO workers (worker_id, password, name, age, health_condition, work_environment, email, phone_number)
-                     VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
-                  (worker_id, password, name, age, health_condition, work_environment, email, phone_number))
-        conn.commit()
-        conn.close()
+        profile_cache.invalidate(worker_id)
 
         return jsonify({'message': 'Registration successful'}), 200
 
@@ -250,13 +406,10 @@ def login():
         if worker_id == 'admin' and password == 'admin123':
             return jsonify({'message': 'Admin login successful', 'worker_id': 'admin', 'role': 'admin'}), 200
 
-        conn = sqlite3.connect(DB_FILE)
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
-
-        c.execute('SELECT * FROM workers WHERE worker_id = ? AND password = ?', (worker_id, password))
-        user = c.fetchone()
-        conn.close()
+        with db.connection() as conn:
+            c = conn.cursor()
+            c.execute('SELECT * FROM workers WHERE worker_id = ? AND password = ?', (worker_id, password))
+            user = c.fetchone()
 
         if user:
             return jsonify({'message': 'Login successful', 'worker_id': worker_id, 'role': 'worker'}), 200
@@ -269,13 +422,10 @@ def login():
 @app.route('/api/workers', methods=['GET'])
 def get_all_workers():
     try:
-        conn = sqlite3.connect(DB_FILE)
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
-
-        c.execute('SELECT * FROM workers')
-        rows = c.fetchall()
-        conn.close()
+        with db.connection() as conn:
+            c = conn.cursor()
+            c.execute('SELECT * FROM workers')
+            rows = c.fetchall()
 
         workers = [dict(row) for row in rows]
         return jsonify(workers), 200
@@ -293,13 +443,12 @@ def assign_user():
         device_id = data.get('device_id')
         user_id = data.get('user_id')
 
-        conn = sqlite3.connect(DB_FILE)
-        c = conn.cursor()
+        with db.connection() as conn:
+            c = conn.cursor()
+            c.execute('''INSERT OR REPLACE INTO device_assignments (device_id, assigned_user_id)
+                         VALUES (?, ?)''', (device_id, user_id))
 
-        c.execute('''INSERT OR REPLACE INTO device_assignments (device_id, assigned_user_id)
-                     VALUES (?, ?)''', (device_id, user_id))
-        conn.commit()
-        conn.close()
+        device_cache.invalidate(device_id)
 
         return jsonify({'message': 'User assigned successfully'}), 200
 
@@ -310,13 +459,10 @@ def assign_user():
 @app.route('/get_assigned_user/<device_id>', methods=['GET'])
 def get_assigned_user(device_id):
     try:
-        conn = sqlite3.connect(DB_FILE)
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
-
-        c.execute('SELECT assigned_user_id FROM device_assignments WHERE device_id = ?', (device_id,))
-        row = c.fetchone()
-        conn.close()
+        with db.connection() as conn:
+            c = conn.cursor()
+            c.execute('SELECT assigned_user_id FROM device_assignments WHERE device_id = ?', (device_id,))
+            row = c.fetchone()
 
         if row and row['assigned_user_id']:
             return jsonify({'user_id': row['assigned_user_id']}), 200
@@ -327,99 +473,181 @@ def get_assigned_user(device_id):
         return jsonify({'error': str(e)}), 500
 
 
-@app.route('/submit_data', methods=['POST'])
-def submit_data():
-    try:
-        print("\n✅ [API HIT] Received data at /submit_data")
+REQUIRED_KEYS = ['temperature', 'humidity', 'voc', 'co', 'pm1', 'pm', 'pm10']
 
-        content = request.get_json()
-        print(f"✅ Received JSON: {content}")
 
-        token = request.headers.get("X-SENSOR-TOKEN")
-        print(f"✅ Received Token: {token}")
+def validate_reading(content):
+    """Error message for an unusable reading, or None.
 
-        if token != "s3nsor_@uth_2025":
-            print("❌ Unauthorized token")
-            return jsonify({'status': 'Unauthorized'}), 401
+    Sensor values are coerced to floats in place, so one bad value (null,
+    "abc", NaN) rejects only its own reading instead of failing the
+    scoring of a whole batch.
+    """
+    if not isinstance(content, dict):
+        return 'Reading must be a JSON object'
+    if not content.get('device_id'):
+        return 'Device ID missing'
+    for key in REQUIRED_KEYS:
+        if key not in content:
+            return f'Missing key: {key}'
+        value = content[key]
+        try:
+            number = float(value) if not isinstance(value, bool) else math.nan
+        except (TypeError, ValueError):
+            number = math.nan
+        if not math.isfinite(number):
+            return f'Invalid value for {key}: {value!r}'
+        content[key] = number
+    timestamp = content.get('timestamp')
+    if isinstance(timestamp, bool) or not isinstance(timestamp, (str, int, float, type(None))):
+        return f'Invalid timestamp: {timestamp!r}'
+    # Infinity/NaN parse from JSON; they and out-of-range epochs can't be stored in ts_epoch
+    if isinstance(timestamp, (int, float)) and not (math.isfinite(timestamp) and -2 ** 63 <= timestamp < 2 ** 63):
+        return f'Invalid timestamp: {timestamp!r}'
+    return None
+
+
+def resolve_worker(c, device_id):
+    user_id = device_cache.get(device_id)
+    if user_id is None:
+        c.execute('SELECT assigned_user_id FROM device_assignments WHERE device_id = ?', (device_id,))
+        row = c.fetchone()
 
-        device_id = content.get('device_id')
-        if not device_id:
-            print("❌ Device ID missing")
-            return jsonify({'error': 'Device ID missing'}), 400
-
-        required_keys = ['temperature', 'humidity', 'voc', 'co', 'pm1', 'pm', 'pm10']
-        for key in required_keys:
-            if key not in content:
-                print(f"❌ Missing key: {key}")
-                return jsonify({'error': f'Missing key: {key}'}), 400
-
-        temp = content['temperature']
-        hum = content['humidity']
-        voc = content['voc']
-        co = content['co']
-        pm1 = content['pm1']
-        pm25 = content['pm']
-        pm10 = content['pm10']
-        timestamp = content.get('timestamp', datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
-
-        print(f"✅ Sensor Values: Temp={temp}, Hum={hum}, VOC={voc}, CO={co}, PM1={pm1}, PM2.5={pm25}, PM10={pm10}")
-
-        with sqlite3.connect(DB_FILE) as conn:
-            conn.row_factory = sqlite3.Row
-            c = conn.cursor()
+        user_id = row['assigned_user_id'] if row and row['assigned_user_id'] else device_id
+        device_cache.set(device_id, user_id)
 
-            c.execute('SELECT assigned_user_id FROM device_assignments WHERE device_id = ?', (device_id,))
-            row = c.fetchone()
+    worker_profile = profile_cache.get(user_id)
+    if worker_profile is not None:
+        return user_id, worker_profile
+
+    c.execute('SELECT * FROM workers WHERE worker_id=?', (user_id,))
+    worker_row = c.fetchone()
+
+    if not worker_row:
+        print(f"⚙️ No worker found for {user_id}, creating auto user...")
+        c.execute('''INSERT INTO workers (worker_id, password, name, age, health_condition, work_environment, email, phone_number)
+                     VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+                  (user_id, 'password123', 'Auto Worker', 25, 'Healthy', 'Normal', '', ''))
+        c.execute('SELECT * FROM workers WHERE worker_id=?', (user_id,))
+        # Not cached until the insert is committed; the next reading will pick it up
+        profile_cache.invalidate(user_id)
+        return user_id, dict(c.fetchone())
 
-            user_id = row['assigned_user_id'] if row and row['assigned_user_id'] else device_id
-            print(f"✅ Mapped User ID: {user_id}")
+    worker_profile = dict(worker_row)
+    profile_cache.set(user_id, worker_profile)
+    return user_id, worker_profile
 
-            c.execute('SELECT * FROM workers WHERE worker_id=?', (user_id,))
-            worker_row = c.fetchone()
 
-            if not worker_row:
-                print("⚙️ No worker found, creating auto user...")
-                c.execute('''INSERT INTO workers (worker_id, password, name, age, health_condition, work_environment, email, phone_number)
-                             VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
-                          (user_id, 'password123', 'Auto Worker', 25, 'Healthy', 'Normal', '', ''))
-                conn.commit()
-                c.execute('SELECT * FROM workers WHERE worker_id=?', (user_id,))
-                worker_row = c.fetchone()
+def send_unsafe_alerts(worker_profile, user_id, risk_label, predicted_label, fuzzy_risk, flags, timestamp):
+    subject = f"⚠️ Safety Alert for {user_id}"
+    body = f"""
+    Dear {worker_profile['name']},
 
-            worker_profile = dict(worker_row)
-            print(f"✅ Worker Profile: {worker_profile}")
+    🚨 Safety Alert Detected 🚨
 
-            c.execute('''INSERT INTO sensor_data (timestamp, temperature, humidity, voc, co, pm1, pm25, pm10, user_id)
-                         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-                      (timestamp, temp, hum, voc, co, pm1, pm25, pm10, user_id))
-            conn.commit()
+    Risk Level: {risk_label}
+    Model Prediction: {predicted_label}
+    Fuzzy Risk: {fuzzy_risk}
+    Detected Issues: {', '.join(flags) if flags else 'No issues detected'}
+    Timestamp: {timestamp}
 
-        print("✅ Data successfully saved to database")
+    Please follow the personalized safety measures immediately:
+    - {generate_personalized_measures(worker_profile, flags)}
 
-        with open(DATA_LOG, 'a', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow([timestamp, temp, hum, voc, co, pm1, pm25, pm10, user_id])
+    Stay Safe.
 
-        print("✅ Data logged to CSV")
-        
+    Regards,
+    Industry Safety System
+    """
+
+    send_email_alert(worker_profile['email'], subject, body)
+    send_sms_alert(worker_profile['phone_number'], subject)
+
+
+LATEST_COLUMNS = ['id', 'timestamp', 'temperature', 'humidity', 'voc', 'co', 'pm1', 'pm25', 'pm10',
+                  'user_id', 'ts_epoch']
+
+
+def ingest_readings(readings):
+    """Store, score and dispatch a list of validated readings.
+
+    Device→worker mappings are resolved once per device, rows are inserted
+    in one transaction and the model scores all readings in a single call.
+    Returns one result dict per reading, in input order.
+    """
+    default_timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    workers = {}
+    rows = []
+    epochs = []
+
+    with db.connection() as conn:
+        c = conn.cursor()
+
+        for content in readings:
+            device_id = content['device_id']
+            if device_id not in workers:
+                workers[device_id] = resolve_worker(c, device_id)
+            user_id = workers[device_id][0]
+
+            timestamp = content.get('timestamp', default_timestamp)
+            rows.append((timestamp,
+                         content['temperature'], content['humidity'], content['voc'], content['co'],
+                         content['pm1'], content['pm'], content['pm10'], user_id))
+            try:
+                ts = to_epoch(timestamp)
+                if ts is not None and not -2 ** 63 <= ts < 2 ** 63:
+                    raise OverflowError(f'{ts} is out of range')
+            except (TypeError, ValueError, OverflowError):
+                ts = int(time.time())
+            epochs.append(ts)
+
+        c.executemany('''INSERT INTO sensor_data (timestamp, temperature, humidity, voc, co, pm1, pm25, pm10, user_id, ts_epoch)
+                         VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''', [(*row, ts) for row, ts in zip(rows, epochs)])
+        # One INSERT statement inside one write transaction gets consecutive
+        # ids; read the last one before any other write can change it
+        first_id = c.execute('SELECT last_insert_rowid()').fetchone()[0] - len(rows) + 1
+
+        update_rollups(c, [(ts, row[8], dict(zip(ROLLUP_METRICS, row[1:8]))) for row, ts in zip(rows, epochs)],
+                       SITE_ID)
+
+    print(f"✅ {len(rows)} reading(s) saved to database")
+
+    stored_rows = [dict(zip(LATEST_COLUMNS, (first_id + i, *row, ts)))
+                   for i, (row, ts) in enumerate(zip(rows, epochs))]
+    latest_readings.update(stored_rows)
+    ring_buffers.append_rows((row[8], ts, row[1:8]) for row, ts in zip(rows, epochs))
+
+    sensor_log.write_rows(rows)
+
+    features = [list(row[1:8]) for row in rows]
+    predicted_classes = predict_risk_classes(features)
+    predicted_labels = get_label_encoder().inverse_transform(predicted_classes)
+
+    device_ids = list(workers)
+    position = {device_id: i for i, device_id in enumerate(device_ids)}
+    compiled = [compile_thresholds(workers[device_id][1]) for device_id in device_ids]
+    reading_index = [position[content['device_id']] for content in readings]
 
-        thresholds = get_adaptive_thresholds(worker_profile)
-        flags = []
+    pollutant_values = [[row[6], row[4], row[3]] for row in rows]  # pm25, co, voc
+    flag_mask = evaluate_flags(pollutant_values, threshold_matrix(compiled, reading_index)).tolist()
+    fuzzy_risks = fuzzy_risk_level_batch(*zip(*pollutant_values))
 
-        if pm25 > thresholds['pm25']:
-            flags.append(f"PM2.5 {pm25} > {thresholds['pm25']}")
-        if co > thresholds['co']:
-            flags.append(f"CO {co} > {thresholds['co']}")
-        if voc > thresholds['voc']:
-            flags.append(f"VOC {voc} > {thresholds['voc']}")
+    results = []
 
-        features = [[temp, hum, voc, co, pm1, pm25, pm10]]
-        predicted_class = model.predict(features)[0]
-        predicted_label = label_encoder.inverse_transform([predicted_class])[0]
+    for i, (content, row, predicted_label) in enumerate(zip(readings, rows, predicted_labels)):
+        timestamp, temp, hum, voc, co, pm1, pm25, pm10, user_id = row
+        worker_profile = workers[content['device_id']][1]
+        thresholds = dict(compiled[reading_index[i]].limits)
 
-        fuzzy_risk = fuzzy_risk_level(pm25, co, voc)
+        flags = format_flags({'pm25': pm25, 'co': co, 'voc': voc}, thresholds, flag_mask[i])
+        fuzzy_risk = str(fuzzy_risks[i])
 
-        risk_label = "Unsafe" if predicted_label in ['High', 'Critical'] or fuzzy_risk == 'High' else "Safe"
+        # Sustained exposure can be unsafe even when each reading is under its threshold
+        worker_exposure = exposure.update(user_id, epochs[i], {'co': co, 'pm25': pm25})
+        exposure_flags = exposure.flags(worker_exposure)
+        flags += exposure_flags
+
+        risk_label = "Unsafe" if predicted_label in ['High', 'Critical'] or fuzzy_risk == 'High' or exposure_flags else "Safe"
 
         alert_message = f"Alert for {user_id}: Risk - {risk_label}, Model: {predicted_label}, Fuzzy: {fuzzy_risk}, Issues: {', '.join(flags)}"
         print(f"✅ Final Alert: {alert_message}")
@@ -434,64 +662,172 @@ def submit_data():
             "alert": alert_message,
             "thresholds": thresholds,
             "flags": flags,
+            "exposure": worker_exposure,
             "sensor_data": content,
             }
-        try:
-            requests.post(WS_SERVER_URL, json={**payload, "target_role": "worker"})
-            requests.post(WS_SERVER_URL, json={**payload, "target_role": "admin"})
-            print("✅ Data sent to both Worker and Admin WebSocket channels")
-        except Exception as e:
-            print(f"❌ Failed to send WebSocket data: {e}")
+        # Only the worker's own sockets and the admin dashboards get the reading
+        topics = (f"user:{user_id}", f"device:{content['device_id']}")
+        if not ws_publisher.publish(payload, target_roles=("admin",), topics=topics):
+            print("❌ WebSocket queue full, live update dropped")
+
+        events.publish('reading', {
+            **stored_rows[i],
+            "user_name": worker_profile['name'],
+            "risk_level": risk_label,
+            "model_label": predicted_label,
+            "fuzzy_risk": fuzzy_risk,
+            "flags": flags,
+            "exposure": worker_exposure,
+        }, user_id=user_id, roles=("admin",))
 
         if risk_label == "Unsafe":
-            subject = f"⚠️ Safety Alert for {user_id}"
-            body = f"""
-            Dear {worker_profile['name']},
+            send_unsafe_alerts(worker_profile, user_id, risk_label, predicted_label, fuzzy_risk, flags, timestamp)
+
+        results.append({
+            'status': 'success',
+            'user_id': user_id,
+            'final_risk': risk_label,
+            'model_prediction': predicted_label,
+            'fuzzy_risk': fuzzy_risk,
+            'flags': flags,
+            'exposure': worker_exposure,
+            'message': alert_message
+        })
+
+    return results
+
+
+def is_authorized_sensor():
+    token = request.headers.get("X-SENSOR-TOKEN")
+    return token == "s3nsor_@uth_2025"
+
+
+@app.route('/submit_data', methods=['POST'])
+def submit_data():
+    try:
+        print("\n✅ [API HIT] Received data at /submit_data")
+
+        content = request.get_json()
+        print(f"✅ Received JSON: {content}")
+
+        if not is_authorized_sensor():
+            print("❌ Unauthorized token")
+            return jsonify({'status': 'Unauthorized'}), 401
 
-            🚨 Safety Alert Detected 🚨
+        error = validate_reading(content)
+        if error:
+            print(f"❌ {error}")
+            return jsonify({'error': error}), 400
 
-            Risk Level: {risk_label}
-            Model Prediction: {predicted_label}
-            Fuzzy Risk: {fuzzy_risk}
-            Detected Issues: {', '.join(flags) if flags else 'No issues detected'}
-            Timestamp: {timestamp}
+        result = ingest_readings([content])[0]
+        result.pop('user_id')
 
-            Please follow the personalized safety measures immediately:
-            - {generate_personalized_measures(worker_profile, flags)}
+        return jsonify(result), 200
 
-            Stay Safe.
+    except Exception as e:
+        print(f"❌ Exception in submit_data: {str(e)}")
+        return jsonify({'error': str(e)}), 500
 
-            Regards,
-            Industry Safety System
-            """
 
-            send_email_alert(worker_profile['email'], subject, body)
-            send_sms_alert(worker_profile['phone_number'], subject)
+@app.route('/submit_data/batch', methods=['POST'])
+def submit_data_batch():
+    """
+    Expected POST JSON: a list of readings in the /submit_data format, or
+    {"readings": [...]}. Invalid readings are skipped and listed by index
+    in "rejected"; "results" has one entry per reading.
+    """
+    try:
+        content = request.get_json()
+
+        if not is_authorized_sensor():
+            print("❌ Unauthorized token")
+            return jsonify({'status': 'Unauthorized'}), 401
+
+        readings = content.get('readings') if isinstance(content, dict) else content
+        if not isinstance(readings, list) or not readings:
+            return jsonify({'error': 'Expected a non-empty list of readings'}), 400
+
+        print(f"\n✅ [API HIT] Received batch of {len(readings)} readings at /submit_data/batch")
+
+        results = [None] * len(readings)
+        valid_indexes = []
+        rejected = []
+        for i, reading in enumerate(readings):
+            error = validate_reading(reading)
+            if error:
+                results[i] = {'status': 'error', 'error': error}
+                rejected.append({'index': i, 'error': error})
+            else:
+                valid_indexes.append(i)
+
+        if valid_indexes:
+            ingested = ingest_readings([readings[i] for i in valid_indexes])
+            for i, result in zip(valid_indexes, ingested):
+                results[i] = result
 
         return jsonify({
             'status': 'success',
-            'final_risk': risk_label,
-            'model_prediction': predicted_label,
-            'fuzzy_risk': fuzzy_risk,
-            'flags': flags,
-            'message': alert_message
+            'accepted': len(valid_indexes),
+            'rejected': rejected,
+            'results': results
         }), 200
 
     except Exception as e:
-        print(f"❌ Exception in submit_data: {str(e)}")
+        print(f"❌ Exception in submit_data_batch: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
     
+@app.route('/api/metrics/notifications', methods=['GET'])
+def get_notification_metrics():
+    return jsonify(notifier.stats()), 200
+
+
+@app.route('/api/metrics/websocket', methods=['GET'])
+def get_websocket_metrics():
+    return jsonify(ws_publisher.stats()), 200
+
+
+@app.route('/api/metrics/stream', methods=['GET'])
+def get_stream_metrics():
+    return jsonify(events.stats()), 200
+
+
+@app.route('/api/metrics/retention', methods=['GET'])
+def get_retention_metrics():
+    return jsonify(retention.stats()), 200
+
+
+@app.route('/api/metrics/exposure', methods=['GET'])
+def get_exposure_metrics():
+    return jsonify(exposure.stats()), 200
+
+
+@app.route('/api/metrics/db', methods=['GET'])
+def get_db_metrics():
+    return jsonify(db.stats()), 200
+
+
+@app.route('/api/metrics/log', methods=['GET'])
+def get_log_metrics():
+    return jsonify(sensor_log.stats()), 200
+
+
+@app.route('/api/metrics/cache', methods=['GET'])
+def get_cache_metrics():
+    return jsonify({
+        'device_assignments': device_cache.stats(),
+        'worker_profiles': profile_cache.stats(),
+        'latest_readings': latest_readings.stats()
+    }), 200
+
+
 @app.route('/worker/<worker_id>', methods=['GET'])
 def get_worker(worker_id):
     try:
-        conn = sqlite3.connect(DB_FILE)
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
-
-        c.execute('SELECT * FROM workers WHERE worker_id = ?', (worker_id,))
-        row = c.fetchone()
-        conn.close()
+        with db.connection() as conn:
+            c = conn.cursor()
+            c.execute('SELECT * FROM workers WHERE worker_id = ?', (worker_id,))
+            row = c.fetchone()
 
         if row:
             return jsonify(dict(row)), 200
@@ -504,13 +840,10 @@ def get_worker(worker_id):
 @app.route('/api/sensor_data', methods=['GET'])
 def get_all_sensor_data():
     try:
-        conn = sqlite3.connect(DB_FILE)
-        conn.row_factory = sqlite3.Row
-        c = conn.cursor()
-
-        c.execute('SELECT * FROM sensor_data ORDER BY id DESC LIMIT 100')  # Latest 100 entries
-        rows = c.fetchall()
-        conn.close()
+        with db.connection() as conn:
+            c = conn.cursor()
+            c.execute('SELECT * FROM sensor_data ORDER BY id DESC LIMIT 100')  # Latest 100 entries
+            rows = c.fetchall()
 
         sensor_data = [dict(row) for row in rows]
         return jsonify(sensor_data), 200
@@ -518,7 +851,160 @@ def get_all_sensor_data():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     
-if __name__ == '__main__':
-    initialize_database()  # Must be called BEFORE starting the server
-    app.run(debug=True, port=5001, host='0.0.0.0')
+@app.route('/api/sensor_data/history', methods=['GET'])
+def get_sensor_history():
+    """
+    Query params: user_id, from, to (epoch seconds or 'YYYY-MM-DD HH:MM:SS'),
+    limit (max 1000), order (desc|asc) and cursor (next_cursor of the
+    previous page). Archived rows are included.
+    """
+    try:
+        args = request.args
+        with db.connection() as conn:
+            rows, next_cursor = query_history_with_archive(
+                conn.cursor(),
+                ARCHIVE_DIR,
+                user_id=args.get('user_id'),
+                start=to_epoch(args.get('from')),
+                end=to_epoch(args.get('to')),
+                limit=args.get('limit', 100),
+                cursor=args.get('cursor'),
+                order=args.get('order', 'desc'),
+            )
+
+        return jsonify({'items': rows, 'next_cursor': next_cursor}), 200
+
+    except ValueError as e:
+        return jsonify({'error': f'Invalid query parameter: {e}'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 
+@app.route('/api/sensor_data/export', methods=['GET'])
+def export_sensor_data():
+    """
+    Query params: format (ndjson|csv, default ndjson), from, to, user_id.
+    Streams every matching row, archived ones included, in chunks read
+    with fetchmany; gzip-compressed when the client accepts it.
+    """
+    try:
+        args = request.args
+        fmt = args.get('format', 'ndjson')
+        if fmt not in EXPORT_FORMATS:
+            return jsonify({'error': f"format must be one of {list(EXPORT_FORMATS)}"}), 400
+        user_id = args.get('user_id')
+        start = to_epoch(args.get('from'))
+        end = to_epoch(args.get('to'))
+    except ValueError as e:
+        return jsonify({'error': f'Invalid query parameter: {e}'}), 400
+
+    def generate():
+        # The connection (and its read snapshot) is held until the stream ends
+        with db.connection() as conn:
+            chunks = iter_export_rows(conn, ARCHIVE_DIR, user_id, start, end)
+            yield from (encode_csv if fmt == 'csv' else encode_ndjson)(chunks)
+
+    headers = {'Content-Disposition': f'attachment; filename=sensor_data.{fmt}'}
+    body = generate()
+    if 'gzip' in request.accept_encodings:
+        body = gzip_stream(body)
+        headers['Content-Encoding'] = 'gzip'
+    headers['Vary'] = 'Accept-Encoding'
+    return Response(body, mimetype=EXPORT_FORMATS[fmt], headers=headers)
+
+
+@app.route('/api/exposure', methods=['GET'])
+def get_all_exposure():
+    return jsonify(exposure.all()), 200
+
+
+@app.route('/api/exposure/<user_id>', methods=['GET'])
+def get_worker_exposure(user_id):
+    """8-hour TWA and 15-minute STEL per pollutant, with their limits."""
+    worker_exposure = exposure.get(user_id)
+    if worker_exposure is None:
+        return jsonify({'error': 'No readings for this worker yet'}), 404
+    return jsonify({'user_id': user_id, 'exposure': worker_exposure,
+                    'flags': exposure.flags(worker_exposure)}), 200
+
+
+@app.route('/api/sensor_data/window', methods=['GET'])
+def get_sensor_window():
+    """
+    Query params: user_id (required), minutes (default 10) and points (if
+    set, also return up to that many of the latest readings for sparklines).
+    Served from the worker's ring buffer, not the database.
+    """
+    try:
+        user_id = request.args.get('user_id')
+        if not user_id:
+            return jsonify({'error': 'user_id is required'}), 400
+        minutes = float(request.args.get('minutes', 10))
+        points = int(request.args.get('points', 0))
+
+        buffer = ring_buffers.get(user_id, create=False)
+        if buffer is None:
+            return jsonify({'error': 'No recent readings for this user'}), 404
+
+        result = {'user_id': user_id, 'minutes': minutes, **buffer.window_stats(minutes * 60)}
+        if points > 0:
+            records = buffer.window(minutes * 60)[-points:]
+            result['series'] = {'ts': records['ts'].tolist(), 'values': records['values'].tolist()}
+        return jsonify(result), 200
+
+    except ValueError as e:
+        return jsonify({'error': f'Invalid query parameter: {e}'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/sensor_data/rollup', methods=['GET'])
+def get_sensor_rollup():
+    """
+    Query params: user_id (omit for site-wide), from, to, and optionally
+    resolution (minute|hour). Without a resolution, ranges up to 6 hours
+    use minute buckets and longer ranges use hourly buckets.
+    """
+    try:
+        args = request.args
+        start = to_epoch(args.get('from'))
+        end = to_epoch(args.get('to'))
+        user_id = args.get('user_id')
+        scope, scope_id = ('user', user_id) if user_id else ('site', SITE_ID)
+
+        with db.connection() as conn:
+            resolution, buckets = query_rollups(conn.cursor(), scope, scope_id, start, end,
+                                                args.get('resolution') or choose_resolution(start, end))
+
+        return jsonify({'resolution': resolution, 'scope': scope, 'scope_id': scope_id, 'buckets': buckets}), 200
+
+    except ValueError as e:
+        return jsonify({'error': f'Invalid query parameter: {e}'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Smart Industry ingest API")
+    parser.add_argument('--startup-report', action='store_true',
+                        help="print an import-time breakdown of a cold start and exit")
+    parser.add_argument('--no-warm-up', action='store_true',
+                        help="load models on the first request instead of at startup")
+    args = parser.parse_args()
+
+    if args.startup_report:
+        from startup_report import print_startup_report
+        print_startup_report()
+    else:
+        initialize_database()  # Must be called BEFORE starting the server
+        # With debug=True the reloader re-runs this file in a child process
+        # that does the serving; the watching parent needs no models or threads
+        if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+            if not args.no_warm_up:
+                warm_up()
+            exposure.start()
+            if retention.horizon_days > 0:
+                retention.start()
+        app.run(debug=True, port=5001, host='0.0.0.0')
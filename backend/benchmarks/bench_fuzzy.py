@@ -0,0 +1,49 @@
+# backend/benchmarks/bench_fuzzy.py
+#
+# Throughput of the scalar fuzzy_risk_level loop vs the vectorized
+# fuzzy_risk_codes on synthetic readings, with an equality check.
+#
+#   cd backend && python benchmarks/bench_fuzzy.py --rows 1000000
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.fuzzy_logic import FUZZY_RISK_LABELS, fuzzy_risk_codes, fuzzy_risk_level  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=1000000)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    pm = rng.uniform(0, 60, args.rows).round(2)
+    co = rng.uniform(0, 15, args.rows).round(2)
+    voc = rng.uniform(0, 1, args.rows).round(2)
+    health = rng.choice(np.array(['Healthy', 'Asthma', 'Heart'], dtype=object), args.rows)
+
+    start = time.perf_counter()
+    scalar = [fuzzy_risk_level(p, c, v, h) for p, c, v, h in
+              zip(pm.tolist(), co.tolist(), voc.tolist(), health.tolist())]
+    scalar_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    codes = fuzzy_risk_codes(pm, co, voc, health)
+    vector_time = time.perf_counter() - start
+
+    assert (FUZZY_RISK_LABELS[codes] == np.array(scalar)).all(), "vectorized results differ from scalar"
+
+    print(f"Rows:        {args.rows:,}")
+    print(f"Scalar loop: {scalar_time:.3f} s ({args.rows / scalar_time:,.0f} rows/s)")
+    print(f"Vectorized:  {vector_time:.3f} s ({args.rows / vector_time:,.0f} rows/s)")
+    print(f"Speed-up:    {scalar_time / vector_time:.0f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+# backend/benchmarks/bench_thresholds.py
+#
+# Compares the original per-reading threshold/flag path with the compiled
+# rule table and vectorized flag evaluation.
+#
+#   cd backend && python benchmarks/bench_thresholds.py --readings 100000
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from threshold_rules import compile_thresholds, evaluate_flags, format_flags, threshold_matrix  # noqa: E402
+
+HEALTH = ['Healthy', 'Asthma', 'Heart condition', 'Respiratory issues', 'Cardio']
+ENVIRONMENTS = ['Normal', 'Welding bay', 'Chemical plant', 'Assembly']
+
+
+def legacy_thresholds(worker):
+    thresholds = {'co': 35, 'pm25': 35, 'voc': 0.5}
+
+    if worker['age'] >= 60:
+        thresholds['co'] = 25
+
+    health = worker['health_condition'].lower()
+    if 'asthma' in health or 'respiratory' in health:
+        thresholds.update({'pm25': 20, 'voc': 0.3})
+    if 'heart' in health or 'cardio' in health:
+        thresholds['co'] = min(thresholds['co'], 25)
+        thresholds['pm25'] = min(thresholds['pm25'], 25)
+
+    env = worker['work_environment'].lower()
+    if 'welding' in env or 'chemical' in env:
+        thresholds['co'] = min(thresholds['co'], 25)
+        thresholds['voc'] = min(thresholds['voc'], 0.3)
+
+    return thresholds
+
+
+def legacy_flags(thresholds, pm25, co, voc):
+    flags = []
+    if pm25 > thresholds['pm25']:
+        flags.append(f"PM2.5 {pm25} > {thresholds['pm25']}")
+    if co > thresholds['co']:
+        flags.append(f"CO {co} > {thresholds['co']}")
+    if voc > thresholds['voc']:
+        flags.append(f"VOC {voc} > {thresholds['voc']}")
+    return flags
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--readings', type=int, default=100000)
+    parser.add_argument('--workers', type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    workers = [{
+        'age': rng.randint(18, 70),
+        'health_condition': rng.choice(HEALTH),
+        'work_environment': rng.choice(ENVIRONMENTS),
+    } for _ in range(args.workers)]
+    worker_index = [rng.randrange(args.workers) for _ in range(args.readings)]
+    values = [[round(rng.uniform(0, 60), 2), round(rng.uniform(0, 50), 2), round(rng.uniform(0, 1), 2)]
+              for _ in range(args.readings)]
+
+    start = time.perf_counter()
+    legacy = [legacy_flags(legacy_thresholds(workers[w]), pm25, co, voc)
+              for w, (pm25, co, voc) in zip(worker_index, values)]
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    compiled = [compile_thresholds(w) for w in workers]
+    mask = evaluate_flags(values, threshold_matrix(compiled, worker_index)).tolist()
+    mask_time = time.perf_counter() - start
+    fast = [format_flags({'pm25': pm25, 'co': co, 'voc': voc}, compiled[w].limits, m) if any(m) else []
+            for w, (pm25, co, voc), m in zip(worker_index, values, mask)]
+    compiled_time = time.perf_counter() - start
+
+    assert fast == legacy, "compiled rules disagree with the legacy path"
+
+    print(f"Readings:          {args.readings}")
+    print(f"Legacy per-row:    {legacy_time * 1000:.1f} ms ({args.readings / legacy_time:,.0f} rows/s)")
+    print(f"Compiled + mask:   {mask_time * 1000:.1f} ms ({args.readings / mask_time:,.0f} rows/s)")
+    print(f"Compiled + flags:  {compiled_time * 1000:.1f} ms ({args.readings / compiled_time:,.0f} rows/s)")
+
+
+if __name__ == '__main__':
+    main()
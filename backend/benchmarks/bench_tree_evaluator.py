@@ -0,0 +1,50 @@
+# backend/benchmarks/bench_tree_evaluator.py
+#
+# Latency of the pickled XGBoost model vs the exported NumPy tree
+# evaluator for single rows and batches (run ml/tree_export.py first).
+#
+#   cd backend && python benchmarks/bench_tree_evaluator.py
+
+import os
+import sys
+import time
+import warnings
+
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ml.tree_evaluator import TreeEnsemble  # noqa: E402
+from ml.tree_export import FEATURES, MODEL_FILE, TREES_FILE  # noqa: E402
+
+
+def timed(fn, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat, result
+
+
+def main():
+    warnings.filterwarnings('ignore')
+    model = joblib.load(MODEL_FILE)
+    ensemble = TreeEnsemble.load(TREES_FILE)
+
+    rng = np.random.default_rng(42)
+    print(f"{'rows':>8} {'xgboost':>12} {'numpy':>12} {'speed-up':>9}")
+    for rows in (1, 10, 100, 1000, 20000):
+        X = rng.uniform(0, 60, (rows, len(FEATURES))).astype(np.float32)
+        frame = pd.DataFrame(X, columns=FEATURES)
+        repeat = max(3, 2000 // rows)
+
+        xgb_time, expected = timed(lambda: model.predict(frame), repeat)
+        np_time, actual = timed(lambda: ensemble.predict(X), repeat)
+        assert (np.asarray(expected) == actual).all(), "evaluator disagrees with the XGBoost model"
+
+        print(f"{rows:>8} {xgb_time * 1e6:>10.0f}us {np_time * 1e6:>10.0f}us {xgb_time / np_time:>8.1f}x")
+
+
+if __name__ == '__main__':
+    main()
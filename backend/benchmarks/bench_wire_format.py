@@ -0,0 +1,128 @@
+# backend/benchmarks/bench_wire_format.py
+#
+# Compares JSON with the wire_format frames (full and per-user delta) on a
+# stream of live reading payloads shaped like the ones submit_data sends:
+# bytes per message, plus encode and decode throughput. Per-message
+# deflate (what permessage-deflate would do to the JSON) is shown for size.
+#
+#   cd backend && python benchmarks/bench_wire_format.py --workers 200 --readings 50
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+import zlib
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'websocket_server'))
+
+from wire_format import Decoder, DeltaEncoder, encode_frame, encode_wire, flatten  # noqa: E402
+
+MODEL_LABELS = ['Low', 'Moderate', 'High', 'Critical']
+FUZZY_LABELS = ['Low', 'Moderate', 'High']
+LIMITS = {'co': {'twa': 25.0, 'stel': 75.0}, 'pm25': {'twa': 35.0, 'stel': 70.0}}
+
+
+def make_stream(workers, readings, seed=42):
+    """Payloads as /broadcast forwards them, interleaved across workers like live traffic."""
+    rng = random.Random(seed)
+    state = {}
+    for w in range(workers):
+        state[f"W{w:04d}"] = {
+            'name': f"Worker {w}",
+            'device': f"esp32-{w:04d}",
+            'thresholds': {'co': rng.choice([25, 35]), 'pm25': rng.choice([20, 25, 35]), 'voc': rng.choice([0.3, 0.5])},
+            'values': {'temperature': 26.0, 'humidity': 60.0, 'voc': 0.3, 'co': 10.0, 'pm1': 8.0, 'pm': 20.0,
+                       'pm10': 30.0},
+            'twa': {'co': 0.0, 'pm25': 0.0},
+        }
+
+    messages = []
+    for r in range(readings):
+        timestamp = time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(1_790_000_000 + r * 5))
+        for user_id, worker in state.items():
+            values = worker['values']
+            for key, value in values.items():
+                values[key] = round(max(0.0, value + rng.gauss(0, max(value * 0.03, 0.05))), 1 if key != 'voc' else 2)
+            thresholds = worker['thresholds']
+            flags = [f"{label} {values[key]} > {thresholds[limit]}"
+                     for label, key, limit in (('PM2.5', 'pm', 'pm25'), ('CO', 'co', 'co'), ('VOC', 'voc', 'voc'))
+                     if values[key] > thresholds[limit]]
+            for pollutant, key in (('co', 'co'), ('pm25', 'pm')):
+                worker['twa'][pollutant] = round(worker['twa'][pollutant] * 0.99 + values[key] * 0.01, 3)
+            model_label = rng.choice(MODEL_LABELS)
+            fuzzy_risk = rng.choice(FUZZY_LABELS)
+            risk_level = "Unsafe" if model_label in ('High', 'Critical') or fuzzy_risk == 'High' or flags else "Safe"
+            alert = (f"Alert for {user_id}: Risk - {risk_level}, Model: {model_label}, Fuzzy: {fuzzy_risk}, "
+                     f"Issues: {', '.join(flags)}")
+            messages.append({
+                "user_id": user_id,
+                "user_name": worker['name'],
+                "risk_level": risk_level,
+                "model_label": model_label,
+                "fuzzy_risk": fuzzy_risk,
+                "alert": alert,
+                "thresholds": thresholds,
+                "flags": flags,
+                "exposure": {p: {'twa': worker['twa'][p], 'stel': round(worker['twa'][p] * 1.5, 3),
+                                 'twa_limit': LIMITS[p]['twa'], 'stel_limit': LIMITS[p]['stel']} for p in LIMITS},
+                "sensor_data": {"device_id": worker['device'], "timestamp": timestamp, **values},
+                "type": "alert",
+                "message": alert,
+                "timestamp": None,
+            })
+    return messages
+
+
+def timed(fn, items):
+    started = time.perf_counter()
+    out = [fn(item) for item in items]
+    return out, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=200)
+    parser.add_argument('--readings', type=int, default=50, help="readings per worker")
+    args = parser.parse_args()
+
+    messages = make_stream(args.workers, args.readings)
+    n = len(messages)
+    print(f"{n} messages from {args.workers} workers")
+
+    json_frames, json_enc = timed(json.dumps, messages)
+    _, json_dec = timed(json.loads, json_frames)
+    deflated = sum(len(zlib.compress(frame.encode(), 6)) for frame in json_frames)
+
+    full_frames, full_enc = timed(lambda m: encode_frame(encode_wire(flatten(m))), messages)
+    decoder = Decoder()
+    decoded, full_dec = timed(decoder.decode, full_frames)
+    assert decoded == messages, "full frames did not round-trip"
+
+    encoder = DeltaEncoder()
+    delta_frames, delta_enc = timed(lambda m: encoder.encode(m['user_id'], encode_wire(flatten(m))), messages)
+    decoder = Decoder()
+    decoded, delta_dec = timed(decoder.decode, delta_frames)
+    assert decoded == messages, "delta frames did not round-trip"
+
+    # The server flattens and encodes each broadcast once; every delta socket
+    # then only compares the encoded fields with what it sent that user last
+    wires = [encode_wire(flatten(m)) for m in messages]
+    encoder = DeltaEncoder()
+    _, delta_per_socket = timed(lambda pair: encoder.encode(*pair), [(m['user_id'], w) for m, w in zip(messages, wires)])
+
+    json_bytes = sum(len(frame) for frame in json_frames)
+    print(f"{'format':<16}{'bytes/msg':>10}{'vs JSON':>9}{'encode msg/s':>15}{'decode msg/s':>15}")
+    for name, size, enc, dec in (
+            ("JSON", json_bytes, json_enc, json_dec),
+            ("JSON + deflate", deflated, None, None),
+            ("binary full", sum(map(len, full_frames)), full_enc, full_dec),
+            ("binary delta", sum(map(len, delta_frames)), delta_enc, delta_dec)):
+        rates = f"{n / enc:>15,.0f}{n / dec:>15,.0f}" if enc else f"{'-':>15}{'-':>15}"
+        print(f"{name:<16}{size / n:>10.1f}{size / json_bytes:>9.1%}{rates}")
+    print(f"Delta frame per extra subscribed socket: {n / delta_per_socket:,.0f} msg/s")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,172 @@
+# backend/benchmarks/bench_ws_broadcast.py
+#
+# Starts websocket_server/ws_server.py under uvicorn, connects a few
+# thousand local clients (some of which never read, to act as slow
+# consumers), POSTs a series of broadcasts and reports how long the
+# healthy clients took to receive them.
+#
+#   cd backend && python benchmarks/bench_ws_broadcast.py --clients 2000 --slow 20
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import websockets
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVER_DIR = os.path.join(BASE_DIR, 'websocket_server')
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_server(port, server_dir, env):
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'ws_server:app', '--port', str(port), '--log-level', 'warning'],
+        cwd=server_dir, env={**os.environ, **env}, stdout=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.1):
+                return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("WebSocket server did not start")
+
+
+def percentile(values, q):
+    if not values:
+        return float('nan')
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+async def fast_client(url, latencies, expected, done):
+    async with websockets.connect(url, max_size=None) as ws:
+        await ws.recv()  # welcome
+        received = 0
+        async for raw in ws:
+            message = json.loads(raw)
+            if 'seq' not in message:
+                continue
+            latencies.append((time.time() - message['sent_at']) * 1000)
+            received += 1
+            if received == expected:
+                break
+    done.append(received)
+
+
+async def slow_client(port, stop):
+    # Completes the upgrade by hand and then never reads, with a small
+    # receive buffer, so the server's sends to it back up quickly
+    sock = socket.socket()
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    sock.setblocking(False)
+    await asyncio.get_running_loop().sock_connect(sock, ('127.0.0.1', port))
+    reader, writer = await asyncio.open_connection(sock=sock)
+    key = base64.b64encode(os.urandom(16)).decode()
+    writer.write((f"GET /ws/worker HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\nUpgrade: websocket\r\n"
+                  f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode())
+    await reader.readuntil(b'\r\n\r\n')
+    writer.transport.pause_reading()
+    try:
+        await stop.wait()
+    finally:
+        writer.transport.abort()
+
+
+async def run(args, url_base):
+    latencies, done = [], []
+    stop = asyncio.Event()
+    url = f"ws://127.0.0.1:{args.port}/ws/worker"
+
+    started = time.perf_counter()
+    slow = [asyncio.create_task(slow_client(args.port, stop)) for _ in range(args.slow)]
+    fast = []
+    for i in range(args.clients):
+        fast.append(asyncio.create_task(fast_client(url, latencies, args.messages, done)))
+        if i % 200 == 199:
+            await asyncio.sleep(0.05)
+    await asyncio.sleep(1.0 + args.clients / 1000)
+    print(f"Connected {args.clients} clients + {args.slow} slow in {time.perf_counter() - started:.1f}s")
+
+    padding = 'x' * args.payload_bytes
+    async with httpx.AsyncClient(base_url=url_base, timeout=args.timeout) as http:
+        started = time.perf_counter()
+        post_times = []
+        for seq in range(args.messages):
+            t0 = time.perf_counter()
+            try:
+                await http.post('/broadcast', json={'seq': seq, 'sent_at': time.time(), 'padding': padding,
+                                                    'target_roles': ['worker']})
+            except httpx.TimeoutException:
+                print(f"⚠️ POST /broadcast #{seq} timed out; the server is stalled on a slow client")
+                break
+            post_times.append((time.perf_counter() - t0) * 1000)
+            await asyncio.sleep(args.interval)
+
+        try:
+            await asyncio.wait_for(asyncio.gather(*fast), timeout=args.timeout)
+        except asyncio.TimeoutError:
+            print(f"⚠️ Not every client received all messages within {args.timeout}s")
+        elapsed = time.perf_counter() - started
+
+        response = await http.get('/metrics')
+        metrics = response.json() if response.status_code == 200 else None
+
+    stop.set()
+    for task in slow + fast:
+        task.cancel()
+    await asyncio.gather(*slow, *fast, return_exceptions=True)
+
+    print(f"Broadcasts: {args.messages} x {args.payload_bytes} B in {elapsed:.2f}s")
+    print(f"POST /broadcast:   p50 {percentile(post_times, 0.5):8.1f} ms  p99 {percentile(post_times, 0.99):8.1f} ms")
+    print(f"Client latency:    p50 {percentile(latencies, 0.5):8.1f} ms  p99 {percentile(latencies, 0.99):8.1f} ms  "
+          f"max {max(latencies, default=float('nan')):8.1f} ms")
+    print(f"Deliveries:        {len(latencies)} / {args.clients * args.messages} to healthy clients")
+    if metrics:
+        hist = metrics['broadcast_latency']
+        print(f"Server fan-out:    p50 {hist['p50_ms']} ms  p99 {hist['p99_ms']} ms  "
+              f"(dropped {metrics['dropped']}, slow disconnects {metrics['slow_disconnects']})")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=2000)
+    parser.add_argument('--slow', type=int, default=20, help="clients that never read")
+    parser.add_argument('--messages', type=int, default=50)
+    parser.add_argument('--payload-bytes', type=int, default=16384)
+    parser.add_argument('--interval', type=float, default=0.05, help="seconds between broadcasts")
+    parser.add_argument('--policy', default='drop_oldest', choices=['drop_oldest', 'disconnect'])
+    parser.add_argument('--queue-size', type=int, default=256)
+    parser.add_argument('--timeout', type=float, default=120)
+    parser.add_argument('--server-dir', default=SERVER_DIR, help="directory containing ws_server.py")
+    args = parser.parse_args()
+    args.port = free_port()
+
+    server = start_server(args.port, args.server_dir, {
+        'WS_SLOW_CLIENT_POLICY': args.policy,
+        'WS_SEND_QUEUE_SIZE': str(args.queue_size),
+    })
+    try:
+        asyncio.run(run(args, f"http://127.0.0.1:{args.port}"))
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+if __name__ == '__main__':
+    main()
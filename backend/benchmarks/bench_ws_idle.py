@@ -0,0 +1,183 @@
+# backend/benchmarks/bench_ws_idle.py
+#
+# Opens many idle WebSocket connections to websocket_server/ws_server.py
+# and samples the server's CPU and memory while nothing is being sent.
+# Then a few "dead" clients connect and stop answering pings, to time how
+# long the server takes to notice and drop them.
+#
+#   cd backend && python benchmarks/bench_ws_idle.py --clients 10000 --dead 100
+#
+# Needs a file-descriptor limit above the client count (ulimit -n).
+
+import argparse
+import asyncio
+import base64
+import os
+import resource
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import websockets
+
+from bench_ws_broadcast import SERVER_DIR, free_port
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+
+
+def start_server(port, server_dir, ping_interval, ping_timeout):
+    env = {**os.environ, 'WS_PING_INTERVAL': str(ping_interval), 'WS_PING_TIMEOUT': str(ping_timeout)}
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'ws_server:app', '--port', str(port), '--log-level', 'warning',
+         '--ws-ping-interval', str(ping_interval), '--ws-ping-timeout', str(ping_timeout),
+         '--backlog', '4096'],
+        cwd=server_dir, env=env, stdout=subprocess.DEVNULL)
+    for _ in range(100):
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.1):
+                return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError("WebSocket server did not start")
+
+
+def cpu_seconds(pid):
+    with open(f'/proc/{pid}/stat') as f:
+        fields = f.read().rsplit(')', 1)[1].split()
+    return (int(fields[11]) + int(fields[12])) / CLOCK_TICKS  # utime + stime
+
+
+def rss_mb(pid):
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return float('nan')
+
+
+async def sample_cpu(pid, seconds):
+    start_cpu, start = cpu_seconds(pid), time.perf_counter()
+    await asyncio.sleep(seconds)
+    return 100 * (cpu_seconds(pid) - start_cpu) / (time.perf_counter() - start)
+
+
+async def idle_client(url, stop):
+    # ping_interval=None: only the server pings; the library still answers them
+    async with websockets.connect(url, ping_interval=None, open_timeout=60):
+        await stop.wait()
+
+
+async def dead_client(port, connected, stop):
+    # Completes the upgrade by hand, then never reads or answers a ping again
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    key = base64.b64encode(os.urandom(16)).decode()
+    writer.write((f"GET /ws/worker HTTP/1.1\r\nHost: 127.0.0.1:{port}\r\nUpgrade: websocket\r\n"
+                  f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode())
+    await reader.readuntil(b'\r\n\r\n')
+    connected.set()
+    writer.transport.pause_reading()
+    try:
+        await stop.wait()
+    finally:
+        writer.transport.abort()
+
+
+async def connection_count(http):
+    try:
+        response = await http.get('/metrics')
+    except httpx.HTTPError:
+        return None
+    if response.status_code != 200:
+        return None
+    return sum(response.json()['connections'].values())
+
+
+async def run(args, pid):
+    url = f"ws://127.0.0.1:{args.port}/ws/worker"
+    stop = asyncio.Event()
+    tasks = []
+
+    print(f"Idle server:        CPU {await sample_cpu(pid, 2):5.1f}%  RSS {rss_mb(pid):7.1f} MB")
+
+    started = time.perf_counter()
+    for i in range(args.clients):
+        tasks.append(asyncio.create_task(idle_client(url, stop)))
+        if i % args.batch == args.batch - 1:
+            await asyncio.sleep(0.2)
+
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", timeout=30) as http:
+        while time.perf_counter() - started < args.connect_timeout:
+            count = await connection_count(http)
+            if count == args.clients or (count is None and time.perf_counter() - started > args.clients / 500):
+                break
+            failed = sum(task.done() for task in tasks)
+            if failed:
+                print(f"⚠️ {failed} clients failed to connect")
+                break
+            await asyncio.sleep(0.5)
+        print(f"Connected:          {args.clients} clients in {time.perf_counter() - started:.1f}s")
+
+        await asyncio.sleep(1)
+        cpu = await sample_cpu(pid, args.duration)
+        print(f"{args.clients} idle:         CPU {cpu:5.1f}%  RSS {rss_mb(pid):7.1f} MB  "
+              f"(sampled over {args.duration:.0f}s, ping every {args.ping_interval:.0f}s)")
+
+        if args.dead:
+            # Time from the moment the dead clients go quiet until the server has dropped them all
+            dead_connected = [asyncio.Event() for _ in range(args.dead)]
+            tasks += [asyncio.create_task(dead_client(args.port, event, stop)) for event in dead_connected]
+            await asyncio.gather(*(event.wait() for event in dead_connected))
+            started = time.perf_counter()
+            count = await connection_count(http)
+            if count is None:
+                print("Dead clients:       server has no /metrics, cannot tell when they are dropped")
+            else:
+                deadline = args.ping_interval + args.ping_timeout + 30
+                while count > args.clients and time.perf_counter() - started < deadline:
+                    await asyncio.sleep(0.25)
+                    count = await connection_count(http)
+                print(f"Dead clients:       {args.clients + args.dead - count} of {args.dead} dropped "
+                      f"within {time.perf_counter() - started:.1f}s "
+                      f"(ping interval + timeout = {args.ping_interval + args.ping_timeout:.0f}s)")
+
+    stop.set()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--clients', type=int, default=10000)
+    parser.add_argument('--dead', type=int, default=100, help="clients that stop answering pings")
+    parser.add_argument('--batch', type=int, default=500, help="connections opened per 0.2s")
+    parser.add_argument('--duration', type=float, default=20, help="seconds to sample idle CPU for")
+    parser.add_argument('--ping-interval', type=float, default=5)
+    parser.add_argument('--ping-timeout', type=float, default=5)
+    parser.add_argument('--connect-timeout', type=float, default=180)
+    parser.add_argument('--server-dir', default=SERVER_DIR, help="directory containing ws_server.py")
+    args = parser.parse_args()
+    args.port = free_port()
+
+    # Both this process and the server (which inherits it) need one fd per connection
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+    if hard < args.clients + args.dead + 100:
+        print(f"⚠️ File-descriptor limit {hard} is too low for {args.clients} clients")
+
+    server = start_server(args.port, args.server_dir, args.ping_interval, args.ping_timeout)
+    try:
+        asyncio.run(run(args, server.pid))
+    finally:
+        server.terminate()
+        try:
+            server.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            server.kill()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,266 @@
+# backend/bulk_import.py
+#
+# Loads sensor CSV logs (logs/industry_data.csv, rotated segments or old
+# per-site dumps) straight into SQLite, without going through /submit_data:
+#
+#   cd backend && python bulk_import.py logs/industry_data.csv logs/segments/*.csv
+#
+# Progress is stored in the database per source file, in the same
+# transaction as the rows, so an interrupted import picks up from the last
+# committed byte offset when run again. At the end the rollup buckets
+# covering the imported time range are rebuilt, from sensor_data and the
+# Parquet archive; that range is stored with the progress, so a run that
+# stopped before the rebuild finished has the next run redo it even if it
+# has nothing left to import.
+#
+# The app can keep serving while this runs: rows and rollups are written
+# in chunk-sized transactions. --drop-indexes loads faster by
+# rebuilding the history indexes afterwards, but /api/sensor_data/history
+# falls back to full table scans meanwhile: only use it with the app
+# stopped.
+
+import argparse
+import csv
+import math
+import os
+import sqlite3
+import sys
+import time
+
+from rollups import ensure_schema as ensure_rollup_schema
+from rollups import rebuild_rollups
+from sensor_history import ensure_schema as ensure_history_schema
+from sensor_history import to_epoch
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+DB_FILE = os.path.join(BASE_DIR, 'logs', 'industry_data.db')
+DEFAULT_SOURCE = os.path.join(BASE_DIR, 'logs', 'industry_data.csv')
+ARCHIVE_DIR = os.path.join(BASE_DIR, 'logs', 'archive')
+
+NUMERIC_COLUMNS = ['temperature', 'humidity', 'voc', 'co', 'pm1', 'pm25', 'pm10']
+# Header names used by older dumps
+COLUMN_ALIASES = {'pm': 'pm25', 'pm2_5': 'pm25', 'worker_id': 'user_id', 'device_user': 'user_id'}
+HISTORY_INDEXES = ['idx_sensor_data_user_ts', 'idx_sensor_data_ts']
+
+
+def ensure_tables(conn):
+    # Same sensor_data schema as app.initialize_database
+    conn.execute('''CREATE TABLE IF NOT EXISTS sensor_data (
+                        id INTEGER PRIMARY KEY AUTOINCREMENT,
+                        timestamp TEXT,
+                        temperature REAL,
+                        humidity REAL,
+                        voc REAL,
+                        co REAL,
+                        pm1 REAL,
+                        pm25 REAL,
+                        pm10 REAL,
+                        user_id TEXT
+                    )''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS import_progress (
+                        source TEXT PRIMARY KEY,
+                        byte_offset INTEGER NOT NULL,
+                        rows INTEGER NOT NULL,
+                        rejected INTEGER NOT NULL,
+                        updated_at INTEGER NOT NULL
+                    )''')
+    conn.execute('''CREATE TABLE IF NOT EXISTS import_state (
+                        key TEXT PRIMARY KEY,
+                        value INTEGER NOT NULL
+                    )''')
+    c = conn.cursor()
+    ensure_history_schema(c)
+    ensure_rollup_schema(c)
+    conn.commit()
+
+
+def fast_pragmas(conn):
+    """Bulk-load settings; returns the previous values for restore_pragmas."""
+    previous = {name: conn.execute(f'PRAGMA {name}').fetchone()[0]
+                for name in ('synchronous', 'cache_size', 'temp_store')}
+    conn.execute('PRAGMA synchronous=OFF')
+    conn.execute('PRAGMA cache_size=-200000')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    return previous
+
+
+def restore_pragmas(conn, previous):
+    for name, value in previous.items():
+        conn.execute(f'PRAGMA {name}={value}')
+
+
+def coerce_row(record, default_user):
+    """(timestamp, 7 floats, user_id, ts_epoch) from a CSV record, or None if invalid."""
+    timestamp = (record.get('timestamp') or '').strip()
+    if not timestamp:
+        return None
+    try:
+        values = [float(record[column]) if record.get(column) not in (None, '') else None
+                  for column in NUMERIC_COLUMNS]
+        ts_epoch = to_epoch(timestamp)
+    except (TypeError, ValueError, OverflowError):
+        return None
+    # nan/inf would poison the rollup sums and sketches
+    if any(value is not None and not math.isfinite(value) for value in values):
+        return None
+    if not -2 ** 63 <= ts_epoch < 2 ** 63:
+        return None
+    user_id = (record.get('user_id') or '').strip() or default_user
+    return (timestamp, *values, user_id, ts_epoch)
+
+
+def read_chunks(path, start_offset, chunk_rows):
+    """Yield (records, end_offset) with up to `chunk_rows` parsed records each.
+
+    Lines are read in binary so `end_offset` is an exact byte position to
+    resume from. Rows must not contain embedded newlines, which holds for
+    every log this project writes.
+    """
+    with open(path, 'rb') as f:
+        header = next(csv.reader([f.readline().decode('utf-8-sig')]))
+        columns = [COLUMN_ALIASES.get(name.strip().lower(), name.strip().lower()) for name in header]
+        if start_offset > f.tell():
+            f.seek(start_offset)
+
+        while True:
+            lines = []
+            for _ in range(chunk_rows):
+                line = f.readline()
+                if not line:
+                    break
+                if line.strip():
+                    lines.append(line.decode('utf-8'))
+            if not lines:
+                return
+            yield [dict(zip(columns, values)) for values in csv.reader(lines)], f.tell()
+
+
+def import_file(conn, path, chunk_rows=50000, default_user='unknown', restart=False):
+    source = os.path.abspath(path)
+    if restart:
+        conn.execute('DELETE FROM import_progress WHERE source = ?', (source,))
+        conn.commit()
+
+    progress = conn.execute('SELECT byte_offset, rows, rejected FROM import_progress WHERE source = ?',
+                            (source,)).fetchone()
+    offset, imported, rejected = progress if progress else (0, 0, 0)
+    if offset and offset >= os.path.getsize(path):
+        print(f"⏭️  {path}: already imported ({imported} rows)")
+        return 0, 0
+    if offset:
+        print(f"↪️  {path}: resuming at byte {offset} ({imported} rows already imported)")
+
+    started = time.perf_counter()
+    file_rows = file_rejected = 0
+
+    for records, end_offset in read_chunks(path, offset, chunk_rows):
+        rows = []
+        for record in records:
+            row = coerce_row(record, default_user)
+            if row is None:
+                file_rejected += 1
+            else:
+                rows.append(row)
+
+        with conn:
+            conn.executemany('''INSERT INTO sensor_data
+                                (timestamp, temperature, humidity, voc, co, pm1, pm25, pm10, user_id, ts_epoch)
+                                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''', rows)
+            conn.execute('INSERT OR REPLACE INTO import_progress VALUES (?, ?, ?, ?, ?)',
+                         (source, end_offset, imported + file_rows + len(rows), rejected + file_rejected,
+                          int(time.time())))
+            if rows:
+                mark_rollups_pending(conn, min(row[-1] for row in rows), max(row[-1] for row in rows))
+        file_rows += len(rows)
+
+        elapsed = time.perf_counter() - started
+        print(f"   {path}: {file_rows} rows, {file_rejected} rejected, "
+              f"{file_rows / elapsed if elapsed else 0:,.0f} rows/sec")
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ {path}: imported {file_rows} rows ({file_rejected} rejected) in {elapsed:.2f}s "
+          f"({file_rows / elapsed if elapsed else 0:,.0f} rows/sec)")
+    return file_rows, file_rejected
+
+
+def mark_rollups_pending(conn, first, last):
+    """Widen the pending rebuild range to cover [first, last] (ts_epoch)."""
+    conn.execute("INSERT OR REPLACE INTO import_state VALUES ('rollups_pending', 1)")
+    conn.execute('''INSERT INTO import_state VALUES ('rollups_from', ?)
+                    ON CONFLICT (key) DO UPDATE SET value = min(value, excluded.value)''', (first,))
+    conn.execute('''INSERT INTO import_state VALUES ('rollups_to', ?)
+                    ON CONFLICT (key) DO UPDATE SET value = max(value, excluded.value)''', (last,))
+
+
+def rollups_pending(conn):
+    """(from, to) ts_epoch range whose rollups still need a rebuild, or None."""
+    state = dict(conn.execute("SELECT key, value FROM import_state WHERE key LIKE 'rollups_%'").fetchall())
+    if 'rollups_pending' not in state:
+        return None
+    return state.get('rollups_from'), state.get('rollups_to')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk-import sensor CSV logs into SQLite")
+    parser.add_argument('sources', nargs='*', default=[DEFAULT_SOURCE])
+    parser.add_argument('--db', default=DB_FILE)
+    parser.add_argument('--chunk-rows', type=int, default=50000, help="rows per transaction")
+    parser.add_argument('--default-user', default='unknown', help="user_id for rows without one")
+    parser.add_argument('--restart', action='store_true', help="ignore saved progress and import from the start")
+    parser.add_argument('--drop-indexes', action='store_true',
+                        help="drop the history indexes during the load and rebuild them after "
+                             "(faster; only with the app stopped)")
+    parser.add_argument('--skip-rollups', action='store_true',
+                        help="don't rebuild the rollup tables (the next run without it will)")
+    parser.add_argument('--site-id', default=os.getenv("SITE_ID", "default"))
+    parser.add_argument('--archive', default=ARCHIVE_DIR, help="Parquet archive the rollup rebuild also reads")
+    args = parser.parse_args()
+
+    conn = sqlite3.connect(args.db)
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=WAL')
+    ensure_tables(conn)
+    previous = fast_pragmas(conn)
+
+    if args.drop_indexes:
+        for name in HISTORY_INDEXES:
+            conn.execute(f'DROP INDEX IF EXISTS {name}')
+
+    started = time.perf_counter()
+    total_rows = total_rejected = 0
+    try:
+        for path in args.sources:
+            if not os.path.exists(path):
+                print(f"❌ {path}: not found")
+                continue
+            rows, rejected = import_file(conn, path, args.chunk_rows, args.default_user, args.restart)
+            total_rows += rows
+            total_rejected += rejected
+    finally:
+        # Indexes come back in one sorted pass each, much faster than
+        # maintaining them row by row during the load
+        index_started = time.perf_counter()
+        ensure_history_schema(conn.cursor())
+        conn.commit()
+        print(f"✅ Indexes ready in {time.perf_counter() - index_started:.2f}s")
+
+        # Also covers a previous run that stopped between its last chunk and the rebuild
+        pending = rollups_pending(conn)
+        if pending and not args.skip_rollups:
+            rollup_started = time.perf_counter()
+            rebuild_rollups(conn, args.site_id, *pending, archive_dir=args.archive)
+            with conn:
+                conn.execute("DELETE FROM import_state WHERE key LIKE 'rollups_%'")
+            print(f"✅ Rollups rebuilt in {time.perf_counter() - rollup_started:.2f}s")
+
+        restore_pragmas(conn, previous)
+        conn.close()
+
+    elapsed = time.perf_counter() - started
+    print(f"✅ Done: {total_rows} rows, {total_rejected} rejected, {elapsed:.2f}s "
+          f"({total_rows / elapsed if elapsed else 0:,.0f} rows/sec overall)")
+    return 0 if total_rows or not total_rejected else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
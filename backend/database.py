@@ -1,7 +1,7 @@
 # backend/database.py
 
 from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.orm import sessionmaker, declarative_base, scoped_session
 import os
 
 # Create a database in backend/ folder
@@ -16,6 +16,8 @@ engine = create_engine(
 )
 
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+# One session per thread for the Flask blueprints; removed after each request
+db_session = scoped_session(SessionLocal)
 Base = declarative_base()
 
 def get_db():
@@ -0,0 +1,82 @@
+# backend/db_pool.py
+
+import sqlite3
+import threading
+from contextlib import contextmanager
+
+
+class SQLitePool:
+    """Reusable SQLite connections for the Flask routes.
+
+    Connections are opened once with WAL journaling so dashboard reads do
+    not block the /submit_data writer, and they are handed out per request
+    instead of reconnecting every time. Each connection keeps its own
+    prepared-statement cache, so the fixed queries in app.py are only
+    compiled once per connection.
+    """
+
+    def __init__(self, path, max_idle=8, cache_size_kb=20000, mmap_size=256 * 1024 * 1024,
+                 busy_timeout_ms=5000, cached_statements=256):
+        self.path = path
+        self.max_idle = max_idle
+        self.cache_size_kb = cache_size_kb
+        self.mmap_size = mmap_size
+        self.busy_timeout_ms = busy_timeout_ms
+        self.cached_statements = cached_statements
+
+        self._idle = []
+        self._lock = threading.Lock()
+        self._stats = {'opened': 0, 'reused': 0, 'closed': 0}
+
+    def _open(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False,
+                               cached_statements=self.cached_statements)
+        conn.row_factory = sqlite3.Row
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        conn.execute(f'PRAGMA cache_size=-{int(self.cache_size_kb)}')
+        conn.execute(f'PRAGMA mmap_size={int(self.mmap_size)}')
+        conn.execute(f'PRAGMA busy_timeout={int(self.busy_timeout_ms)}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection; commits on success and rolls back on error."""
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+            self._stats['reused' if conn else 'opened'] += 1
+        if conn is None:
+            conn = self._open()
+
+        try:
+            yield conn
+            if conn.in_transaction:
+                conn.commit()
+        except Exception:
+            if conn.in_transaction:
+                conn.rollback()
+            raise
+        finally:
+            self._release(conn)
+
+    def _release(self, conn):
+        with self._lock:
+            if len(self._idle) < self.max_idle:
+                self._idle.append(conn)
+                return
+            self._stats['closed'] += 1
+        conn.close()
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+            self._stats['closed'] += len(idle)
+        for conn in idle:
+            conn.close()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['idle'] = len(self._idle)
+        return stats
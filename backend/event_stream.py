@@ -0,0 +1,116 @@
+# backend/event_stream.py
+
+import json
+import threading
+import time
+from collections import deque
+
+
+class Subscription:
+    """One connected SSE client: its filter and a bounded outgoing buffer."""
+
+    def __init__(self, user_id=None, role=None, buffer_size=256):
+        self.user_id = user_id
+        self.role = role
+        self.dropped = 0
+        self._buffer = deque(maxlen=buffer_size)
+        self._cond = threading.Condition()
+
+    def matches(self, user_id, roles):
+        # A user_id filter only ever passes that worker's events, which always
+        # reach them; otherwise the event must be meant for the client's role
+        if self.user_id is not None:
+            return self.user_id == user_id
+        return self.role is None or self.role in roles
+
+    def push(self, message):
+        with self._cond:
+            if len(self._buffer) == self._buffer.maxlen:
+                self.dropped += 1
+            self._buffer.append(message)
+            self._cond.notify()
+
+    def wait(self, timeout):
+        """Pending messages, or an empty list if none arrive within `timeout`."""
+        with self._cond:
+            if not self._buffer:
+                self._cond.wait(timeout)
+            messages = list(self._buffer)
+            self._buffer.clear()
+        return messages
+
+
+class EventStream:
+    """Fan-out of live events to Server-Sent Events subscribers.
+
+    Each event is formatted once and pushed into the buffer of every
+    matching subscriber; a slow client only loses its own oldest events.
+    The last `replay_size` events are kept so a reconnecting client that
+    sends Last-Event-ID gets what it missed. Ids start at the startup time
+    in milliseconds, so ids from before a restart are still lower.
+    """
+
+    def __init__(self, replay_size=1000, buffer_size=256, heartbeat=15.0, retry_ms=3000):
+        self.buffer_size = buffer_size
+        self.heartbeat = heartbeat
+        self.retry_ms = retry_ms
+
+        self._lock = threading.Lock()
+        self._replay = deque(maxlen=replay_size)
+        self._subscribers = set()
+        self._next_id = int(time.time() * 1000)
+        self._stats = {'published': 0, 'delivered': 0, 'resumed': 0}
+
+    def publish(self, event, data, user_id=None, roles=('admin',)):
+        """Send an event to the worker it belongs to (`user_id`) and to every client of `roles`."""
+        with self._lock:
+            event_id = self._next_id
+            self._next_id += 1
+            message = f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+            self._replay.append((event_id, user_id, roles, message))
+            self._stats['published'] += 1
+            for subscriber in self._subscribers:
+                if subscriber.matches(user_id, roles):
+                    subscriber.push(message)
+                    self._stats['delivered'] += 1
+        return event_id
+
+    def subscribe(self, user_id=None, role=None, last_event_id=None):
+        subscriber = Subscription(user_id, role, self.buffer_size)
+        with self._lock:
+            # Replay and registration happen under one lock, so nothing is
+            # missed or sent twice between them
+            if last_event_id is not None:
+                for event_id, event_user, roles, message in self._replay:
+                    if event_id > last_event_id and subscriber.matches(event_user, roles):
+                        subscriber.push(message)
+                self._stats['resumed'] += 1
+            self._subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def stream(self, subscriber):
+        """Generator of SSE text for a Flask streaming response."""
+        try:
+            yield f"retry: {self.retry_ms}\n\n"
+            while True:
+                messages = subscriber.wait(self.heartbeat)
+                if messages:
+                    yield ''.join(messages)
+                else:
+                    # Comment line: keeps proxies from timing out and lets a
+                    # write fail promptly once the client is gone
+                    yield ": keepalive\n\n"
+        finally:
+            self.unsubscribe(subscriber)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['subscribers'] = len(self._subscribers)
+            stats['dropped'] = sum(s.dropped for s in self._subscribers)
+            stats['last_event_id'] = self._next_id - 1
+        return stats
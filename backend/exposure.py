@@ -0,0 +1,248 @@
+# backend/exposure.py
+
+import atexit
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from threshold_rules import POLLUTANT_LABELS
+
+TWA_WINDOW = 8 * 3600
+STEL_WINDOW = 15 * 60
+
+# Time-weighted limits in the sensors' units. CO follows the ACGIH TLV
+# (25 ppm over 8h, excursions up to 3x over 15 min); PM2.5 has no
+# occupational STEL, so it uses the dashboard threshold and twice that.
+EXPOSURE_LIMITS = {
+    'co': {'twa': 25.0, 'stel': 75.0},
+    'pm25': {'twa': 35.0, 'stel': 70.0},
+}
+
+LIMITS_FILE = os.getenv("EXPOSURE_LIMITS_FILE")
+if LIMITS_FILE and os.path.exists(LIMITS_FILE):
+    with open(LIMITS_FILE) as f:
+        for pollutant, limits in json.load(f).items():
+            EXPOSURE_LIMITS.setdefault(pollutant, {}).update(limits)
+
+
+class SlidingIntegral:
+    """Integral of a sampled signal over the last `window` seconds.
+
+    Each reading's value covers the time since the previous reading (at
+    most `max_hold` seconds, so a sensor that went quiet does not
+    back-fill a long gap), which makes a reading count toward the window
+    as soon as it arrives. The intervals are kept in a deque with their
+    running area: adding a reading appends one interval and evicts the
+    ones that slid out, so every update is amortised O(1) whatever the
+    sampling rate.
+    """
+
+    def __init__(self, window, max_hold=600.0):
+        self.window = window
+        self.max_hold = max_hold
+        self.segments = deque()  # (start, end, value)
+        self.area = 0.0
+        self.last_ts = None
+        self.last_value = None
+        self.last_start = None  # start of the interval last_value covers
+
+    def add(self, ts, value):
+        """Record a reading; returns False for out-of-order readings, which are ignored.
+
+        A reading with the same timestamp as the previous one (several
+        readings of one batch sharing the default timestamp) replaces it.
+        """
+        if self.last_ts is not None:
+            if ts < self.last_ts:
+                return False
+            if ts == self.last_ts:
+                if self.segments and self.segments[-1][:2] == (self.last_start, ts):
+                    start, end, previous = self.segments.pop()
+                    self.area -= previous * (end - start)
+                self._append(self.last_start, ts, value)
+                self.last_value = value
+                return True
+            start = max(self.last_ts, ts - self.max_hold)
+        else:
+            start = ts
+        self._append(start, ts, value)
+        self.last_ts, self.last_value, self.last_start = ts, value, start
+        self._evict(ts)
+        return True
+
+    def _append(self, start, end, value):
+        if value and end > start:
+            self.segments.append((start, end, value))
+            self.area += value * (end - start)
+
+    def _evict(self, now):
+        cutoff = now - self.window
+        while self.segments and self.segments[0][1] <= cutoff:
+            start, end, value = self.segments.popleft()
+            self.area -= value * (end - start)
+        if not self.segments:
+            self.area = 0.0  # drop accumulated rounding error
+
+    def integral(self, now=None):
+        """Area inside the window ending at `now` (the last reading when None, or if that is later)."""
+        if self.last_ts is None:
+            return 0.0
+        now = self.last_ts if now is None else max(now, self.last_ts)
+        cutoff = now - self.window
+        area = self.area
+        # Only add() evicts, so when time has moved on since the last
+        # reading several intervals can lie (partly) before the cutoff
+        for start, end, value in self.segments:
+            if start >= cutoff:
+                break
+            area -= value * (min(end, cutoff) - start)
+        return max(area, 0.0)
+
+    def average(self, now=None):
+        # Occupational averages divide by the full window, not the time observed
+        return self.integral(now) / self.window
+
+    def to_dict(self):
+        return {'segments': list(self.segments), 'last_ts': self.last_ts, 'last_value': self.last_value,
+                'last_start': self.last_start}
+
+    def load(self, state):
+        self.segments = deque(tuple(segment) for segment in state['segments'])
+        self.area = sum(value * (end - start) for start, end, value in self.segments)
+        self.last_ts, self.last_value = state['last_ts'], state['last_value']
+        self.last_start = state.get('last_start', self.last_ts)
+
+
+class ExposureTracker:
+    """8-hour TWA and 15-minute STEL per worker and pollutant, kept in memory.
+
+    State is checkpointed to a JSON file every `checkpoint_interval`
+    seconds (and at exit) and reloaded on start, so a restart keeps the
+    running windows instead of rescanning history.
+    """
+
+    def __init__(self, checkpoint_path=None, limits=None, checkpoint_interval=60.0, max_hold=600.0):
+        self.checkpoint_path = checkpoint_path
+        self.limits = limits or EXPOSURE_LIMITS
+        self.checkpoint_interval = checkpoint_interval
+        self.max_hold = max_hold
+
+        self._workers = {}
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._thread = None
+        self._stats = {'updates': 0, 'out_of_order': 0, 'checkpoints': 0}
+
+    def _windows(self, user_id):
+        windows = self._workers.get(user_id)
+        if windows is None:
+            windows = self._workers[user_id] = {
+                pollutant: {'twa': SlidingIntegral(TWA_WINDOW, self.max_hold),
+                            'stel': SlidingIntegral(STEL_WINDOW, self.max_hold)}
+                for pollutant in self.limits
+            }
+        return windows
+
+    def update(self, user_id, ts, values):
+        """Add one reading ({pollutant: value}) and return the worker's current exposure."""
+        with self._lock:
+            windows = self._windows(user_id)
+            for pollutant, pair in windows.items():
+                value = values.get(pollutant)
+                if value is None:
+                    continue
+                if not (pair['twa'].add(ts, float(value)) and pair['stel'].add(ts, float(value))):
+                    self._stats['out_of_order'] += 1
+            self._stats['updates'] += 1
+            self._dirty = True
+            return self._snapshot(windows)
+
+    def _snapshot(self, windows, now=None):
+        return {
+            pollutant: {'twa': round(pair['twa'].average(now), 3), 'stel': round(pair['stel'].average(now), 3),
+                        'twa_limit': self.limits[pollutant]['twa'], 'stel_limit': self.limits[pollutant]['stel']}
+            for pollutant, pair in windows.items()
+        }
+
+    def get(self, user_id, now=None):
+        """The worker's exposure as of `now` (default: the current time), so it decays once readings stop."""
+        now = time.time() if now is None else now
+        with self._lock:
+            windows = self._workers.get(user_id)
+            return self._snapshot(windows, now) if windows else None
+
+    def all(self, now=None):
+        now = time.time() if now is None else now
+        with self._lock:
+            return {user_id: self._snapshot(windows, now) for user_id, windows in self._workers.items()}
+
+    def flags(self, exposure):
+        """Flag strings for every TWA/STEL over its limit."""
+        flags = []
+        for pollutant, values in exposure.items():
+            label = POLLUTANT_LABELS.get(pollutant, pollutant)
+            for kind in ('twa', 'stel'):
+                if values[kind] > values[f'{kind}_limit']:
+                    flags.append(f"{label} {kind.upper()} {values[kind]} > {values[f'{kind}_limit']}")
+        return flags
+
+    # === Checkpoints ===
+    def save(self):
+        if not self.checkpoint_path:
+            return
+        with self._lock:
+            if not self._dirty:
+                return
+            state = {user_id: {pollutant: {kind: window.to_dict() for kind, window in pair.items()}
+                               for pollutant, pair in windows.items()}
+                     for user_id, windows in self._workers.items()}
+            self._dirty = False
+
+        tmp_path = f"{self.checkpoint_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'saved_at': time.time(), 'workers': state}, f)
+        os.replace(tmp_path, self.checkpoint_path)
+        with self._lock:
+            self._stats['checkpoints'] += 1
+
+    def load(self):
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return 0
+        with open(self.checkpoint_path) as f:
+            state = json.load(f)['workers']
+        with self._lock:
+            for user_id, pollutants in state.items():
+                windows = self._windows(user_id)
+                for pollutant, pair in pollutants.items():
+                    if pollutant in windows:
+                        for kind, window_state in pair.items():
+                            windows[pollutant][kind].load(window_state)
+        return len(state)
+
+    def start(self):
+        if self._thread is None:
+            try:
+                loaded = self.load()
+                if loaded:
+                    print(f"✅ Restored exposure windows for {loaded} worker(s)")
+            except Exception as e:
+                print(f"⚠️ Could not load exposure checkpoint: {e}")
+            self._thread = threading.Thread(target=self._run, name="exposure-checkpoint", daemon=True)
+            self._thread.start()
+            atexit.register(self.save)
+
+    def _run(self):
+        while True:
+            time.sleep(self.checkpoint_interval)
+            try:
+                self.save()
+            except Exception as e:
+                print(f"❌ Failed to save exposure checkpoint: {e}")
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats['workers'] = len(self._workers)
+        return stats
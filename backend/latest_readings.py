@@ -0,0 +1,67 @@
+# backend/latest_readings.py
+
+import threading
+
+_GLOBAL = object()
+
+
+class LatestReadings:
+    """Most recent sensor row per user and overall, kept in memory.
+
+    Ingest calls `update` after its transaction commits; readers get the
+    row together with an ETag derived from the row id, so polling clients
+    can be answered with 304 without touching the database. Rows only
+    replace the cached one when their id is higher, so a cold-start load
+    from the database can never overwrite a newer reading.
+    """
+
+    def __init__(self):
+        self._rows = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def etag(row):
+        return f"{row['id']}"
+
+    def update(self, rows):
+        with self._lock:
+            for row in rows:
+                for key in (_GLOBAL, row.get('user_id')):
+                    current = self._rows.get(key)
+                    if current is None or row['id'] > current['id']:
+                        self._rows[key] = row
+
+    def get(self, user_id=None, load=None):
+        """Return the latest row for `user_id` (or overall), or None.
+
+        On a miss `load()` is called to fetch the row from the database.
+        Only rows are remembered: a user_id with no readings is looked up
+        again next time, so arbitrary query strings cannot grow the map.
+        """
+        key = user_id or _GLOBAL
+        with self._lock:
+            if key in self._rows:
+                self.hits += 1
+                return self._rows[key]
+            self.misses += 1
+
+        row = load() if load else None
+        with self._lock:
+            current = self._rows.get(key)
+            if current is not None and (row is None or current['id'] >= row['id']):
+                return current
+            if row is not None:
+                self._rows[key] = row
+        return row
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'users': sum(1 for key in self._rows if key is not _GLOBAL),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / total if total else 0.0,
+            }
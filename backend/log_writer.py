@@ -0,0 +1,219 @@
+# backend/log_writer.py
+
+import atexit
+import csv
+import glob
+import os
+import re
+import threading
+from datetime import datetime
+
+LOG_COLUMNS = ['timestamp', 'temperature', 'humidity', 'voc', 'co', 'pm1', 'pm25', 'pm10', 'user_id']
+NUMERIC_COLUMNS = LOG_COLUMNS[1:8]
+
+SEGMENT_PATTERN = re.compile(r'-(\d{8})-(\d{3})\.csv$')
+
+
+class SensorLogWriter:
+    """Buffered, rotating CSV log for sensor readings.
+
+    Rows are buffered in memory and written by a background thread once
+    `flush_rows` are pending or every `flush_interval` seconds, through a
+    file handle that stays open. Output goes to daily segments
+    (<prefix>-YYYYMMDD-NNN.csv) that also roll over after `max_bytes`.
+    With `columnar` set to "parquet" or "feather", every finished segment
+    is also written as a compressed columnar file next to the CSV.
+    """
+
+    def __init__(self, directory, prefix='industry_data', flush_rows=500, flush_interval=2.0,
+                 max_bytes=64 * 1024 * 1024, columnar=None):
+        if columnar not in (None, 'parquet', 'feather'):
+            raise ValueError("columnar must be None, 'parquet' or 'feather'")
+
+        self.directory = directory
+        self.prefix = prefix
+        self.flush_rows = flush_rows
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.columnar = columnar
+
+        self._buffer = []
+        self._buffer_lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = False
+        self._thread = None
+
+        self._file = None
+        self._writer = None
+        self._segment_path = None
+        self._segment_day = None
+        self._segment_bytes = 0
+        self._stats = {'rows_written': 0, 'flushes': 0, 'failed_flushes': 0, 'segments': 0, 'columnar_segments': 0}
+
+        os.makedirs(directory, exist_ok=True)
+
+    # === Public API ===
+    def write_rows(self, rows):
+        self._start()
+        with self._buffer_lock:
+            self._buffer.extend(rows)
+            pending = len(self._buffer)
+        if pending >= self.flush_rows:
+            self._wake.set()
+
+    def flush(self):
+        with self._buffer_lock:
+            rows, self._buffer = self._buffer, []
+        if not rows:
+            return
+
+        with self._io_lock:
+            try:
+                for row in rows:
+                    self._rotate_if_needed()
+                    self._segment_bytes += self._writer.writerow(row)
+                self._file.flush()
+            except Exception:
+                # Disk full, permissions...: put the rows back for the next
+                # flush, which starts a fresh segment. Part of this batch may
+                # already be on disk, so a failure can repeat rows but never
+                # loses them.
+                with self._buffer_lock:
+                    self._buffer[:0] = rows
+                self._stats['failed_flushes'] += 1
+                self._abandon_segment()
+                raise
+            self._stats['rows_written'] += len(rows)
+            self._stats['flushes'] += 1
+
+    def close(self):
+        self._closed = True
+        self._wake.set()
+        if self._thread:
+            self._thread.join(5.0)
+        self.flush()
+        with self._io_lock:
+            self._finish_segment()
+
+    def stats(self):
+        with self._buffer_lock:
+            pending = len(self._buffer)
+        with self._io_lock:
+            stats = dict(self._stats)
+            stats['current_segment'] = self._segment_path
+        stats['pending_rows'] = pending
+        return stats
+
+    # === Internals ===
+    def _start(self):
+        if self._thread is None:
+            with self._io_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="sensor-log-writer", daemon=True)
+                    self._thread.start()
+                    atexit.register(self.close)
+
+    def _run(self):
+        while not self._closed:
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            try:
+                self.flush()
+            except Exception as e:
+                print(f"❌ Failed to flush sensor log: {e}")
+
+    def _rotate_if_needed(self):
+        day = datetime.now().strftime('%Y%m%d')
+        if self._file is not None and day == self._segment_day and self._segment_bytes < self.max_bytes:
+            return
+
+        self._finish_segment()
+        self._segment_day = day
+        self._segment_path = self._next_segment_path(day)
+        self._file = open(self._segment_path, 'a', newline='')
+        self._writer = csv.writer(self._file)
+        self._segment_bytes = self._file.tell()
+        if self._segment_bytes == 0:
+            self._segment_bytes += self._writer.writerow(LOG_COLUMNS)
+        self._stats['segments'] += 1
+
+    def _next_segment_path(self, day):
+        existing = glob.glob(os.path.join(self.directory, f"{self.prefix}-{day}-*.csv"))
+        numbers = [int(SEGMENT_PATTERN.search(path).group(2)) for path in existing if SEGMENT_PATTERN.search(path)]
+        number = max(numbers) + 1 if numbers else 0
+        return os.path.join(self.directory, f"{self.prefix}-{day}-{number:03d}.csv")
+
+    def _abandon_segment(self):
+        if self._file is None:
+            return
+        try:
+            self._file.close()
+        except OSError:
+            pass
+        self._file = None
+
+    def _finish_segment(self):
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        if self.columnar:
+            try:
+                write_columnar(self._segment_path, self.columnar)
+                self._stats['columnar_segments'] += 1
+            except Exception as e:
+                print(f"⚠️ Could not write {self.columnar} copy of {self._segment_path}: {e}")
+
+
+def write_columnar(csv_path, fmt='parquet'):
+    import pandas as pd
+
+    df = pd.read_csv(csv_path, dtype={'user_id': str})
+    base = csv_path[:-len('.csv')]
+    if fmt == 'parquet':
+        df.to_parquet(base + '.parquet', compression='zstd', index=False)
+    else:
+        df.to_feather(base + '.feather', compression='zstd')
+
+
+def list_segments(directory, prefix='industry_data'):
+    """CSV segments in chronological order."""
+    paths = glob.glob(os.path.join(directory, f"{prefix}-*.csv"))
+    return sorted(path for path in paths if SEGMENT_PATTERN.search(path))
+
+
+def _parse_row(row):
+    for column in NUMERIC_COLUMNS:
+        value = row.get(column)
+        row[column] = float(value) if value not in (None, '') else None
+    return row
+
+
+def iter_log_rows(directory, prefix='industry_data', legacy_file=None):
+    """Yield every logged reading as a dict, one file at a time.
+
+    `legacy_file` (the old single industry_data.csv) is read first if given.
+    """
+    paths = ([legacy_file] if legacy_file and os.path.exists(legacy_file) else []) + list_segments(directory, prefix)
+    for path in paths:
+        with open(path, newline='') as f:
+            for row in csv.DictReader(f):
+                yield _parse_row(row)
+
+
+def iter_log_frames(directory, prefix='industry_data', legacy_file=None):
+    """Yield one DataFrame per segment, preferring the columnar copy when present."""
+    import pandas as pd
+
+    if legacy_file and os.path.exists(legacy_file):
+        yield pd.read_csv(legacy_file, dtype={'user_id': str})
+
+    for path in list_segments(directory, prefix):
+        base = path[:-len('.csv')]
+        if os.path.exists(base + '.parquet'):
+            yield pd.read_parquet(base + '.parquet')
+        elif os.path.exists(base + '.feather'):
+            yield pd.read_feather(base + '.feather')
+        else:
+            yield pd.read_csv(path, dtype={'user_id': str})
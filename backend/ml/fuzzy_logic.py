@@ -1,3 +1,6 @@
+import numpy as np
+
+
 def fuzzy_risk_level(pm, co, voc, health_condition=None):
     score = 0
 
@@ -25,3 +28,35 @@ def fuzzy_risk_level(pm, co, voc, health_condition=None):
         return "Moderate"
     else:
         return "Low"
+
+
+# === Vectorized API ===
+FUZZY_RISK_LABELS = np.array(["Low", "Moderate", "High"])
+
+
+def fuzzy_risk_codes(pm, co, voc, health_condition=None):
+    """Array version of fuzzy_risk_level.
+
+    Takes array-likes (lists, NumPy arrays or pandas Series) of equal length
+    and returns int8 codes indexing FUZZY_RISK_LABELS (0=Low, 1=Moderate,
+    2=High). Each band is a strict ">" comparison exactly like the scalar
+    function, so results are identical, including for NaN inputs.
+    """
+    pm = np.asarray(pm, dtype=np.float64)
+    co = np.asarray(co, dtype=np.float64)
+    voc = np.asarray(voc, dtype=np.float64)
+
+    score = (pm > 20).astype(np.int8) + (pm > 35)
+    score += (co > 4).astype(np.int8) + (co > 9)
+    score += (voc > 0.3).astype(np.int8) + (voc > 0.6)
+
+    if health_condition is not None:
+        health = np.asarray(health_condition, dtype=object)
+        score += 2 * (health == "Asthma")
+
+    return (score >= 3).astype(np.int8) + (score >= 6)
+
+
+def fuzzy_risk_level_batch(pm, co, voc, health_condition=None):
+    """Like fuzzy_risk_codes but returns the "Low"/"Moderate"/"High" labels."""
+    return FUZZY_RISK_LABELS[fuzzy_risk_codes(pm, co, voc, health_condition)]
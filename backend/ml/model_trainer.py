@@ -7,9 +7,14 @@ from sklearn.metrics import classification_report, accuracy_score
 from xgboost import XGBClassifier
 import joblib
 import os
+import sys
 
-# Load dataset
-df = pd.read_csv('../logs/industry_data.csv')
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from log_writer import iter_log_frames  # noqa: E402
+
+# Load dataset: the old single log plus every rotated segment the app writes now
+df = pd.concat(iter_log_frames('../logs/segments', legacy_file='../logs/industry_data.csv'), ignore_index=True)
 df.dropna(inplace=True)
 
 # ---- Risk Categorization ----
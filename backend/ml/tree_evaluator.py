@@ -0,0 +1,94 @@
+# backend/ml/tree_evaluator.py
+
+import hashlib
+
+import numpy as np
+
+
+def file_sha256(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class TreeEnsemble:
+    """NumPy evaluator for a boosted tree classifier exported by tree_export.py.
+
+    All trees live in flat node arrays. Leaves point back to themselves, so
+    a batch is scored by stepping every (row, tree) cursor `max_depth` times
+    with plain fancy indexing, then summing leaf values per class. Inputs
+    are compared in float32 with "x < threshold goes left" and NaN following
+    the default direction, which is how XGBoost evaluates its splits.
+    """
+
+    def __init__(self, feature, threshold, left, right, default_left, value,
+                 roots, tree_class, base_score, max_depth, feature_names=None, model_sha256=None):
+        self.feature = np.asarray(feature, dtype=np.int32)
+        self.threshold = np.asarray(threshold, dtype=np.float32)
+        self.left = np.asarray(left, dtype=np.int32)
+        self.right = np.asarray(right, dtype=np.int32)
+        self.default_left = np.asarray(default_left, dtype=bool)
+        self.value = np.asarray(value, dtype=np.float32)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.tree_class = np.asarray(tree_class, dtype=np.int32)
+        self.base_score = np.asarray(base_score, dtype=np.float32)
+        self.max_depth = int(max_depth)
+        self.feature_names = [str(name) for name in feature_names] if feature_names is not None else None
+        # Fingerprint of the pickled model the trees were exported from
+        self.model_sha256 = str(model_sha256) if model_sha256 is not None else None
+
+        self.num_class = len(self.base_score)
+        self._class_matrix = np.zeros((len(self.roots), self.num_class), dtype=np.float32)
+        self._class_matrix[np.arange(len(self.roots)), self.tree_class] = 1.0
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {key: data[key] for key in data.files}
+        max_depth = int(arrays.pop('max_depth'))
+        model_sha256 = arrays.pop('model_sha256', None)
+        return cls(max_depth=max_depth, model_sha256=model_sha256, **arrays)
+
+    def save(self, path):
+        extra = {}
+        if self.feature_names:
+            extra['feature_names'] = np.array(self.feature_names)
+        if self.model_sha256:
+            extra['model_sha256'] = np.array(self.model_sha256)
+        np.savez_compressed(
+            path,
+            feature=self.feature, threshold=self.threshold, left=self.left, right=self.right,
+            default_left=self.default_left, value=self.value, roots=self.roots,
+            tree_class=self.tree_class, base_score=self.base_score,
+            max_depth=np.int32(self.max_depth), **extra
+        )
+
+    def decision_function(self, X, chunk_size=1024):
+        """Per-class margins, shape (rows, num_class)."""
+        X = np.asarray(X, dtype=np.float32)
+        if X.ndim == 1:
+            X = X[None, :]
+        if X.shape[0] <= chunk_size:
+            return self._margins(X)
+        # Chunking keeps the (rows x trees) cursor arrays cache-sized
+        return np.concatenate([self._margins(X[i:i + chunk_size])
+                               for i in range(0, X.shape[0], chunk_size)])
+
+    def _margins(self, X):
+        n, k = X.shape
+        flat = X.ravel()
+        row_offset = (np.arange(n, dtype=np.int32) * k)[:, None]
+        node = np.broadcast_to(self.roots, (n, len(self.roots)))
+
+        for _ in range(self.max_depth):
+            x = flat.take(row_offset + self.feature.take(node))
+            go_left = (x < self.threshold.take(node)) | (np.isnan(x) & self.default_left.take(node))
+            node = np.where(go_left, self.left.take(node), self.right.take(node))
+
+        return self.value.take(node) @ self._class_matrix + self.base_score
+
+    def predict(self, X):
+        """Encoded class index per row, like XGBClassifier.predict."""
+        return np.argmax(self.decision_function(X), axis=1)
+
+    def predict_one(self, row):
+        return int(self.predict(row)[0])
@@ -0,0 +1,126 @@
+# backend/ml/tree_export.py
+#
+# Flattens the trained XGBoost risk predictor into NumPy arrays for
+# ml/tree_evaluator.py and checks that both give the same labels:
+#
+#   cd backend && python ml/tree_export.py
+
+import argparse
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import joblib
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from log_writer import iter_log_frames  # noqa: E402
+from ml.tree_evaluator import TreeEnsemble, file_sha256  # noqa: E402
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODEL_FILE = os.path.join(BASE_DIR, 'ml', 'risk_predictor.pkl')
+TREES_FILE = os.path.join(BASE_DIR, 'ml', 'risk_predictor_trees.npz')
+DATA_LOG = os.path.join(BASE_DIR, 'logs', 'industry_data.csv')
+SEGMENT_DIR = os.path.join(BASE_DIR, 'logs', 'segments')
+
+FEATURES = ['temperature', 'humidity', 'voc', 'co', 'pm1', 'pm25', 'pm10']
+
+
+def _parse_base_score(raw, num_class):
+    # Stored as "5E-1" or, in newer XGBoost, "[5E-1,5E-1,...]"
+    values = [float(v) for v in raw.strip('[]').split(',')]
+    if len(values) == 1:
+        values = values * num_class
+    return np.array(values, dtype=np.float32)
+
+
+def export_trees(model):
+    """Convert an XGBClassifier (gbtree booster) into a TreeEnsemble."""
+    booster = model.get_booster()
+    learner = json.loads(booster.save_raw(raw_format='json'))['learner']
+    params = learner['learner_model_param']
+    trees_model = learner['gradient_booster']['model']
+
+    num_class = max(int(params['num_class']), 1)
+    base_score = _parse_base_score(params['base_score'], num_class)
+
+    feature, threshold, left, right, default_left, value = [], [], [], [], [], []
+    roots = []
+    max_depth = 0
+
+    for tree in trees_model['trees']:
+        offset = len(feature)
+        roots.append(offset)
+        lefts = tree['left_children']
+        rights = tree['right_children']
+        depth = {0: 0}
+
+        for i in range(len(lefts)):
+            if lefts[i] == -1:
+                # Leaves loop back to themselves so extra steps are no-ops
+                feature.append(0)
+                threshold.append(0.0)
+                left.append(offset + i)
+                right.append(offset + i)
+                default_left.append(True)
+                value.append(tree['split_conditions'][i])
+                max_depth = max(max_depth, depth[i])
+            else:
+                feature.append(tree['split_indices'][i])
+                threshold.append(tree['split_conditions'][i])
+                left.append(offset + lefts[i])
+                right.append(offset + rights[i])
+                default_left.append(bool(tree['default_left'][i]))
+                value.append(0.0)
+                depth[lefts[i]] = depth[rights[i]] = depth[i] + 1
+
+    return TreeEnsemble(
+        feature=feature, threshold=threshold, left=left, right=right,
+        default_left=default_left, value=value, roots=roots,
+        tree_class=trees_model['tree_info'], base_score=base_score,
+        max_depth=max_depth, feature_names=booster.feature_names,
+    )
+
+
+def load_readings(data_file=None):
+    """Logged readings: `data_file` if given, else the legacy log plus every segment."""
+    if data_file:
+        return pd.read_csv(data_file)
+    return pd.concat(iter_log_frames(SEGMENT_DIR, legacy_file=DATA_LOG), ignore_index=True)
+
+
+def validate(model, ensemble, df):
+    df = df[FEATURES].dropna()
+    X = df.to_numpy(dtype=np.float32)
+    expected = np.asarray(model.predict(df))
+    actual = ensemble.predict(X)
+    mismatches = int((expected != actual).sum())
+    return len(X), mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the risk predictor trees to NumPy arrays")
+    parser.add_argument('--model', default=MODEL_FILE)
+    parser.add_argument('--output', default=TREES_FILE)
+    parser.add_argument('--data', help="CSV used to validate the exported trees (default: the sensor logs)")
+    args = parser.parse_args()
+
+    model = joblib.load(args.model)
+    ensemble = export_trees(model)
+    ensemble.model_sha256 = file_sha256(args.model)
+
+    rows, mismatches = validate(model, ensemble, load_readings(args.data))
+    if mismatches:
+        print(f"❌ {mismatches}/{rows} predictions differ from the XGBoost model, not saving")
+        sys.exit(1)
+
+    ensemble.save(args.output)
+    print(f"✅ Exported {len(ensemble.roots)} trees ({len(ensemble.feature)} nodes, depth {ensemble.max_depth}) "
+          f"to {args.output}")
+    print(f"✅ Validated on {rows} rows of {args.data or 'the sensor logs'}: identical labels")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
 from database import Base
 from datetime import datetime
 
@@ -11,3 +11,9 @@ class Alert(Base):
     message = Column(Text)
     level = Column(String, default="High")
     timestamp = Column(DateTime, default=datetime.now)
+
+    # Zone feeds and per-worker history are read newest-first
+    __table_args__ = (
+        Index("ix_alerts_zone_timestamp", "zone", "timestamp"),
+        Index("ix_alerts_worker_id_timestamp", "worker_id", "timestamp"),
+    )
@@ -24,3 +24,6 @@ def init_db():
     import models.alert_model  # Ensure model is loaded
     # Import other models here (worker_model, zone_model, etc.)
     Base.metadata.create_all(bind=engine)
+    # create_all skips tables that already exist, so add indexes introduced later
+    for index in models.alert_model.Alert.__table__.indexes:
+        index.create(bind=engine, checkfirst=True)
@@ -1,7 +1,7 @@
 # backend/models/user_model.py
 
 from sqlalchemy import Column, Integer, String, Boolean, Enum
-from ..database import Base
+from database import Base
 import enum
 
 # Enum for role
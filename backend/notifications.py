@@ -0,0 +1,189 @@
+# backend/notifications.py
+
+import queue
+import smtplib
+import threading
+import time
+from email.mime.text import MIMEText
+from email.mime.multipart import MIMEMultipart
+
+
+class NotificationDispatcher:
+    """Sends email and SMS alerts from background worker threads.
+
+    Alerts are put on a bounded queue so the ingest request never waits on
+    SMTP or Twilio. Each worker keeps its own SMTP session open between
+    sends and reconnects when the server drops it; the Twilio client is
+    created once and shared.
+    """
+
+    def __init__(self, sender_email, sender_password, smtp_host='smtp.gmail.com', smtp_port=587,
+                 smtp_starttls=True, twilio_sid=None, twilio_token=None, twilio_from=None,
+                 workers=2, max_queue=1000, max_retries=3, backoff=1.0):
+        self.sender_email = sender_email
+        self.sender_password = sender_password
+        self.smtp_host = smtp_host
+        self.smtp_port = smtp_port
+        self.smtp_starttls = smtp_starttls
+        self.twilio_sid = twilio_sid
+        self.twilio_token = twilio_token
+        self.twilio_from = twilio_from
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._local = threading.local()
+        self._sms_client = None
+        self._sms_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._threads = []
+        self._started = False
+        self._start_lock = threading.Lock()
+        self._stats = {
+            'enqueued': 0,
+            'sent': 0,
+            'failed': 0,
+            'dropped': 0,
+            'retries': 0,
+            'smtp_connects': 0,
+        }
+        self._latency = {'count': 0, 'total': 0.0, 'max': 0.0, 'last': 0.0}
+
+    # === Public API ===
+    def start(self):
+        with self._start_lock:
+            if self._started:
+                return
+            for i in range(self.workers):
+                t = threading.Thread(target=self._run, name=f"notify-worker-{i}", daemon=True)
+                t.start()
+                self._threads.append(t)
+            self._started = True
+
+    def stop(self, timeout=5.0):
+        for _ in self._threads:
+            self._queue.put(None)
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+        self._started = False
+
+    def send_email(self, to_email, subject, body):
+        return self._enqueue(('email', to_email, subject, body))
+
+    def send_sms(self, to_phone, message):
+        return self._enqueue(('sms', to_phone, message))
+
+    def stats(self):
+        with self._stats_lock:
+            latency = dict(self._latency)
+            stats = dict(self._stats)
+        latency['avg'] = latency['total'] / latency['count'] if latency['count'] else 0.0
+        del latency['total']
+        stats['queue_depth'] = self._queue.qsize()
+        stats['queue_capacity'] = self._queue.maxsize
+        stats['latency_seconds'] = latency
+        return stats
+
+    # === Internals ===
+    def _enqueue(self, job):
+        self.start()
+        try:
+            self._queue.put_nowait(job)
+        except queue.Full:
+            self._count('dropped')
+            print(f"❌ Notification queue full, dropping {job[0]} alert to {job[1]}")
+            return False
+        self._count('enqueued')
+        return True
+
+    def _count(self, key, n=1):
+        with self._stats_lock:
+            self._stats[key] += n
+
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            try:
+                if job is None:
+                    self._close_smtp()
+                    return
+                self._deliver(job)
+            finally:
+                self._queue.task_done()
+
+    def _deliver(self, job):
+        kind = job[0]
+        send = self._send_email if kind == 'email' else self._send_sms
+        started = time.perf_counter()
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                send(*job[1:])
+                break
+            except Exception as e:
+                if attempt == self.max_retries:
+                    self._count('failed')
+                    print(f"❌ Failed to send {kind} to {job[1]} after {attempt + 1} attempts: {e}")
+                    return
+                self._count('retries')
+                print(f"⚠️ {kind} send failed ({e}), retrying...")
+                time.sleep(self.backoff * (2 ** attempt))
+
+        elapsed = time.perf_counter() - started
+        with self._stats_lock:
+            self._stats['sent'] += 1
+            self._latency['count'] += 1
+            self._latency['total'] += elapsed
+            self._latency['last'] = elapsed
+            self._latency['max'] = max(self._latency['max'], elapsed)
+        print(f"✅ {kind.upper()} sent to {job[1]} in {elapsed:.2f}s")
+
+    def _smtp(self):
+        server = getattr(self._local, 'smtp', None)
+        if server is None:
+            server = smtplib.SMTP(self.smtp_host, self.smtp_port, timeout=30)
+            if self.smtp_starttls:
+                server.starttls()
+            if self.sender_password:
+                server.login(self.sender_email, self.sender_password)
+            self._local.smtp = server
+            self._count('smtp_connects')
+        return server
+
+    def _close_smtp(self):
+        server = getattr(self._local, 'smtp', None)
+        self._local.smtp = None
+        if server is not None:
+            try:
+                server.quit()
+            except Exception:
+                server.close()
+
+    def _send_email(self, to_email, subject, body):
+        msg = MIMEMultipart()
+        msg['From'] = self.sender_email
+        msg['To'] = to_email
+        msg['Subject'] = subject
+        msg.attach(MIMEText(body, 'plain'))
+
+        try:
+            self._smtp().send_message(msg)
+        except Exception:
+            # Drop the session so the next attempt reconnects
+            self._close_smtp()
+            raise
+
+    def _send_sms(self, to_phone, message):
+        with self._sms_lock:
+            if self._sms_client is None:
+                from twilio.rest import Client
+                self._sms_client = Client(self.twilio_sid, self.twilio_token)
+            client = self._sms_client
+
+        client.messages.create(
+            body=message,
+            from_=self.twilio_from,
+            to=to_phone
+        )
@@ -0,0 +1,454 @@
+# backend/retention.py
+#
+# Moves old sensor_data rows into compressed Parquet partitions
+# (<archive>/date=YYYY-MM-DD/part-<first id>-<last id>.parquet, UTC dates)
+# and reads them back for history queries. Runs inside app.py on a timer
+# or by hand:
+#
+#   cd backend && python retention.py --days 30
+#
+# Deleted rows only give their space back to the filesystem once the
+# database uses auto_vacuum=INCREMENTAL. Switching an existing database
+# takes one full, exclusive VACUUM, so it is a separate step to run while
+# the app is stopped:
+#
+#   cd backend && python retention.py --enable-incremental-vacuum
+
+import functools
+import glob
+import heapq
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from sensor_history import MAX_PAGE_SIZE, decode_cursor, encode_cursor, fetch_history_rows
+
+ARCHIVE_COLUMNS = ['id', 'timestamp', 'temperature', 'humidity', 'voc', 'co', 'pm1', 'pm25', 'pm10',
+                   'user_id', 'ts_epoch']
+PARTITION_PREFIX = 'date='
+
+# Row groups carry min/max ts_epoch statistics, so history pages can skip
+# most of a large partition
+ROW_GROUP_ROWS = 8192
+READ_BATCH_ROWS = 8192
+
+
+def _schema():
+    import pyarrow as pa
+
+    return pa.schema([
+        ('id', pa.int64()), ('timestamp', pa.string()),
+        ('temperature', pa.float64()), ('humidity', pa.float64()), ('voc', pa.float64()),
+        ('co', pa.float64()), ('pm1', pa.float64()), ('pm25', pa.float64()), ('pm10', pa.float64()),
+        ('user_id', pa.string()), ('ts_epoch', pa.int64()),
+    ])
+
+
+def partition_date(ts_epoch):
+    return datetime.fromtimestamp(ts_epoch, timezone.utc).strftime('%Y-%m-%d')
+
+
+def ensure_schema(c):
+    """archive_meta holds the newest archived ts_epoch, so history pages know when to skip the archive."""
+    c.execute('''CREATE TABLE IF NOT EXISTS archive_meta (
+                    key TEXT PRIMARY KEY,
+                    value INTEGER
+                )''')
+
+
+def _record_archived_through(c, ts_epoch):
+    c.execute('''INSERT INTO archive_meta (key, value) VALUES ('max_ts_epoch', ?)
+                 ON CONFLICT (key) DO UPDATE SET value = max(value, excluded.value)''', (ts_epoch,))
+
+
+def _scan_archived_through(archive_dir):
+    """Newest ts_epoch in the archive from the Parquet footers, or None if it is empty."""
+    partitions = list_partitions(archive_dir)
+    if not partitions:
+        return None
+
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    # Partitions are UTC days, so the newest one holds the newest row
+    newest = None
+    for path in glob.glob(os.path.join(partitions[-1][1], '*.parquet')):
+        for low, high in _row_group_ranges(pq.ParquetFile(path)):
+            if high == float('inf'):
+                high = pc.max(pq.read_table(path, columns=['ts_epoch'])['ts_epoch']).as_py()
+            if high is not None and (newest is None or high > newest):
+                newest = high
+    return newest
+
+
+def archived_through(c, archive_dir):
+    """Newest ts_epoch the archive holds, or None if nothing has been archived.
+
+    Kept in archive_meta by archive_old_rows; archives written before the
+    table existed are scanned once and recorded.
+    """
+    row = c.execute("SELECT value FROM archive_meta WHERE key = 'max_ts_epoch'").fetchone()
+    if row is not None:
+        return row[0]
+    newest = _scan_archived_through(archive_dir)
+    if newest is not None:
+        _record_archived_through(c, newest)
+    return newest
+
+
+# === Archiving ===
+def ensure_incremental_vacuum(conn):
+    """Switch the database to auto_vacuum=INCREMENTAL (one full VACUUM if needed).
+
+    The VACUUM rewrites the whole file under an exclusive lock, so this is
+    only run from the command line, never by RetentionJob.
+    """
+    if conn.execute('PRAGMA auto_vacuum').fetchone()[0] == 2:
+        return False
+    conn.execute('PRAGMA auto_vacuum=INCREMENTAL')
+    if conn.in_transaction:
+        conn.commit()
+    # An existing database only picks up the new mode after a rebuild
+    conn.execute('VACUUM')
+    return True
+
+
+def _write_partition(archive_dir, day, rows):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    directory = os.path.join(archive_dir, PARTITION_PREFIX + day)
+    os.makedirs(directory, exist_ok=True)
+    ids = [row['id'] for row in rows]
+    path = os.path.join(directory, f"part-{min(ids):012d}-{max(ids):012d}.parquet")
+
+    table = pa.Table.from_pylist(rows, schema=_schema())
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    pq.write_table(table, tmp_path, compression='zstd', row_group_size=ROW_GROUP_ROWS)
+    # Rename last: a crash before the DELETE below just rewrites the same file
+    os.replace(tmp_path, path)
+    return path
+
+
+def archive_old_rows(db, archive_dir, horizon_days, batch_size=5000, vacuum_pages=2000):
+    """Move rows older than `horizon_days` into Parquet partitions.
+
+    Works in batches of `batch_size` rows, oldest first: each batch is
+    written to disk before it is deleted from sensor_data, and every
+    delete is followed by an incremental vacuum of up to `vacuum_pages`
+    pages so the file shrinks without one long exclusive VACUUM.
+    """
+    cutoff = int(time.time() - horizon_days * 86400)
+    stats = {'archived': 0, 'files': 0, 'cutoff': cutoff}
+
+    with db.connection() as conn:
+        ensure_schema(conn.cursor())
+
+    while True:
+        with db.connection() as conn:
+            c = conn.cursor()
+            c.execute(f'''SELECT {', '.join(ARCHIVE_COLUMNS)} FROM sensor_data
+                          WHERE ts_epoch < ? ORDER BY ts_epoch, id LIMIT ?''', (cutoff, batch_size))
+            rows = [dict(row) for row in c.fetchall()]
+            if not rows:
+                break
+
+            by_day = {}
+            for row in rows:
+                by_day.setdefault(partition_date(row['ts_epoch']), []).append(row)
+            # Rows stay in (ts_epoch, id) order, which keeps each row group's ts range narrow
+            for day, day_rows in by_day.items():
+                _write_partition(archive_dir, day, day_rows)
+                stats['files'] += 1
+
+            c.executemany('DELETE FROM sensor_data WHERE id = ?', [(row['id'],) for row in rows])
+            # Same transaction as the delete: readers never see rows gone from
+            # sensor_data without the high-water mark covering them
+            _record_archived_through(c, rows[-1]['ts_epoch'])
+            stats['archived'] += len(rows)
+
+        with db.connection() as conn:
+            conn.execute(f'PRAGMA incremental_vacuum({int(vacuum_pages)})').fetchall()
+
+        if len(rows) < batch_size:
+            break
+
+    return stats
+
+
+class RetentionJob:
+    """Runs archive_old_rows every `interval` seconds on a daemon thread."""
+
+    def __init__(self, db, archive_dir, horizon_days, interval=3600.0, batch_size=5000):
+        self.db = db
+        self.archive_dir = archive_dir
+        self.horizon_days = horizon_days
+        self.interval = interval
+        self.batch_size = batch_size
+
+        self._stop = threading.Event()
+        self._thread = None
+        self._stats = {'runs': 0, 'archived': 0, 'files': 0, 'last_run': None, 'last_error': None}
+
+    def start(self):
+        if self._thread is None:
+            with self.db.connection() as conn:
+                if conn.execute('PRAGMA auto_vacuum').fetchone()[0] != 2:
+                    print("⚠️ auto_vacuum is not INCREMENTAL: archived rows will not shrink the database file "
+                          "(stop the app and run `python retention.py --enable-incremental-vacuum`)")
+            self._thread = threading.Thread(target=self._run, name="retention", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def run_once(self):
+        result = archive_old_rows(self.db, self.archive_dir, self.horizon_days, self.batch_size)
+        self._stats['runs'] += 1
+        self._stats['archived'] += result['archived']
+        self._stats['files'] += result['files']
+        self._stats['last_run'] = int(time.time())
+        if result['archived']:
+            print(f"✅ Archived {result['archived']} sensor rows into {result['files']} file(s)")
+        return result
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+                self._stats['last_error'] = None
+            except Exception as e:
+                self._stats['last_error'] = str(e)
+                print(f"❌ Retention run failed: {e}")
+            self._stop.wait(self.interval)
+
+    def stats(self):
+        stats = dict(self._stats)
+        stats['horizon_days'] = self.horizon_days
+        stats['partitions'] = len(list_partitions(self.archive_dir))
+        return stats
+
+
+# === Queries ===
+def list_partitions(archive_dir, start=None, end=None):
+    """(day, directory) pairs in date order, pruned to those overlapping [start, end)."""
+    first = partition_date(start) if start is not None else None
+    last = partition_date(end - 1) if end is not None else None
+
+    partitions = []
+    for directory in glob.glob(os.path.join(archive_dir, PARTITION_PREFIX + '*')):
+        day = os.path.basename(directory)[len(PARTITION_PREFIX):]
+        if (first is None or day >= first) and (last is None or day <= last):
+            partitions.append((day, directory))
+    return sorted(partitions)
+
+
+def _row_group_ranges(pf):
+    """(min, max) ts_epoch per row group; (-inf, inf) where the footer has no statistics."""
+    ts_index = pf.schema_arrow.get_field_index('ts_epoch')
+    ranges = []
+    for i in range(pf.metadata.num_row_groups):
+        stats = pf.metadata.row_group(i).column(ts_index).statistics
+        if stats is not None and stats.has_min_max:
+            ranges.append((stats.min, stats.max))
+        else:
+            ranges.append((float('-inf'), float('inf')))
+    return ranges
+
+
+def _past(batch, key, descending):
+    """Mask of rows after `key` in query order."""
+    import pyarrow.compute as pc
+
+    compare = pc.less if descending else pc.greater
+    ts, ids = batch.column('ts_epoch'), batch.column('id')
+    return pc.or_(compare(ts, key[0]), pc.and_(pc.equal(ts, key[0]), compare(ids, key[1])))
+
+
+def query_archive(archive_dir, user_id=None, start=None, end=None, limit=100, after=None, order='desc'):
+    """Up to `limit` archived rows in (ts_epoch, id) order, past the `after` key.
+
+    Partitions are visited in query order and outside [start, end) skipped
+    entirely. Within a partition, row groups are read in order of their
+    ts_epoch statistics with iter_batches, keeping only the best `limit`
+    rows seen; reading stops as soon as no remaining row group (or later
+    partition) can hold a row that beats them.
+    """
+    partitions = list_partitions(archive_dir, start, end)
+    if not partitions:
+        return []
+
+    import pyarrow.compute as pc
+    import pyarrow.parquet as pq
+
+    descending = order != 'asc'
+    if after is not None:
+        # Skip partitions entirely on the wrong side of the cursor
+        cursor_day = partition_date(after[0])
+        partitions = [p for p in partitions if (p[0] <= cursor_day if descending else p[0] >= cursor_day)]
+    if descending:
+        partitions.reverse()
+
+    sign = 1 if descending else -1
+    sort_keys = [('ts_epoch', 'descending' if descending else 'ascending'),
+                 ('id', 'descending' if descending else 'ascending')]
+    # Min-heap of (sign * ts_epoch, sign * id, row): best[0] is the worst row kept.
+    # An interrupted archive run can leave one id in two files; keep it once.
+    best, kept = [], set()
+
+    def worst():
+        return sign * best[0][0], sign * best[0][1]
+
+    for _, directory in partitions:
+        groups = []
+        for path in sorted(glob.glob(os.path.join(directory, '*.parquet'))):
+            pf = pq.ParquetFile(path)
+            for i, (low, high) in enumerate(_row_group_ranges(pf)):
+                if (start is not None and high < start) or (end is not None and low >= end):
+                    continue
+                if after is not None and (low > after[0] if descending else high < after[0]):
+                    continue
+                groups.append((high if descending else -low, pf, i))
+        # Most promising row groups first
+        groups.sort(key=lambda g: g[0], reverse=True)
+
+        for bound, pf, i in groups:
+            if len(best) >= limit and bound < best[0][0]:
+                break
+            for batch in pf.iter_batches(batch_size=READ_BATCH_ROWS, row_groups=[i], columns=ARCHIVE_COLUMNS):
+                conditions = []
+                if user_id:
+                    conditions.append(pc.equal(batch.column('user_id'), user_id))
+                if start is not None:
+                    conditions.append(pc.greater_equal(batch.column('ts_epoch'), start))
+                if end is not None:
+                    conditions.append(pc.less(batch.column('ts_epoch'), end))
+                if after is not None:
+                    conditions.append(_past(batch, after, descending))
+                if len(best) >= limit:
+                    conditions.append(pc.invert(_past(batch, worst(), descending)))
+                if conditions:
+                    batch = batch.filter(functools.reduce(pc.and_, conditions))
+                if not batch.num_rows:
+                    continue
+
+                # Only this batch's best `limit` rows become Python objects
+                top = pc.select_k_unstable(batch, k=min(limit, batch.num_rows), sort_keys=sort_keys)
+                for row in batch.take(top).to_pylist():
+                    if row['id'] in kept:
+                        continue
+                    entry = (sign * row['ts_epoch'], sign * row['id'], row)
+                    if len(best) < limit:
+                        heapq.heappush(best, entry)
+                    elif entry[:2] > best[0][:2]:
+                        kept.discard(heapq.heapreplace(best, entry)[2]['id'])
+                    else:
+                        continue
+                    kept.add(row['id'])
+
+        # Later partitions can only hold rows further down the order
+        if len(best) >= limit:
+            break
+
+    rows = [entry[2] for entry in best]
+    rows.sort(key=lambda r: (r['ts_epoch'], r['id']), reverse=descending)
+    return rows
+
+
+def iter_archive(archive_dir, user_id=None, start=None, end=None, chunk_size=1000):
+    """Yield lists of archived rows in [start, end), oldest partition first.
+
+    Only one partition file is held in memory at a time.
+    """
+    import pyarrow.parquet as pq
+
+    filters = []
+    if user_id:
+        filters.append(('user_id', '=', user_id))
+    if start is not None:
+        filters.append(('ts_epoch', '>=', start))
+    if end is not None:
+        filters.append(('ts_epoch', '<', end))
+
+    for _, directory in list_partitions(archive_dir, start, end):
+        for path in sorted(glob.glob(os.path.join(directory, '*.parquet'))):
+            table = pq.read_table(path, filters=filters or None)
+            table = table.sort_by([('ts_epoch', 'ascending'), ('id', 'ascending')])
+            for offset in range(0, table.num_rows, chunk_size):
+                yield table.slice(offset, chunk_size).to_pylist()
+
+
+def query_history_with_archive(c, archive_dir, user_id=None, start=None, end=None, limit=100,
+                               cursor=None, order='desc'):
+    """query_history over sensor_data and the archive, merged into one order.
+
+    Archived rows keep their ids, so the same (ts_epoch, id) cursor pages
+    through both sources. The archive is only read when it could hold a
+    row for this page: a full live page newer than everything archived
+    (the usual newest-first page) never touches it.
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    descending = order != 'asc'
+    # Unclamped: at limit == MAX_PAGE_SIZE the extra row still has to come back
+    live = fetch_history_rows(c, user_id, start, end, limit + 1, cursor, order)
+    after = decode_cursor(cursor) if cursor else None
+
+    # Read after the live page, so rows archived in between are covered.
+    # Every archived row is at or below it: when the page cannot reach that
+    # far down, the archive has nothing to add.
+    newest_archived = archived_through(c, archive_dir)
+    if descending:
+        floor = live[-1]['ts_epoch'] if len(live) > limit else start
+    else:
+        bounds = [v for v in (start, after[0] if after else None) if v is not None]
+        floor = max(bounds) if bounds else None
+    if newest_archived is None or (floor is not None and floor > newest_archived):
+        archived = []
+    else:
+        archived = query_archive(archive_dir, user_id, start, end, limit + 1, after, order)
+
+    # A run interrupted between writing a partition and deleting its rows
+    # leaves them in both places until the next run; keep one copy
+    merged = {row['id']: row for row in archived}
+    merged.update((row['id'], row) for row in live)
+    rows = sorted(merged.values(), key=lambda r: (r['ts_epoch'], r['id']), reverse=descending)
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]['ts_epoch'], rows[-1]['id'])
+    return rows, next_cursor
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from db_pool import SQLitePool
+
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Archive old sensor rows into Parquet partitions")
+    parser.add_argument('--days', type=float, default=float(os.getenv("RETENTION_DAYS", "30")),
+                        help="keep this many days of readings in SQLite")
+    parser.add_argument('--db', default=os.path.join(base_dir, 'logs', 'industry_data.db'))
+    parser.add_argument('--archive', default=os.path.join(base_dir, 'logs', 'archive'))
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--enable-incremental-vacuum', action='store_true',
+                        help="switch the database to auto_vacuum=INCREMENTAL with one full VACUUM, then exit "
+                             "(stop the app first: the VACUUM locks the database)")
+    args = parser.parse_args()
+
+    if args.enable_incremental_vacuum:
+        db = SQLitePool(args.db)
+        started = time.perf_counter()
+        with db.connection() as conn:
+            switched = ensure_incremental_vacuum(conn)
+        print(f"✅ Database switched to incremental auto-vacuum in {time.perf_counter() - started:.1f}s"
+              if switched else "✅ Database already uses incremental auto-vacuum")
+        raise SystemExit(0)
+
+    job = RetentionJob(SQLitePool(args.db), args.archive, args.days, batch_size=args.batch_size)
+    started = time.perf_counter()
+    result = job.run_once()
+    print(f"✅ {result['archived']} rows older than "
+          f"{datetime.fromtimestamp(result['cutoff']):%Y-%m-%d %H:%M:%S} archived to {args.archive} "
+          f"in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,155 @@
+# backend/ring_buffer.py
+
+import os
+import threading
+import time
+from urllib.parse import quote
+
+import numpy as np
+
+CHANNELS = ['temperature', 'humidity', 'voc', 'co', 'pm1', 'pm25', 'pm10']
+RECORD_DTYPE = np.dtype([('ts', '<f8'), ('values', '<f4', (len(CHANNELS),))])
+
+# File layout: a 32-byte header (magic, version, capacity, records written)
+# followed by `capacity` fixed-width records
+MAGIC = 0x52494E4742554631  # "RINGBUF1"
+VERSION = 1
+HEADER_SIZE = 32
+
+
+class RingBuffer:
+    """Fixed-size circular log of recent readings in a memory-mapped file.
+
+    The newest `capacity` readings (timestamp + 7 float32 channels) stay on
+    disk and are exposed as NumPy views of the mapping, so a restart keeps
+    them and window queries never copy more than the slots they touch. The
+    record is written before the counter is advanced, so a reader never
+    sees a half-written slot.
+    """
+
+    def __init__(self, path, capacity=4096):
+        self.path = path
+        self._lock = threading.Lock()
+
+        size = HEADER_SIZE + capacity * RECORD_DTYPE.itemsize
+        if os.path.exists(path) and os.path.getsize(path) >= HEADER_SIZE:
+            header = np.fromfile(path, dtype='<u8', count=4)
+            if header[0] == MAGIC and header[1] == VERSION:
+                capacity = int(header[2])
+                size = HEADER_SIZE + capacity * RECORD_DTYPE.itemsize
+            else:
+                os.remove(path)
+
+        mode = 'r+' if os.path.exists(path) and os.path.getsize(path) == size else 'w+'
+        self._map = np.memmap(path, dtype=np.uint8, mode=mode, shape=(size,))
+        self._header = self._map[:HEADER_SIZE].view('<u8')
+        self._records = self._map[HEADER_SIZE:].view(RECORD_DTYPE)
+        if mode == 'w+':
+            self._header[:] = (MAGIC, VERSION, capacity, 0)
+        self.capacity = capacity
+
+    @property
+    def written(self):
+        return int(self._header[3])
+
+    def append(self, ts, values):
+        with self._lock:
+            written = int(self._header[3])
+            slot = self._records[written % self.capacity]
+            slot['ts'] = ts
+            slot['values'] = values
+            self._header[3] = written + 1
+
+    def views(self):
+        """(older, newer) views over the stored records, oldest first.
+
+        `older` is empty until the buffer has wrapped; concatenating the two
+        gives the records in insertion order.
+        """
+        written = self.written
+        if written <= self.capacity:
+            return self._records[:0], self._records[:written]
+        split = written % self.capacity
+        return self._records[split:], self._records[:split]
+
+    def latest(self, n=None):
+        """Last `n` records (all when None) as (older, newer) views, oldest first.
+
+        Both are views of the mapping, never copies: once the buffer has
+        wrapped the records are split at the write position, and callers
+        handle the two parts (np.concatenate them if they need one array).
+        """
+        older, newer = self.views()
+        n = len(older) + len(newer) if n is None else min(n, len(older) + len(newer))
+        if n <= len(newer):
+            return older[:0], newer[len(newer) - n:]
+        return older[len(older) - (n - len(newer)):], newer
+
+    def window(self, seconds, now=None):
+        """Records with ts in the last `seconds`, in insertion order.
+
+        A new array holding only the matching records (boolean selection
+        always copies); the rest of the buffer is read in place.
+        """
+        cutoff = (time.time() if now is None else now) - seconds
+        return np.concatenate([part[part['ts'] >= cutoff] for part in self.latest()])
+
+    def window_stats(self, seconds, now=None):
+        records = self.window(seconds, now)
+        if not len(records):
+            return {'count': 0, 'channels': {}}
+        values = records['values']
+        mins, maxs, means = values.min(axis=0), values.max(axis=0), values.mean(axis=0)
+        return {
+            'count': len(records),
+            'from': float(records['ts'].min()),
+            'to': float(records['ts'].max()),
+            'channels': {
+                name: {'min': float(mins[i]), 'max': float(maxs[i]), 'mean': float(means[i]),
+                       'last': float(values[-1, i])}
+                for i, name in enumerate(CHANNELS)
+            },
+        }
+
+    def flush(self):
+        self._map.flush()
+
+
+class RingBufferStore:
+    """One RingBuffer file per user under `directory`, opened on first use."""
+
+    def __init__(self, directory, capacity=4096):
+        self.directory = directory
+        self.capacity = capacity
+        self._buffers = {}
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def get(self, key, create=True):
+        with self._lock:
+            buffer = self._buffers.get(key)
+            if buffer is None:
+                path = os.path.join(self.directory, quote(str(key), safe='') + '.ring')
+                if not create and not os.path.exists(path):
+                    return None
+                buffer = self._buffers[key] = RingBuffer(path, self.capacity)
+            return buffer
+
+    def append_rows(self, rows):
+        """Append (key, ts, [7 channel values]) tuples."""
+        for key, ts, values in rows:
+            self.get(key).append(ts, values)
+
+    def flush(self):
+        with self._lock:
+            buffers = list(self._buffers.values())
+        for buffer in buffers:
+            buffer.flush()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'open_buffers': len(self._buffers),
+                'capacity': self.capacity,
+                'record_bytes': RECORD_DTYPE.itemsize,
+            }
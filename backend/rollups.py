@@ -0,0 +1,355 @@
+# backend/rollups.py
+
+import json
+import math
+
+METRICS = ['temperature', 'humidity', 'voc', 'co', 'pm1', 'pm25', 'pm10']
+RESOLUTIONS = {'minute': 60, 'hour': 3600}
+
+# Ranges up to this long are served from minute buckets, longer ones hourly
+MINUTE_RESOLUTION_MAX_RANGE = 6 * 3600
+
+# p95 comes from a log-bucketed histogram; every bucket spans 2% so the
+# estimate is within ~1% of the true value
+SKETCH_GAMMA = 1.02
+_LOG_GAMMA = math.log(SKETCH_GAMMA)
+
+# Batches at least this large are aggregated with NumPy; below it the
+# per-call overhead of NumPy costs more than it saves
+NUMPY_MIN_READINGS = 64
+
+
+def _table(resolution):
+    if resolution not in RESOLUTIONS:
+        raise ValueError(f"resolution must be one of {list(RESOLUTIONS)}")
+    return f"sensor_rollup_{resolution}"
+
+
+def ensure_schema(c):
+    metric_columns = ',\n'.join(f"{m}_min REAL, {m}_max REAL, {m}_sum REAL, {m}_hist TEXT" for m in METRICS)
+    for resolution in RESOLUTIONS:
+        c.execute(f'''CREATE TABLE IF NOT EXISTS {_table(resolution)} (
+                        scope TEXT NOT NULL,
+                        scope_id TEXT NOT NULL,
+                        bucket INTEGER NOT NULL,
+                        count INTEGER NOT NULL,
+                        {metric_columns},
+                        PRIMARY KEY (scope, scope_id, bucket)
+                    ) WITHOUT ROWID''')
+
+
+# === Histogram sketch ===
+def _sketch_value(key):
+    if key == 'z':
+        return 0.0
+    sign = -1.0 if key.startswith('n') else 1.0
+    k = int(key.lstrip('n'))
+    return sign * 2 * SKETCH_GAMMA ** k / (SKETCH_GAMMA + 1)
+
+
+def sketch_quantile(hist, q):
+    total = sum(hist.values())
+    if not total:
+        return None
+    rank = q * (total - 1)
+    seen = 0
+    for key in sorted(hist, key=_sketch_value):
+        seen += hist[key]
+        if seen > rank:
+            return _sketch_value(key)
+    return _sketch_value(key)
+
+
+# === Incremental update ===
+def _sketch_codes(values):
+    """Sketch keys of a float array as (k, sign) int arrays; zeros get sign 0."""
+    import numpy as np
+
+    magnitude = np.abs(values)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        k = np.ceil(np.log(np.where(magnitude > 0, magnitude, 1.0)) / _LOG_GAMMA).astype(np.int64)
+    return k, np.sign(values).astype(np.int64)
+
+
+def _sketch_key(value):
+    if value == 0:
+        return 'z'
+    k = math.ceil(math.log(abs(value)) / _LOG_GAMMA)
+    return f"{'n' if value < 0 else ''}{k}"
+
+
+def _code_key(k, sign):
+    if sign == 0:
+        return 'z'
+    return f"{'n' if sign < 0 else ''}{k}"
+
+
+def _empty_bucket():
+    return {'count': 0, 'metrics': {m: {'min': None, 'max': None, 'sum': 0.0, 'hist': {}} for m in METRICS}}
+
+
+def _merge(into, other):
+    into['count'] += other['count']
+    for m in METRICS:
+        a, b = into['metrics'][m], other['metrics'][m]
+        if b['min'] is None:
+            continue
+        a['min'] = b['min'] if a['min'] is None else min(a['min'], b['min'])
+        a['max'] = b['max'] if a['max'] is None else max(a['max'], b['max'])
+        a['sum'] += b['sum']
+        for key, n in b['hist'].items():
+            a['hist'][key] = a['hist'].get(key, 0) + n
+
+
+def _aggregate_small(epochs, scope_ids, values, seconds):
+    """Plain-Python _aggregate for a handful of readings (one HTTP request)."""
+    pending = {}
+    for ts_epoch, scope_id, row in zip(epochs, scope_ids, values):
+        key = (scope_id, ts_epoch - ts_epoch % seconds)
+        data = pending.get(key)
+        if data is None:
+            data = pending[key] = _empty_bucket()
+        data['count'] += 1
+        for m, value in zip(METRICS, row):
+            if value is None:
+                continue
+            stats = data['metrics'][m]
+            value = float(value)
+            stats['min'] = value if stats['min'] is None else min(stats['min'], value)
+            stats['max'] = value if stats['max'] is None else max(stats['max'], value)
+            stats['sum'] += value
+            sketch_key = _sketch_key(value)
+            stats['hist'][sketch_key] = stats['hist'].get(sketch_key, 0) + 1
+    return pending
+
+
+def _aggregate(epochs, scope_ids, values, seconds):
+    """Bucket readings with NumPy: {(scope_id, bucket): bucket data}."""
+    import numpy as np
+
+    ids = {}
+    scope_index = np.array([ids.setdefault(s, len(ids)) for s in scope_ids], dtype=np.int64)
+    scope_names = list(ids)
+    first = epochs.min() - epochs.min() % seconds
+    slots = (epochs - first) // seconds
+
+    # One int64 code per (scope, bucket), so grouping is a flat unique
+    codes, inverse, counts = np.unique(scope_index * (int(slots.max()) + 1) + slots,
+                                       return_inverse=True, return_counts=True)
+    inverse = inverse.reshape(-1)
+    scopes, group_slots = np.divmod(codes, int(slots.max()) + 1)
+    pending = {}
+    for scope, slot, count in zip(scopes.tolist(), group_slots.tolist(), counts.tolist()):
+        data = _empty_bucket()
+        data['count'] = count
+        pending[(scope_names[scope], int(first) + slot * seconds)] = data
+    keys = list(pending)
+
+    for i, m in enumerate(METRICS):
+        column = values[:, i]
+        valid = ~np.isnan(column)
+        if not valid.any():
+            continue
+        group, column = inverse[valid], column[valid]
+
+        mins = np.full(len(codes), np.inf)
+        maxs = np.full(len(codes), -np.inf)
+        np.minimum.at(mins, group, column)
+        np.maximum.at(maxs, group, column)
+        sums = np.bincount(group, weights=column, minlength=len(codes))
+
+        # Sketch cells as one int64 code per (group, k, sign) as well
+        k, sign = _sketch_codes(column)
+        k_min = int(k.min())
+        k_span = (int(k.max()) - k_min + 1) * 3
+        cells, cell_counts = np.unique(group * k_span + (k - k_min) * 3 + sign + 1, return_counts=True)
+        cell_groups, rest = np.divmod(cells, k_span)
+        cell_k, cell_sign = np.divmod(rest, 3)
+
+        metric_stats = [pending[key]['metrics'][m] for key in keys]
+        key_names = {}
+        for g, key_k, key_sign, n in zip(cell_groups.tolist(), (cell_k + k_min).tolist(),
+                                         (cell_sign - 1).tolist(), cell_counts.tolist()):
+            name = key_names.get((key_k, key_sign))
+            if name is None:
+                name = key_names[(key_k, key_sign)] = _code_key(key_k, key_sign)
+            metric_stats[g]['hist'][name] = n
+
+        present = np.unique(group)
+        for g, low, high, total in zip(present.tolist(), mins[present].tolist(), maxs[present].tolist(),
+                                       sums[present].tolist()):
+            stats = metric_stats[g]
+            stats['min'], stats['max'], stats['sum'] = low, high, total
+
+    return pending
+
+
+def _row_data(row):
+    data = {'count': row['count'], 'metrics': {}}
+    for m in METRICS:
+        data['metrics'][m] = {'min': row[f'{m}_min'], 'max': row[f'{m}_max'],
+                              'sum': row[f'{m}_sum'], 'hist': json.loads(row[f'{m}_hist'])}
+    return data
+
+
+def _load_range(c, table, scope, scope_ids, first, last):
+    ids = list(set(scope_ids))
+    query = f'SELECT * FROM {table} WHERE scope = ? AND bucket BETWEEN ? AND ?'
+    params = [scope, first, last]
+    if len(ids) <= 100:
+        query += f" AND scope_id IN ({', '.join('?' * len(ids))})"
+        params += ids
+    c.execute(query, params)
+    return {(row['scope_id'], row['bucket']): _row_data(row) for row in c.fetchall()}
+
+
+def _encode_hist(hist):
+    return '{' + ','.join(f'"{key}":{n}' for key, n in hist.items()) + '}'
+
+
+def update_rollups(c, readings, site_id):
+    """Fold readings into the minute/hour rollups, per user and for the site.
+
+    `readings` are (ts_epoch, user_id, {metric: value}) tuples. They are
+    aggregated in memory first (with NumPy for large batches), the buckets
+    they touch are read back with one range query per table and scope,
+    merged, and written with a single executemany, all inside the caller's
+    transaction.
+    """
+    if not readings:
+        return
+
+    epochs = [r[0] for r in readings]
+    users = [r[1] for r in readings]
+    values = [[r[2].get(m) for m in METRICS] for r in readings]
+    first, last = min(epochs), max(epochs)
+    aggregate = _aggregate_small
+    if len(readings) >= NUMPY_MIN_READINGS:
+        import numpy as np
+
+        epochs = np.array(epochs, dtype=np.int64)
+        values = np.array(values, dtype=np.float64)  # None becomes NaN
+        aggregate = _aggregate
+
+    for resolution, seconds in RESOLUTIONS.items():
+        table = _table(resolution)
+        rows = []
+        for scope, scope_ids in (('user', users), ('site', [site_id] * len(users))):
+            pending = aggregate(epochs, scope_ids, values, seconds)
+            existing = _load_range(c, table, scope, scope_ids, first - first % seconds, last)
+
+            for (scope_id, bucket), data in pending.items():
+                stored = existing.get((scope_id, bucket))
+                if stored is not None:
+                    _merge(stored, data)
+                    data = stored
+                row = [scope, scope_id, bucket, data['count']]
+                for m in METRICS:
+                    stats = data['metrics'][m]
+                    row += [stats['min'], stats['max'], stats['sum'], _encode_hist(stats['hist'])]
+                rows.append(row)
+
+        placeholders = ', '.join('?' * len(rows[0]))
+        c.executemany(f'INSERT OR REPLACE INTO {table} VALUES ({placeholders})', rows)
+
+
+def rebuild_rollups(conn, site_id, start=None, end=None, archive_dir=None, chunk_size=5000):
+    """Recompute the rollup buckets covering [start, end] (all when None), e.g. after a bulk import.
+
+    Buckets are recomputed from sensor_data and, with `archive_dir`, from
+    the Parquet archive, so periods that retention already moved out of
+    SQLite keep their rollups. Every chunk is its own transaction, so live
+    ingest is never locked out for longer than one chunk. Readings ingested
+    while the rebuild runs roll themselves up and are left out of it.
+    """
+    seconds = max(RESOLUTIONS.values())
+    first = start - start % seconds if start is not None else None
+    last = end - end % seconds + seconds if end is not None else None  # exclusive
+
+    ts_clauses, ts_params = ['ts_epoch IS NOT NULL'], []
+    bucket_clauses, bucket_params = [], []
+    if first is not None:
+        ts_clauses.append('ts_epoch >= ?')
+        bucket_clauses.append('bucket >= ?')
+        ts_params.append(first)
+        bucket_params.append(first)
+    if last is not None:
+        ts_clauses.append('ts_epoch < ?')
+        bucket_clauses.append('bucket < ?')
+        ts_params.append(last)
+        bucket_params.append(last)
+
+    # Clearing the buckets and noting the newest id is one write transaction:
+    # every row up to that id is recomputed below, every later one is added
+    # by ingest itself
+    with conn:
+        conn.execute('BEGIN IMMEDIATE')
+        max_id = conn.execute('SELECT max(id) FROM sensor_data').fetchone()[0] or 0
+        bucket_where = f"WHERE {' AND '.join(bucket_clauses)}" if bucket_clauses else ''
+        for resolution in RESOLUTIONS:
+            conn.execute(f'DELETE FROM {_table(resolution)} {bucket_where}', bucket_params)
+
+    if archive_dir:
+        from retention import iter_archive
+
+        for chunk in iter_archive(archive_dir, start=first, end=last, chunk_size=chunk_size):
+            ids = [row['id'] for row in chunk]
+            # Left in sensor_data by an interrupted archive run: counted below
+            still_live = {row[0] for row in conn.execute(
+                f"SELECT id FROM sensor_data WHERE id IN ({', '.join('?' * len(ids))})", ids)}
+            with conn:
+                update_rollups(conn.cursor(), [(row['ts_epoch'], row['user_id'], {m: row[m] for m in METRICS})
+                                               for row in chunk if row['id'] not in still_live], site_id)
+
+    after = None
+    while True:
+        clauses, params = ts_clauses + ['id <= ?'], ts_params + [max_id]
+        if after is not None:
+            clauses.append('(ts_epoch, id) > (?, ?)')
+            params += after
+        chunk = conn.execute(f'''SELECT id, ts_epoch, user_id, {', '.join(METRICS)} FROM sensor_data
+                                WHERE {' AND '.join(clauses)} ORDER BY ts_epoch, id LIMIT ?''',
+                             (*params, chunk_size)).fetchall()
+        if not chunk:
+            break
+        with conn:
+            update_rollups(conn.cursor(), [(row[1], row[2], dict(zip(METRICS, row[3:]))) for row in chunk], site_id)
+        after = (chunk[-1][1], chunk[-1][0])
+
+
+# === Queries ===
+def choose_resolution(start, end):
+    if start is None or end is None or end - start > MINUTE_RESOLUTION_MAX_RANGE:
+        return 'hour'
+    return 'minute'
+
+
+def query_rollups(c, scope, scope_id, start=None, end=None, resolution=None):
+    """Rollup rows for [start, end) with min/max/mean/p95 per metric."""
+    resolution = resolution or choose_resolution(start, end)
+    clauses, params = ['scope = ?', 'scope_id = ?'], [scope, scope_id]
+    if start is not None:
+        clauses.append('bucket >= ?')
+        params.append(start - start % RESOLUTIONS[resolution])
+    if end is not None:
+        clauses.append('bucket < ?')
+        params.append(end)
+
+    c.execute(f'''SELECT * FROM {_table(resolution)} WHERE {' AND '.join(clauses)}
+                  ORDER BY bucket''', params)
+
+    results = []
+    for row in c.fetchall():
+        row = dict(row)
+        metrics = {}
+        for m in METRICS:
+            hist = json.loads(row[f'{m}_hist'])
+            count = sum(hist.values())
+            metrics[m] = {
+                'min': row[f'{m}_min'],
+                'max': row[f'{m}_max'],
+                'mean': row[f'{m}_sum'] / count if count else None,
+                'p95': sketch_quantile(hist, 0.95),
+            }
+        results.append({'bucket': row['bucket'], 'count': row['count'], 'metrics': metrics})
+    return resolution, results
@@ -5,6 +5,7 @@ from flask_socketio import emit
 from datetime import datetime
 from models.alert_model import Alert
 from database import db
+from routes.worker import invalidate_zone_alerts
 
 alert_bp = Blueprint("alerts", __name__)
 socketio = None  # will be set externally
@@ -27,6 +28,7 @@ def send_alert():
     )
     db.session.add(alert)
     db.session.commit()
+    invalidate_zone_alerts(zone)
 
     payload = {
         "zone": alert.zone,
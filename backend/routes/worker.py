@@ -2,25 +2,99 @@ from flask import Blueprint, request, jsonify
 from models.alert_model import Alert
 from models.user_model import User
 from database import db_session
+from cache import LRUCache
+from datetime import datetime
+from sqlalchemy import and_, or_
 from jose import jwt
 import os
+import time
 
 alerts_bp = Blueprint('alerts', __name__)
 
 SECRET_KEY = os.getenv("SECRET_KEY", "mysecretkey")
 ALGORITHM = "HS256"
 
+DEFAULT_PAGE_SIZE = 10
+MAX_PAGE_SIZE = 100
+
+# token -> ({"id", "zone_assigned"}, JWT exp); short TTL so zone reassignments show up quickly
+token_cache = LRUCache(maxsize=4096, ttl=float(os.getenv("TOKEN_CACHE_TTL", "60")))
+# zone -> newest MAX_PAGE_SIZE alerts, dropped by send_alert when the zone gets a new one
+zone_alert_cache = LRUCache(maxsize=256, ttl=float(os.getenv("ZONE_ALERT_CACHE_TTL", "300")))
+
+
+@alerts_bp.teardown_app_request
+def remove_session(exc=None):
+    db_session.remove()
+
+
 def get_user_from_token(token):
+    cached = token_cache.get(token)
+    if cached is not None:
+        user, expires_at = cached
+        # The cache TTL can outlive the token itself
+        if expires_at is None or expires_at > time.time():
+            return user
+        token_cache.invalidate(token)
+        return None
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         user = db_session.query(User).filter_by(id=payload["user_id"]).first()
+        if user is None:
+            return None
+        user = {"id": user.id, "zone_assigned": user.zone_assigned}
+        token_cache.set(token, (user, payload.get("exp")))
         return user
     except Exception as e:
         print("Token error:", e)
         return None
 
+
+def invalidate_zone_alerts(zone):
+    zone_alert_cache.invalidate(zone)
+
+
+def serialize_alert(alert):
+    return {
+        "id": alert.id,
+        "message": alert.message,
+        "severity": alert.level,
+        "timestamp": alert.timestamp.isoformat(),
+        "zone": alert.zone
+    }
+
+
+def encode_cursor(alert):
+    return f"{alert['timestamp']}|{alert['id']}"
+
+
+def decode_cursor(cursor):
+    timestamp, alert_id = cursor.rsplit("|", 1)
+    return datetime.fromisoformat(timestamp), int(alert_id)
+
+
+def query_zone_alerts(zone, limit, cursor=None):
+    """Newest-first alerts for a zone, continuing after `cursor` (keyset on timestamp, id)."""
+    query = db_session.query(Alert).filter(Alert.zone == zone)
+    if cursor:
+        timestamp, alert_id = decode_cursor(cursor)
+        query = query.filter(or_(Alert.timestamp < timestamp,
+                                 and_(Alert.timestamp == timestamp, Alert.id < alert_id)))
+    alerts = query.order_by(Alert.timestamp.desc(), Alert.id.desc()).limit(limit).all()
+    return [serialize_alert(alert) for alert in alerts]
+
+
 @alerts_bp.route("/my-alerts", methods=["GET"])
 def get_my_alerts():
+    """
+    Query params: token, limit (default 10, max 100) and cursor (the
+    next_cursor of the previous page).
+
+    Without a cursor parameter the response is the bare list of alerts it
+    has always been, with the next page's cursor in the X-Next-Cursor
+    header. With one (an empty cursor= asks for the first page) it is
+    {"alerts": [...], "next_cursor": ...}.
+    """
     token = request.args.get("token")
     if not token:
         return jsonify({"error": "Token required"}), 400
@@ -29,21 +103,28 @@ def get_my_alerts():
     if not user:
         return jsonify({"error": "Invalid token"}), 403
 
-    alerts = db_session.query(Alert)\
-        .filter_by(zone=user.zone_assigned)\
-        .order_by(Alert.timestamp.desc())\
-        .limit(10)\
-        .all()
-
-    result = [
-        {
-            "id": alert.id,
-            "message": alert.message,
-            "severity": alert.severity,
-            "timestamp": alert.timestamp.isoformat(),
-            "zone": alert.zone
-        }
-        for alert in alerts
-    ]
-
-    return jsonify(result)
+    try:
+        limit = max(1, min(int(request.args.get("limit", DEFAULT_PAGE_SIZE)), MAX_PAGE_SIZE))
+        cursor = request.args.get("cursor")
+        zone = user["zone_assigned"]
+
+        if cursor:
+            # Deeper pages are a single index range scan on (zone, timestamp)
+            result = query_zone_alerts(zone, limit + 1, cursor)
+        else:
+            # First pages are what every worker polls; serve them from the zone cache
+            newest = zone_alert_cache.get(zone)
+            if newest is None:
+                newest = query_zone_alerts(zone, MAX_PAGE_SIZE + 1)
+                zone_alert_cache.set(zone, newest)
+            result = newest[:limit + 1]
+    except ValueError as e:
+        return jsonify({"error": f"Invalid query parameter: {e}"}), 400
+
+    next_cursor = encode_cursor(result[limit - 1]) if len(result) > limit else None
+    if "cursor" not in request.args:
+        response = jsonify(result[:limit])
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return response
+    return jsonify({"alerts": result[:limit], "next_cursor": next_cursor})
@@ -0,0 +1,88 @@
+# backend/sensor_export.py
+
+import csv
+import io
+import json
+import zlib
+
+from retention import ARCHIVE_COLUMNS, archived_through, iter_archive
+
+EXPORT_FORMATS = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+
+def iter_live_rows(conn, user_id=None, start=None, end=None, chunk_size=1000):
+    """Yield lists of sensor_data rows in (ts_epoch, id) order, `chunk_size` at a time."""
+    clauses, params = [], []
+    if user_id:
+        clauses.append('user_id = ?')
+        params.append(user_id)
+    if start is not None:
+        clauses.append('ts_epoch >= ?')
+        params.append(start)
+    if end is not None:
+        clauses.append('ts_epoch < ?')
+        params.append(end)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+
+    c = conn.execute(f'''SELECT {', '.join(ARCHIVE_COLUMNS)} FROM sensor_data {where}
+                         ORDER BY ts_epoch, id''', params)
+    while True:
+        rows = c.fetchmany(chunk_size)
+        if not rows:
+            break
+        yield [tuple(row) for row in rows]
+
+
+def iter_export_rows(conn, archive_dir, user_id=None, start=None, end=None, chunk_size=1000):
+    """Archived rows first, then live ones, as lists of tuples in ARCHIVE_COLUMNS order.
+
+    Everything is read in one read transaction, which stays open until the
+    caller has consumed the rows (or closes the generator). Archived rows
+    are taken only up to the archive_meta high-water mark seen in that
+    transaction and only if sensor_data no longer had them, so a retention
+    run moving rows mid-export neither drops nor repeats any.
+    """
+    conn.execute('BEGIN')
+    try:
+        archived = archived_through(conn, archive_dir)
+        if archived is not None and (start is None or start <= archived):
+            archive_end = archived + 1 if end is None else min(end, archived + 1)
+            for chunk in iter_archive(archive_dir, user_id, start, archive_end, chunk_size):
+                ids = [row['id'] for row in chunk]
+                still_live = {row[0] for row in conn.execute(
+                    f"SELECT id FROM sensor_data WHERE id IN ({', '.join('?' * len(ids))})", ids)}
+                rows = [tuple(row[column] for column in ARCHIVE_COLUMNS)
+                        for row in chunk if row['id'] not in still_live]
+                if rows:
+                    yield rows
+        yield from iter_live_rows(conn, user_id, start, end, chunk_size)
+    finally:
+        conn.commit()  # ends the read transaction
+
+
+def encode_ndjson(chunks):
+    for rows in chunks:
+        yield ''.join(json.dumps(dict(zip(ARCHIVE_COLUMNS, row))) + '\n' for row in rows).encode()
+
+
+def encode_csv(chunks):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(ARCHIVE_COLUMNS)
+    yield buffer.getvalue().encode()
+    buffer.seek(0)
+    buffer.truncate()
+    for rows in chunks:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def gzip_stream(chunks, level=6):
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # 31: gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
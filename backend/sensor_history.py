@@ -0,0 +1,88 @@
+# backend/sensor_history.py
+
+import base64
+from datetime import datetime
+
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+MAX_PAGE_SIZE = 1000
+
+
+def to_epoch(value):
+    """Epoch seconds from an int/float epoch or a timestamp string (local time)."""
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    text = str(value).strip()
+    if text.lstrip('-').isdigit():
+        return int(text)
+    try:
+        return int(datetime.strptime(text, TIMESTAMP_FORMAT).timestamp())
+    except ValueError:
+        return int(datetime.fromisoformat(text).timestamp())
+
+
+def encode_cursor(ts_epoch, row_id):
+    return base64.urlsafe_b64encode(f"{ts_epoch}:{row_id}".encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    padded = cursor + '=' * (-len(cursor) % 4)
+    ts_epoch, row_id = base64.urlsafe_b64decode(padded.encode()).decode().split(':')
+    return int(ts_epoch), int(row_id)
+
+
+def ensure_schema(c):
+    """Add the integer ts_epoch column and the history indexes if missing."""
+    columns = [row[1] for row in c.execute('PRAGMA table_info(sensor_data)')]
+    if 'ts_epoch' not in columns:
+        c.execute('ALTER TABLE sensor_data ADD COLUMN ts_epoch INTEGER')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_sensor_data_user_ts ON sensor_data (user_id, ts_epoch)')
+    c.execute('CREATE INDEX IF NOT EXISTS idx_sensor_data_ts ON sensor_data (ts_epoch)')
+    # Backfill rows written before the column existed. Their TEXT timestamps
+    # are local time, like the ones ingest writes.
+    c.execute('''UPDATE sensor_data SET ts_epoch = CAST(strftime('%s', timestamp, 'utc') AS INTEGER)
+                 WHERE ts_epoch IS NULL AND timestamp IS NOT NULL''')
+
+
+def fetch_history_rows(c, user_id=None, start=None, end=None, count=100, cursor=None, order='desc'):
+    """Up to `count` sensor rows in [start, end) past `cursor`, ordered by (ts_epoch, id); no page-size clamp."""
+    descending = order != 'asc'
+
+    clauses, params = [], []
+    if user_id:
+        clauses.append('user_id = ?')
+        params.append(user_id)
+    if start is not None:
+        clauses.append('ts_epoch >= ?')
+        params.append(start)
+    if end is not None:
+        clauses.append('ts_epoch < ?')
+        params.append(end)
+    if cursor:
+        clauses.append(f"(ts_epoch, id) {'<' if descending else '>'} (?, ?)")
+        params.extend(decode_cursor(cursor))
+
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+    direction = 'DESC' if descending else 'ASC'
+    c.execute(f'''SELECT * FROM sensor_data {where}
+                  ORDER BY ts_epoch {direction}, id {direction} LIMIT ?''', (*params, int(count)))
+    return [dict(row) for row in c.fetchall()]
+
+
+def query_history(c, user_id=None, start=None, end=None, limit=100, cursor=None, order='desc'):
+    """One page of sensor rows in [start, end), ordered by (ts_epoch, id).
+
+    Returns (rows, next_cursor). The cursor is the position of the last row
+    returned, so each page is a single index range scan no matter how deep
+    the caller has paged.
+    """
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    # One row past the page tells whether there is a next one
+    rows = fetch_history_rows(c, user_id, start, end, limit + 1, cursor, order)
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1]['ts_epoch'], rows[-1]['id'])
+    return rows, next_cursor
@@ -0,0 +1,79 @@
+# backend/startup_report.py
+#
+# Cold-start breakdown for the ingest API, used by `python app.py --startup-report`.
+# Runs `python -X importtime` in a fresh interpreter so cached modules from
+# the current process don't hide the real cost.
+
+import os
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Imports app and then loads the models, timing each phase separately
+PROBE = """
+import time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+app.warm_up()
+t2 = time.perf_counter()
+print(f"PHASE import {t1 - t0:.6f}")
+print(f"PHASE warm_up {t2 - t1:.6f}")
+"""
+
+
+def parse_importtime(stderr):
+    """Return (module, self_us, cumulative_us, depth) for each importtime line."""
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|', 2)
+            depth = (len(name) - len(name.lstrip())) // 2
+            entries.append((name.strip(), int(self_us), int(cumulative_us), depth))
+        except ValueError:
+            continue
+    return entries
+
+
+def collect(python=sys.executable):
+    result = subprocess.run([python, '-X', 'importtime', '-c', PROBE], cwd=BASE_DIR,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"startup probe failed:\n{result.stderr[-2000:]}")
+
+    phases = {}
+    for line in result.stdout.splitlines():
+        if line.startswith('PHASE '):
+            _, name, seconds = line.split()
+            phases[name] = float(seconds)
+    return phases, parse_importtime(result.stderr)
+
+
+def print_startup_report(top=15):
+    phases, entries = collect()
+
+    print("=== Startup Report ===")
+    print(f"import app:   {phases.get('import', 0) * 1000:8.1f} ms")
+    print(f"warm_up():    {phases.get('warm_up', 0) * 1000:8.1f} ms")
+
+    # Top-level packages (as imported by app and its dependencies)
+    roots = {}
+    for name, _, cumulative_us, depth in entries:
+        root = name.split('.')[0]
+        if depth == 1:
+            roots[root] = roots.get(root, 0) + cumulative_us
+
+    print(f"\nSlowest top-level imports (cumulative):")
+    for name, cumulative_us in sorted(roots.items(), key=lambda item: -item[1])[:top]:
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    print(f"\nSlowest single modules (self time):")
+    for name, self_us, _, _ in sorted(entries, key=lambda e: -e[1])[:top]:
+        print(f"  {self_us / 1000:8.1f} ms  {name}")
+
+
+if __name__ == '__main__':
+    print_startup_report()
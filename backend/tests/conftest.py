@@ -0,0 +1,39 @@
+# backend/tests/conftest.py
+
+import os
+import sys
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+# ws_server.py imports wire_format as a top-level module
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'websocket_server'))
+
+from bulk_import import ensure_tables  # noqa: E402
+from db_pool import SQLitePool  # noqa: E402
+from retention import ensure_schema as ensure_archive_schema  # noqa: E402
+
+INSERT_SENSOR_ROW = '''INSERT INTO sensor_data
+                       (timestamp, temperature, humidity, voc, co, pm1, pm25, pm10, user_id, ts_epoch)
+                       VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'''
+
+
+@pytest.fixture
+def db(tmp_path):
+    """A pool on a fresh database with the app's sensor, history, rollup and archive tables."""
+    pool = SQLitePool(str(tmp_path / 'industry_data.db'))
+    with pool.connection() as conn:
+        ensure_tables(conn)
+        ensure_archive_schema(conn.cursor())
+    yield pool
+    pool.close_all()
+
+
+def sensor_row(ts_epoch, user_id='W1', value=1.0):
+    return ('', 20.0, 50.0, 0.1, value, 5.0, value, 15.0, user_id, ts_epoch)
+
+
+def insert_rows(pool, rows):
+    with pool.connection() as conn:
+        conn.executemany(INSERT_SENSOR_ROW, rows)
@@ -0,0 +1,81 @@
+# backend/tests/test_exposure.py
+
+import pytest
+
+from exposure import STEL_WINDOW, TWA_WINDOW, ExposureTracker, SlidingIntegral
+
+T0 = 1_753_000_000
+
+
+def test_constant_exposure_averages_over_the_full_window():
+    twa = SlidingIntegral(TWA_WINDOW)
+    for ts in range(T0, T0 + TWA_WINDOW + 1, 60):
+        twa.add(ts, 10.0)
+    assert twa.average() == pytest.approx(10.0)
+
+
+def test_short_exposure_is_diluted_by_the_window():
+    twa, stel = SlidingIntegral(TWA_WINDOW), SlidingIntegral(STEL_WINDOW)
+    for ts in range(T0, T0 + 15 * 60 + 1, 60):  # 40 ppm for 15 minutes
+        twa.add(ts, 40.0)
+        stel.add(ts, 40.0)
+    assert stel.average() == pytest.approx(40.0)
+    assert twa.average() == pytest.approx(40.0 * 900 / TWA_WINDOW)
+
+
+def test_readings_cover_the_time_since_the_previous_one_up_to_max_hold():
+    window = SlidingIntegral(3600, max_hold=600)
+    window.add(T0, 5.0)
+    window.add(T0 + 300, 10.0)  # covers 300 s
+    window.add(T0 + 3000, 20.0)  # gap: only the last 600 s count
+    assert window.integral() == pytest.approx(10.0 * 300 + 20.0 * 600)
+
+
+def test_exposure_decays_once_readings_stop():
+    stel = SlidingIntegral(STEL_WINDOW)
+    stel.add(T0, 0.0)
+    stel.add(T0 + 60, 300.0)  # one high minute, then 60
+    for ts in range(T0 + 120, T0 + 900 + 1, 60):
+        stel.add(ts, 60.0)
+    last = T0 + 900
+    assert stel.average() == pytest.approx((300.0 * 60 + 60.0 * 840) / 900)
+    assert stel.average(last + 300) == pytest.approx(40.0)
+    assert stel.average(last + 600) == pytest.approx(20.0)
+    assert stel.average(last + 900) == 0.0
+    assert stel.average(last - 300) == stel.average()  # never earlier than the last reading
+
+
+def test_equal_timestamps_replace_and_out_of_order_readings_are_ignored():
+    window = SlidingIntegral(3600)
+    window.add(T0, 1.0)
+    window.add(T0 + 60, 100.0)
+    assert window.add(T0 + 60, 2.0)
+    assert not window.add(T0 + 30, 50.0)
+    assert window.integral() == pytest.approx(2.0 * 60)
+
+
+def test_eviction_keeps_the_running_area_exact():
+    window = SlidingIntegral(900)
+    for i in range(10_000):
+        window.add(T0 + i * 7, float(i % 13))
+    now = T0 + 9_999 * 7
+    expected = sum(float(i % 13) * max(0, T0 + i * 7 - max(T0 + (i - 1) * 7, now - 900)) for i in range(1, 10_000))
+    assert window.integral() == pytest.approx(expected)
+    assert len(window.segments) <= 900 // 7 + 2
+
+
+def test_tracker_reports_limits_and_flags(tmp_path):
+    tracker = ExposureTracker(checkpoint_path=str(tmp_path / 'exposure.json'))
+    for ts in range(T0, T0 + 900 + 1, 60):
+        snapshot = tracker.update('W1', ts, {'co': 100.0, 'pm25': None})
+    assert snapshot['co']['stel'] == pytest.approx(100.0)
+    assert snapshot['pm25']['stel'] == 0.0
+    assert tracker.flags(snapshot) == ['CO STEL 100.0 > 75.0']
+    assert tracker.get('W1', now=T0 + 900 + 900)['co']['stel'] == 0.0
+    assert tracker.all(now=T0 + 900)['W1'] == snapshot
+    assert tracker.get('nobody') is None
+
+    tracker.save()
+    restored = ExposureTracker(checkpoint_path=tracker.checkpoint_path)
+    assert restored.load() == 1
+    assert restored.get('W1', now=T0 + 900) == snapshot
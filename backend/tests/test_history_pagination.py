@@ -0,0 +1,52 @@
+# backend/tests/test_history_pagination.py
+
+import time
+
+from conftest import insert_rows, sensor_row
+from retention import archive_old_rows, query_history_with_archive
+from sensor_history import MAX_PAGE_SIZE
+
+
+def page_through(pool, archive_dir, limit, order='desc', **filters):
+    pages, cursor = [], None
+    while True:
+        with pool.connection() as conn:
+            rows, cursor = query_history_with_archive(conn.cursor(), archive_dir, limit=limit, cursor=cursor,
+                                                      order=order, **filters)
+        pages.append([row['id'] for row in rows])
+        if cursor is None:
+            return pages
+
+
+def test_full_size_pages_keep_a_cursor(db, tmp_path):
+    now = int(time.time())
+    insert_rows(db, [sensor_row(now - 1500 + i) for i in range(1500)])
+
+    pages = page_through(db, str(tmp_path / 'archive'), MAX_PAGE_SIZE)
+
+    assert [len(page) for page in pages] == [MAX_PAGE_SIZE, 500]
+    assert sorted(sum(pages, []), reverse=True) == sum(pages, [])
+
+
+def test_pages_cross_the_archive_boundary(db, tmp_path):
+    archive_dir = str(tmp_path / 'archive')
+    now = int(time.time())
+    # Half the rows are older than the 30-day horizon, spread over several days
+    rows = [sensor_row(now - 60 * 86400 + i * 2000, user_id=f"W{i % 3}") for i in range(1250)]
+    rows += [sensor_row(now - 3600 + i, user_id=f"W{i % 3}") for i in range(1250)]
+    insert_rows(db, rows)
+    result = archive_old_rows(db, archive_dir, horizon_days=30, batch_size=400)
+    assert result['archived'] == 1250
+
+    with db.connection() as conn:
+        live_ids = {row[0] for row in conn.execute('SELECT id FROM sensor_data')}
+    assert len(live_ids) == 1250
+
+    expected = list(range(1, 2501))  # ts_epoch grows with id
+    for order in ('desc', 'asc'):
+        pages = page_through(db, archive_dir, MAX_PAGE_SIZE, order=order)
+        assert [len(page) for page in pages] == [1000, 1000, 500]
+        assert sum(pages, []) == (expected[::-1] if order == 'desc' else expected)
+
+    pages = page_through(db, archive_dir, 7, user_id='W1')
+    assert sum(pages, []) == [i for i in expected[::-1] if (i - 1) % 1250 % 3 == 1]
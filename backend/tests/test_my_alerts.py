@@ -0,0 +1,74 @@
+# backend/tests/test_my_alerts.py
+
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask
+from jose import jwt
+from sqlalchemy import create_engine
+
+import database
+from models.alert_model import Alert
+from models.user_model import User
+from routes import worker
+
+
+@pytest.fixture
+def client(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'smart_industry.db'}")
+    database.Base.metadata.create_all(engine)
+    database.db_session.remove()
+    database.SessionLocal.configure(bind=engine)
+    worker.token_cache.clear()
+    worker.zone_alert_cache.clear()
+
+    session = database.db_session()
+    session.add(User(id=1, name='Ana', email='ana@example.com', password='x', zone_assigned='Z1'))
+    start = datetime(2025, 7, 22, 8, 0)
+    session.add_all(Alert(worker_id='W1', zone='Z1', message=f'alert {i}', level='High',
+                          timestamp=start + timedelta(minutes=i // 2)) for i in range(15))
+    session.add(Alert(worker_id='W2', zone='Z2', message='other zone', timestamp=start))
+    session.commit()
+    database.db_session.remove()
+
+    app = Flask(__name__)
+    app.register_blueprint(worker.alerts_bp)
+    yield app.test_client()
+    database.SessionLocal.configure(bind=database.engine)
+    engine.dispose()
+
+
+def token(user_id=1, expires_in=3600):
+    return jwt.encode({'user_id': user_id, 'exp': int(time.time()) + expires_in}, worker.SECRET_KEY,
+                      algorithm=worker.ALGORITHM)
+
+
+def test_without_a_cursor_the_response_is_a_bare_list(client):
+    response = client.get('/my-alerts', query_string={'token': token()})
+    assert response.status_code == 200
+    alerts = response.get_json()
+    assert [alert['message'] for alert in alerts] == [f'alert {i}' for i in range(14, 4, -1)]
+    assert response.headers['X-Next-Cursor'] == worker.encode_cursor(alerts[-1])
+
+
+def test_cursor_pages_walk_the_zone_newest_first(client):
+    first = client.get('/my-alerts', query_string={'token': token(), 'cursor': '', 'limit': 4}).get_json()
+    assert [alert['message'] for alert in first['alerts']] == ['alert 14', 'alert 13', 'alert 12', 'alert 11']
+
+    seen, page = [], first
+    while True:
+        seen += [alert['message'] for alert in page['alerts']]
+        if page['next_cursor'] is None:
+            break
+        page = client.get('/my-alerts', query_string={'token': token(), 'cursor': page['next_cursor'],
+                                                      'limit': 4}).get_json()
+    assert seen == [f'alert {i}' for i in range(14, -1, -1)]
+
+
+def test_bad_requests(client):
+    assert client.get('/my-alerts').status_code == 400
+    assert client.get('/my-alerts', query_string={'token': 'nonsense'}).status_code == 403
+    assert client.get('/my-alerts', query_string={'token': token(expires_in=-10)}).status_code == 403
+    assert client.get('/my-alerts', query_string={'token': token(user_id=2)}).status_code == 403
+    assert client.get('/my-alerts', query_string={'token': token(), 'limit': 'ten'}).status_code == 400
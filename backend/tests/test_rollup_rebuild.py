@@ -0,0 +1,109 @@
+# backend/tests/test_rollup_rebuild.py
+
+import math
+import time
+
+import pytest
+
+import bulk_import
+from conftest import INSERT_SENSOR_ROW, sensor_row
+from retention import archive_old_rows
+from rollups import METRICS, rebuild_rollups, update_rollups
+
+SITE = 'site-1'
+HOUR = 3600
+
+
+def ingest(pool, rows):
+    """Insert rows and fold them into the rollups, like app.ingest_readings."""
+    with pool.connection() as conn:
+        conn.executemany(INSERT_SENSOR_ROW, rows)
+        update_rollups(conn.cursor(), [(row[9], row[8], dict(zip(METRICS, row[1:8]))) for row in rows], SITE)
+
+
+def hour_buckets(pool):
+    with pool.connection() as conn:
+        return {(row['scope'], row['scope_id'], row['bucket']): (row['count'], row['co_sum'])
+                for row in conn.execute('SELECT * FROM sensor_rollup_hour')}
+
+
+def run_import(monkeypatch, pool, archive_dir, *args):
+    monkeypatch.setattr('sys.argv', ['bulk_import.py', *args, '--db', pool.path, '--archive', archive_dir,
+                                     '--site-id', SITE])
+    return bulk_import.main()
+
+
+def write_csv(path, epochs, user_id='W9'):
+    lines = ['timestamp,temperature,humidity,voc,co,pm1,pm25,pm10,user_id']
+    lines += [f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts))},20,50,0.1,3,5,3,15,{user_id}"
+              for ts in epochs]
+    path.write_text('\n'.join(lines) + '\n')
+    return str(path)
+
+
+@pytest.fixture
+def archived(db, tmp_path):
+    """Rollups over 40 days of readings, of which everything before day 30 was archived."""
+    now = int(time.time())
+    start = now - 40 * 86400
+    ingest(db, [sensor_row(start + i * 1800, user_id=f"W{i % 2}", value=float(i % 7)) for i in range(40 * 48)])
+    archive_dir = str(tmp_path / 'archive')
+    assert archive_old_rows(db, archive_dir, horizon_days=30)['archived'] > 0
+    return archive_dir
+
+
+def test_import_keeps_rollups_of_archived_periods(db, tmp_path, monkeypatch, archived):
+    before = hour_buckets(db)
+    now = int(time.time())
+    source = write_csv(tmp_path / 'recent.csv', [now - 100, now - 50])
+
+    assert run_import(monkeypatch, db, archived, source) == 0
+
+    after = hour_buckets(db)
+    new_keys = {key for key in after if key[1] == 'W9'}
+    assert new_keys and all(after[key][0] >= 1 for key in new_keys)
+    # Everything else, archived periods included, is exactly as before
+    unchanged = {key: value for key, value in after.items() if key not in new_keys and key[1] != SITE}
+    assert unchanged == {key: value for key, value in before.items() if key[1] != SITE}
+    assert sum(after[key][0] for key in after if key[1] == SITE) == \
+        sum(before[key][0] for key in before if key[1] == SITE) + 2
+
+
+def test_rebuild_over_the_archive_matches_incremental_rollups(db, archived):
+    before = hour_buckets(db)
+    with db.connection() as conn:
+        conn.execute('DELETE FROM sensor_rollup_hour')
+        conn.execute('DELETE FROM sensor_rollup_minute')
+
+    with db.connection() as conn:
+        rebuild_rollups(conn, SITE, archive_dir=archived, chunk_size=100)
+
+    after = hour_buckets(db)
+    assert after.keys() == before.keys()
+    for key, (count, co_sum) in before.items():
+        assert after[key][0] == count
+        assert after[key][1] == pytest.approx(co_sum)
+
+
+def test_resumed_import_rebuilds_pending_rollups(db, tmp_path, monkeypatch, archived):
+    now = int(time.time())
+    source = write_csv(tmp_path / 'recent.csv', [now - 7200, now - 60])
+    monkeypatch.setattr(bulk_import, 'rebuild_rollups', lambda *a, **k: (_ for _ in ()).throw(RuntimeError))
+    with pytest.raises(RuntimeError):
+        run_import(monkeypatch, db, archived, source)
+    assert not any(key[1] == 'W9' for key in hour_buckets(db))
+
+    monkeypatch.undo()
+    assert run_import(monkeypatch, db, archived, source) == 0  # nothing left to import
+    assert sum(count for key, (count, _) in hour_buckets(db).items() if key[1] == 'W9') == 2
+    with db.connection() as conn:
+        assert bulk_import.rollups_pending(conn) is None
+
+
+@pytest.mark.parametrize('value', ['nan', 'inf', '-inf', 'abc'])
+def test_coerce_row_rejects_non_finite_values(value):
+    record = {'timestamp': '2025-07-22 00:58:46', 'temperature': '20', 'humidity': '50', 'voc': '0.1',
+              'co': value, 'pm1': '5', 'pm25': '3', 'pm10': '15', 'user_id': 'W1'}
+    assert bulk_import.coerce_row(record, 'unknown') is None
+    assert bulk_import.coerce_row(dict(record, co='3'), 'unknown')[4] == 3.0
+    assert not math.isnan(bulk_import.coerce_row(dict(record, co=''), 'unknown')[4] or 0.0)
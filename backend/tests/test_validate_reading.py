@@ -0,0 +1,55 @@
+# backend/tests/test_validate_reading.py
+
+import pytest
+
+from app import app, validate_reading
+
+SENSOR_HEADERS = {'X-SENSOR-TOKEN': 's3nsor_@uth_2025', 'Content-Type': 'application/json'}
+
+
+def reading(**overrides):
+    content = {'device_id': 'D1', 'temperature': 21.5, 'humidity': 48, 'voc': '0.3', 'co': 3,
+               'pm1': 5, 'pm': 3, 'pm10': 15, 'timestamp': '2025-07-22 00:58:46'}
+    content.update(overrides)
+    return content
+
+
+def test_valid_reading_is_coerced_to_floats():
+    content = reading()
+    assert validate_reading(content) is None
+    assert content['voc'] == 0.3 and type(content['humidity']) is float
+
+
+@pytest.mark.parametrize('value', [None, 'abc', '', True, [1], {'v': 1}, float('nan'), float('inf'),
+                                   '-inf', 'NaN', '1e999'])
+def test_bad_sensor_values_are_rejected(value):
+    assert validate_reading(reading(co=value)) == f'Invalid value for co: {value!r}'
+
+
+@pytest.mark.parametrize('timestamp', [float('inf'), float('-inf'), float('nan'), 1e300, 2 ** 63, True,
+                                       ['2025-07-22 00:58:46'], {'ts': 1}])
+def test_bad_timestamps_are_rejected(timestamp):
+    assert validate_reading(reading(timestamp=timestamp)) == f'Invalid timestamp: {timestamp!r}'
+
+
+@pytest.mark.parametrize('timestamp', [None, '', 1753145926, 1753145926.5, 'not a date'])
+def test_other_timestamps_pass(timestamp):
+    # Unparseable strings are stored with the ingest time
+    assert validate_reading(reading(timestamp=timestamp)) is None
+
+
+def test_missing_fields_are_rejected():
+    assert validate_reading([]) == 'Reading must be a JSON object'
+    assert validate_reading(reading(device_id='')) == 'Device ID missing'
+    content = reading()
+    del content['pm10']
+    assert validate_reading(content) == 'Missing key: pm10'
+
+
+@pytest.mark.parametrize('timestamp', ['Infinity', '-Infinity', 'NaN', '1e400'])
+def test_submit_data_rejects_non_finite_timestamps(timestamp):
+    body = '{"device_id": "D1", "temperature": 21, "humidity": 48, "voc": 0.3, "co": 3, "pm1": 5, ' \
+           f'"pm": 3, "pm10": 15, "timestamp": {timestamp}}}'
+    response = app.test_client().post('/submit_data', data=body, headers=SENSOR_HEADERS)
+    assert response.status_code == 400
+    assert response.get_json()['error'].startswith('Invalid timestamp')
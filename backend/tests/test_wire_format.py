@@ -0,0 +1,90 @@
+# backend/tests/test_wire_format.py
+
+import struct
+
+import pytest
+
+from wire_format import (Decoder, DeltaEncoder, encode_batch, encode_message, encode_wire, flatten)
+
+READING = {
+    'user_id': 'W1',
+    'user_name': 'Ana',
+    'risk_level': 'Unsafe',
+    'model_label': 'High',
+    'fuzzy_risk': 'Moderate',
+    'flags': ['CO'],
+    'timestamp': '2025-07-22 00:58:46',
+    'sensor_data': {'timestamp': '2025-07-22 00:58:46', 'temperature': 21.5, 'humidity': 48, 'voc': 0.3,
+                    'co': 37.25, 'pm1': None, 'pm25': 12.1, 'pm10': 20},
+    'exposure': {'co': {'twa': 12.5, 'stel': 30.0, 'twa_limit': 25, 'stel_limit': 100}},
+}
+
+
+def with_alert(message):
+    message = dict(message)
+    message['alert'] = (f"Alert for {message['user_id']}: Risk - {message['risk_level']}, "
+                        f"Model: {message['model_label']}, Fuzzy: {message['fuzzy_risk']}, "
+                        f"Issues: {', '.join(message['flags'])}")
+    message['message'] = message['alert']
+    return message
+
+
+def test_full_frame_round_trip():
+    message = with_alert(READING)
+    frame = encode_message(message)
+    assert Decoder().decode(frame) == message
+    assert len(frame) < len(str(message)) / 3  # derived alert/message cost one byte each
+
+
+def test_deltas_carry_changes_and_removals():
+    encoder, decoder = DeltaEncoder(), Decoder()
+    first = with_alert(READING)
+    second = dict(first, sensor_data=dict(first['sensor_data'], co=38.5), user_name=None)
+    del second['exposure']
+    third = dict(second, topics=['zone:B'])
+
+    frames = [encoder.encode(m['user_id'], encode_wire(flatten(m))) for m in (first, second, third)]
+    assert len(frames[1]) < len(frames[0]) / 3
+    assert [decoder.decode(frame) for frame in frames] == [first, second, third]
+
+    # Another user on the same stream starts with a full frame
+    other = dict(READING, user_id='W2')
+    assert decoder.decode(encoder.encode('W2', encode_wire(flatten(other)))) == other
+    assert decoder.decode(encode_batch([frames[0], frames[1]])) == [first, second]
+
+
+def test_delta_without_an_earlier_frame_is_rejected():
+    encoder = DeltaEncoder()
+    encoder.encode('W1', encode_wire(flatten(READING)))
+    delta = encoder.encode('W1', encode_wire(flatten(dict(READING, humidity=50))))
+    with pytest.raises(ValueError):
+        Decoder().decode(delta)
+
+
+@pytest.mark.parametrize('timestamp', [
+    {'a': 1}, ['2025-07-22 00:58:46'], 1753145926, 1753145926.5, None, True,
+    '2025-07-22T00:58:46', '2025-02-30 00:00:00', '1969-12-31 23:59:59', '2200-01-01 00:00:00',
+])
+def test_odd_timestamps_travel_unchanged(timestamp):
+    message = {'user_id': 'W1', 'timestamp': timestamp, 'sensor_data': {'timestamp': timestamp}}
+    assert Decoder().decode(encode_message(message)) == message
+
+
+@pytest.mark.parametrize('value', [0.1, 21.12346, -3.5, 1e-7, 3.4e38, 16777217.0])
+def test_numbers_come_back_as_the_shortest_float32_decimal(value):
+    decoded = Decoder().decode(encode_message({'user_id': 'W1', 'sensor_data': {'co': value}}))['sensor_data']['co']
+    assert struct.pack('<f', decoded) == struct.pack('<f', value)
+    if len(f"{value:g}".replace('-', '').replace('.', '').lstrip('0')) <= 6:
+        assert decoded == value
+
+
+@pytest.mark.parametrize('value', [float('nan'), float('inf'), 1e39, True, '3.5'])
+def test_numbers_float32_cannot_hold_travel_unchanged(value):
+    decoded = Decoder().decode(encode_message({'user_id': 'W1', 'sensor_data': {'co': value}}))
+    assert repr(decoded['sensor_data']['co']) == repr(value)
+
+
+@pytest.mark.parametrize('frame', [b'', b'\x09', b'\x01\x3f', b'\x01\x0d\x00', b'\x02\x01\x02W1'])
+def test_malformed_frames_raise_value_error(frame):
+    with pytest.raises(ValueError):
+        Decoder().decode(frame)
@@ -0,0 +1,84 @@
+# backend/threshold_rules.py
+
+import json
+import os
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+# Pollutants checked against adaptive thresholds, in flag order
+POLLUTANTS = ('pm25', 'co', 'voc')
+POLLUTANT_LABELS = {'pm25': 'PM2.5', 'co': 'CO', 'voc': 'VOC'}
+
+DEFAULT_THRESHOLDS = {'co': 35, 'pm25': 35, 'voc': 0.5}
+
+# Rules are applied in order. A rule matches on a worker field either by
+# keyword ("contains", case-insensitive substring) or by a numeric minimum
+# ("min"). "set" overwrites limits, "cap" only ever lowers them.
+THRESHOLD_RULES = [
+    {'field': 'age', 'min': 60, 'set': {'co': 25}},
+    {'field': 'health_condition', 'contains': ['asthma', 'respiratory'], 'set': {'pm25': 20, 'voc': 0.3}},
+    {'field': 'health_condition', 'contains': ['heart', 'cardio'], 'cap': {'co': 25, 'pm25': 25}},
+    {'field': 'work_environment', 'contains': ['welding', 'chemical'], 'cap': {'co': 25, 'voc': 0.3}},
+]
+
+# Extra rules (same format, JSON list) can be added without code changes
+RULES_FILE = os.getenv("THRESHOLD_RULES_FILE")
+if RULES_FILE and os.path.exists(RULES_FILE):
+    with open(RULES_FILE) as f:
+        THRESHOLD_RULES = THRESHOLD_RULES + json.load(f)
+
+CompiledThresholds = namedtuple('CompiledThresholds', ['limits', 'vector'])
+
+
+def _matches(rule, worker):
+    value = worker.get(rule['field'])
+    if 'min' in rule:
+        return value is not None and value >= rule['min']
+    text = (value or '').lower()
+    return any(keyword in text for keyword in rule['contains'])
+
+
+@lru_cache(maxsize=4096)
+def _compile(age, health_condition, work_environment):
+    worker = {'age': age, 'health_condition': health_condition, 'work_environment': work_environment}
+    limits = dict(DEFAULT_THRESHOLDS)
+
+    for rule in THRESHOLD_RULES:
+        if not _matches(rule, worker):
+            continue
+        limits.update(rule.get('set', {}))
+        for key, cap in rule.get('cap', {}).items():
+            limits[key] = min(limits[key], cap)
+
+    vector = np.array([limits[p] for p in POLLUTANTS], dtype=np.float64)
+    vector.setflags(write=False)
+    return CompiledThresholds(limits, vector)
+
+
+def compile_thresholds(worker):
+    """Materialize a worker's limits once; workers with the same profile share it."""
+    return _compile(worker['age'], worker['health_condition'], worker['work_environment'])
+
+
+def threshold_matrix(compiled, index):
+    """Expand per-worker threshold vectors to one row per reading.
+
+    `compiled` holds one CompiledThresholds per distinct worker and `index`
+    maps each reading to its worker, so rules are never re-evaluated per
+    reading.
+    """
+    table = np.stack([c.vector for c in compiled])
+    return table[np.asarray(index, dtype=np.intp)]
+
+
+def evaluate_flags(values, thresholds):
+    """Compare a (readings x pollutants) matrix against matching threshold rows."""
+    return np.asarray(values, dtype=np.float64) > np.asarray(thresholds, dtype=np.float64)
+
+
+def format_flags(readings, limits, mask_row):
+    """Build the human-readable flag strings for one reading."""
+    return [f"{POLLUTANT_LABELS[p]} {readings[p]} > {limits[p]}"
+            for p, exceeded in zip(POLLUTANTS, mask_row) if exceeded]
@@ -0,0 +1,374 @@
+# backend/websocket_server/wire_format.py
+#
+# Compact binary frames for the live reading payloads, as an alternative
+# to JSON on /broadcast (Content-Type: application/vnd.smart-industry.frame)
+# and on /ws/{role}?encoding=binary.
+#
+# A frame is one kind byte followed by fields. Each field is a one-byte id
+# from FIELDS and a value in that field's type: float32 numbers, numeric
+# codes for the risk labels, uint32 seconds for timestamps and
+# varint-length UTF-8 strings. Nested dicts (sensor_data, thresholds,
+# exposure) are flattened into their own ids, and an "alert" string that
+# just restates the other fields (or a "message" that repeats the alert)
+# is sent as a marker and rebuilt on decode.
+# Anything without an id (or that doesn't fit its field's type) travels
+# losslessly in a JSON "extra" field.
+#
+# Delta frames carry only the fields that changed since the previous frame
+# for the same user_id on the same stream, plus the user_id itself; ids
+# with the high bit set mark fields that were removed, and 0x40 marks a
+# null value. Numbers come back as the shortest decimal with the same
+# float32 value: exact up to 6 significant digits (usually 7), rounded to
+# float32 precision beyond that (so a frame posted to /broadcast reaches JSON
+# clients with that precision too).
+
+import calendar
+import functools
+import json
+import math
+import struct
+import time
+
+CONTENT_TYPE = "application/vnd.smart-industry.frame"
+
+FULL, DELTA, BATCH = 1, 2, 3
+REMOVED, NULL = 0x80, 0x40  # flag bits on a field id; ids stay below 0x40
+
+STR, F32, CODE, STRS, TIME, MARK, JSON = range(7)
+
+RISK_LEVELS = ("Safe", "Unsafe")
+MODEL_LABELS = ("Low", "Moderate", "High", "Critical")
+FUZZY_LABELS = ("Low", "Moderate", "High")
+
+TIME_FORMAT = "%Y-%m-%d %H:%M:%S"
+DERIVED = object()  # stands in for text the decoder can rebuild from the other fields
+EXTRA = (None,)  # path of the JSON field holding everything else; no JSON key is None
+
+# (field id, path, type, code table); ids are part of the format, never reuse one
+FIELDS = [
+    (0, EXTRA, JSON, None),
+    (1, ("user_id",), STR, None),
+    (2, ("user_name",), STR, None),
+    (3, ("risk_level",), CODE, RISK_LEVELS),
+    (4, ("model_label",), CODE, MODEL_LABELS),
+    (5, ("fuzzy_risk",), CODE, FUZZY_LABELS),
+    (6, ("alert",), STR, None),
+    (7, ("alert",), MARK, None),
+    (8, ("type",), STR, None),
+    (9, ("message",), STR, None),
+    (10, ("timestamp",), TIME, None),
+    (11, ("sensor_data", "device_id"), STR, None),
+    (12, ("sensor_data", "timestamp"), TIME, None),
+    (13, ("sensor_data", "temperature"), F32, None),
+    (14, ("sensor_data", "humidity"), F32, None),
+    (15, ("sensor_data", "voc"), F32, None),
+    (16, ("sensor_data", "co"), F32, None),
+    (17, ("sensor_data", "pm1"), F32, None),
+    (18, ("sensor_data", "pm"), F32, None),
+    (19, ("sensor_data", "pm25"), F32, None),
+    (20, ("sensor_data", "pm10"), F32, None),
+    (21, ("thresholds", "co"), F32, None),
+    (22, ("thresholds", "pm25"), F32, None),
+    (23, ("thresholds", "voc"), F32, None),
+    (24, ("exposure", "co", "twa"), F32, None),
+    (25, ("exposure", "co", "stel"), F32, None),
+    (26, ("exposure", "co", "twa_limit"), F32, None),
+    (27, ("exposure", "co", "stel_limit"), F32, None),
+    (28, ("exposure", "pm25", "twa"), F32, None),
+    (29, ("exposure", "pm25", "stel"), F32, None),
+    (30, ("exposure", "pm25", "twa_limit"), F32, None),
+    (31, ("exposure", "pm25", "stel_limit"), F32, None),
+    (32, ("flags",), STRS, None),
+    (33, ("topics",), STRS, None),
+    (34, ("target_roles",), STRS, None),
+    (35, ("target_role",), STR, None),
+    (36, ("message",), MARK, None),
+]
+
+FIELDS_BY_ID = {field_id: (path, kind, table) for field_id, path, kind, table in FIELDS}
+NESTED = {path[:i] for _, path, _, _ in FIELDS for i in range(1, len(path))}
+
+_F32 = struct.Struct("<f")
+_U32 = struct.Struct("<I")
+
+
+def derive_alert(message):
+    """The alert text submit_data builds from the other fields."""
+    return (f"Alert for {message.get('user_id')}: Risk - {message.get('risk_level')}, "
+            f"Model: {message.get('model_label')}, Fuzzy: {message.get('fuzzy_risk')}, "
+            f"Issues: {', '.join(message.get('flags') or [])}")
+
+
+def flatten(message):
+    """{path tuple: leaf value} for a message, descending only into the nested dicts FIELDS knows."""
+    fields = {}
+    stack = [((), message)]
+    while stack:
+        prefix, mapping = stack.pop()
+        for key, value in mapping.items():
+            path = prefix + (key,)
+            if path in NESTED and isinstance(value, dict):
+                stack.append((path, value))
+            else:
+                fields[path] = value
+    if "alert" in message and message["alert"] == derive_alert(message):
+        fields[("alert",)] = DERIVED
+    # /broadcast copies the alert into "message"
+    if "alert" in message and message.get("message") == message["alert"]:
+        fields[("message",)] = DERIVED
+    return fields
+
+
+def unflatten(fields):
+    message = {}
+    for path, value in fields.items():
+        target = message
+        for key in path[:-1]:
+            target = target.setdefault(key, {})
+        target[path[-1]] = value
+    if message.get("alert") is DERIVED:
+        message["alert"] = derive_alert(message)
+    if message.get("message") is DERIVED:
+        message["message"] = message["alert"]
+    return message
+
+
+# === Encoding ===
+def _varint(n):
+    if n < 0x80:
+        return bytes((n,))
+    out = bytearray()
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+    return bytes(out)
+
+
+def _encode_str(value, table):
+    if type(value) is not str:
+        return None
+    data = value.encode()
+    return _varint(len(data)) + data
+
+
+def _encode_f32(value, table):
+    if type(value) not in (float, int):  # not bool
+        return None
+    try:
+        data = _F32.pack(value)
+    except (OverflowError, struct.error):
+        return None
+    return data if math.isfinite(value) else None
+
+
+def _encode_code(value, table):
+    return table.get(value) if type(value) is str else None
+
+
+def _encode_strs(value, table):
+    if type(value) not in (list, tuple) or not all(type(item) is str for item in value):
+        return None
+    return _varint(len(value)) + b"".join(_encode_str(item, None) for item in value)
+
+
+def _encode_time(value, table):
+    # Anything but a str (possibly unhashable) goes to "extra" without touching the cache
+    return _pack_time(value) if type(value) is str else None
+
+
+@functools.lru_cache(maxsize=4096)
+def _pack_time(value):
+    # Cached: readings from one ingest batch share their timestamps
+    try:
+        seconds = calendar.timegm(time.strptime(value, TIME_FORMAT))
+    except (TypeError, ValueError, OverflowError):
+        return None
+    if not 0 <= seconds < 2 ** 32 or time.strftime(TIME_FORMAT, time.gmtime(seconds)) != value:
+        return None
+    return _U32.pack(seconds)
+
+
+def _encode_mark(value, table):
+    return b"" if value is DERIVED else None
+
+
+def _encode_json(value, table):
+    return _encode_str(json.dumps(value, separators=(",", ":")), None)
+
+
+ENCODERS = {STR: _encode_str, F32: _encode_f32, CODE: _encode_code, STRS: _encode_strs, TIME: _encode_time,
+            MARK: _encode_mark, JSON: _encode_json}
+
+# path -> [(field id byte, encoder, label -> code byte)], tried in order
+FIELDS_BY_PATH = {}
+for field_id, path, kind, table in FIELDS:
+    codes = {label: bytes((i,)) for i, label in enumerate(table)} if table else None
+    FIELDS_BY_PATH.setdefault(path, []).append((bytes((field_id,)), ENCODERS[kind], codes))
+
+
+def encode_wire(fields):
+    """{path: encoded field bytes} for flattened fields; unencodable leaves share the "extra" field."""
+    wire, extra = {}, []
+    for path, value in fields.items():
+        candidates = FIELDS_BY_PATH.get(path, ())
+        if candidates and value is None:
+            wire[path] = bytes((candidates[0][0][0] | NULL,))
+            continue
+        for header, encode, table in candidates:
+            data = encode(value, table)
+            if data is not None:
+                wire[path] = header + data
+                break
+        else:
+            extra.append([list(path), value])
+    if extra:
+        wire[EXTRA] = b"\x00" + _encode_json(extra, None)
+    return wire
+
+
+def encode_frame(wire, previous=None):
+    """A full frame, or a delta against the `previous` wire fields of the same user."""
+    if previous is None:
+        return bytes([FULL]) + b"".join(wire.values())
+    parts = [bytes([DELTA])]
+    for path, field in wire.items():
+        if path == ("user_id",) or previous.get(path) != field:
+            parts.append(field)
+    for path, field in previous.items():
+        if path not in wire:
+            parts.append(bytes([field[0] | REMOVED]))
+    return b"".join(parts)
+
+
+def encode_message(message):
+    """A full frame for one message dict."""
+    return encode_frame(encode_wire(flatten(message)))
+
+
+def encode_batch(frames):
+    return bytes((BATCH,)) + _varint(len(frames)) + b"".join(_varint(len(frame)) + frame for frame in frames)
+
+
+class DeltaEncoder:
+    """Per-stream encoder: remembers the last fields sent for each user_id and sends only what changed."""
+
+    def __init__(self, max_users=10000):
+        self.max_users = max_users
+        self.previous = {}
+
+    def encode(self, key, wire):
+        if not isinstance(key, str):
+            return encode_frame(wire)
+        previous = self.previous.pop(key, None)
+        if previous is None and len(self.previous) >= self.max_users:
+            # Forget the least recently sent user; it gets a full frame next time
+            self.previous.pop(next(iter(self.previous)))
+        self.previous[key] = wire
+        return encode_frame(wire, previous)
+
+
+# === Decoding ===
+def _read_varint(data, pos):
+    result = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        result |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return result, pos
+        shift += 7
+
+
+def _read_str(data, pos):
+    length, pos = _read_varint(data, pos)
+    if pos + length > len(data):
+        raise IndexError("string runs past the end of the frame")
+    return bytes(data[pos:pos + length]).decode(), pos + length
+
+
+def _read_f32(data, pos):
+    # The shortest decimal that packs back to the same float32, so short
+    # numbers come back exactly as written
+    packed = bytes(data[pos:pos + 4])
+    raw = _F32.unpack(packed)[0]
+    for digits in range(6, 10):
+        value = float(f"{raw:.{digits}g}")
+        if _F32.pack(value) == packed:
+            break
+    return (int(value) if value.is_integer() and abs(value) < 2 ** 53 else value), pos + 4
+
+
+def _decode_value(kind, table, data, pos):
+    if kind == STR:
+        return _read_str(data, pos)
+    if kind == F32:
+        return _read_f32(data, pos)
+    if kind == CODE:
+        return table[data[pos]], pos + 1
+    if kind == STRS:
+        count, pos = _read_varint(data, pos)
+        items = []
+        for _ in range(count):
+            item, pos = _read_str(data, pos)
+            items.append(item)
+        return items, pos
+    if kind == TIME:
+        return time.strftime(TIME_FORMAT, time.gmtime(_U32.unpack_from(data, pos)[0])), pos + 4
+    if kind == MARK:
+        return DERIVED, pos
+    text, pos = _read_str(data, pos)
+    return json.loads(text), pos
+
+
+class Decoder:
+    """Decodes the frames of one stream; delta frames need the decoder that saw the earlier ones."""
+
+    def __init__(self):
+        self.previous = {}
+
+    def decode(self, data):
+        """A message dict, or a list of them for a batch frame. Raises ValueError on bad frames."""
+        try:
+            if data[0] == BATCH:
+                count, pos = _read_varint(data, 1)
+                messages = []
+                for _ in range(count):
+                    length, pos = _read_varint(data, pos)
+                    messages.append(self._decode_frame(data[pos:pos + length]))
+                    pos += length
+                return messages
+            return self._decode_frame(data)
+        except (IndexError, KeyError, struct.error, UnicodeDecodeError) as e:
+            raise ValueError(f"Malformed frame: {e!r}") from e
+
+    def _decode_frame(self, data):
+        kind = data[0]
+        if kind not in (FULL, DELTA):
+            raise ValueError(f"Unknown frame kind {kind}")
+        fields, removed, pos = {}, [], 1
+        while pos < len(data):
+            field_id = data[pos]
+            pos += 1
+            path, field_kind, table = FIELDS_BY_ID[field_id & ~(REMOVED | NULL)]
+            if field_id & REMOVED:
+                removed.append(path)
+            elif field_id & NULL:
+                fields[path] = None
+            else:
+                fields[path], pos = _decode_value(field_kind, table, data, pos)
+
+        key = fields.get(("user_id",))
+        if kind == DELTA:
+            if key not in self.previous:
+                raise ValueError(f"Delta frame for {key!r} without an earlier frame")
+            fields = {**self.previous[key], **fields}
+            for path in removed:
+                fields.pop(path, None)
+        if key is not None:
+            self.previous[key] = fields
+
+        message_fields = {path: value for path, value in fields.items() if path != EXTRA}
+        for path, value in fields.get(EXTRA, []):
+            message_fields[tuple(path)] = value
+        return unflatten(message_fields)
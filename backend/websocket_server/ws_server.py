@@ -1,6 +1,13 @@
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from collections import deque
 import asyncio
+import bisect
+import json
+import os
+import time
+
+from wire_format import CONTENT_TYPE, Decoder, DeltaEncoder, encode_batch, encode_frame, encode_wire, flatten
 
 app = FastAPI()
 
@@ -15,45 +22,454 @@ app.add_middleware(
 )
 
 
+# === Slow-consumer settings ===
+# Each client has its own bounded queue drained by a writer task. When the
+# queue is full, "drop_oldest" discards its oldest message and "disconnect"
+# closes the client; a send that takes longer than WS_SEND_TIMEOUT closes it too.
+SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "256"))
+SLOW_CLIENT_POLICY = os.getenv("WS_SLOW_CLIENT_POLICY", "drop_oldest")
+SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", "5.0"))
+
+# === Liveness settings ===
+# Dead peers are found by protocol-level ping/pong: uvicorn sends a ping
+# every WS_PING_INTERVAL seconds and drops the connection if the pong takes
+# longer than WS_PING_TIMEOUT, which ends that socket's receive loop. Idle
+# sockets cost no wakeups beyond that. WS_IDLE_TIMEOUT (0 = off) also closes
+# sockets that sent nothing, not even {"action": "ping"}, for that long.
+PING_INTERVAL = float(os.getenv("WS_PING_INTERVAL", "20"))
+PING_TIMEOUT = float(os.getenv("WS_PING_TIMEOUT", "20"))
+IDLE_TIMEOUT = float(os.getenv("WS_IDLE_TIMEOUT", "0"))
+
+# === Coalescing settings ===
+# A coalescing socket keeps only the newest update per user_id and gets
+# them as one {"type": "batch", "updates": [...]} frame every interval;
+# "Unsafe" readings and messages without a user_id still go out at once.
+# Sockets opt in with ?coalesce=<seconds> (0 = off), and roles listed in
+# WS_COALESCE_ROLES (e.g. "admin") default to WS_COALESCE_INTERVAL.
+COALESCE_ROLES = {role.strip() for role in os.getenv("WS_COALESCE_ROLES", "").split(",") if role.strip()}
+COALESCE_INTERVAL = float(os.getenv("WS_COALESCE_INTERVAL", "1.0"))
+MIN_COALESCE_INTERVAL, MAX_COALESCE_INTERVAL = 0.05, 60.0
+
+# === Wire formats ===
+# Sockets get JSON text frames unless they connect with ?encoding=binary,
+# which sends broadcasts as wire_format frames (binary WebSocket frames);
+# adding &delta=1 sends only what changed since the user's previous frame.
+# Control replies (welcome, acks, pongs, errors) are always JSON text.
+ENCODINGS = ("json", "binary")
+
+if SLOW_CLIENT_POLICY not in ("drop_oldest", "disconnect"):
+    raise ValueError("WS_SLOW_CLIENT_POLICY must be 'drop_oldest' or 'disconnect'")
+
+
+# === Topics ===
+# Sockets subscribe to "<kind>:<value>" topics, e.g. "user:W17", "zone:B",
+# "device:esp32-04" or "role:admin". Every socket is subscribed to the role
+# in its URL; the others come from query parameters or subscribe messages.
+TOPIC_KINDS = ("user", "zone", "device", "role")
+TOPIC_QUERY_PARAMS = {"user_id": "user", "zone": "zone", "device_id": "device"}
+MAX_TOPICS_PER_CONNECTION = int(os.getenv("WS_MAX_TOPICS", "64"))
+
+
+def is_valid_topic(topic) -> bool:
+    if not isinstance(topic, str):
+        return False
+    kind, _, value = topic.partition(":")
+    return kind in TOPIC_KINDS and bool(value)
+
+
+# === Latency Histogram ===
+class LatencyHistogram:
+    """Counts of latencies (ms) in fixed buckets, plus count/sum/max."""
+
+    BOUNDS_MS = (0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+    def __init__(self):
+        self.buckets = [0] * (len(self.BOUNDS_MS) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, ms: float):
+        self.buckets[bisect.bisect_left(self.BOUNDS_MS, ms)] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def quantile(self, q: float):
+        if not self.count:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, n in zip(self.BOUNDS_MS + (float("inf"),), self.buckets):
+            seen += n
+            if seen >= rank:
+                return bound if bound != float("inf") else round(self.max_ms, 1)
+        return round(self.max_ms, 1)
+
+    def to_dict(self):
+        labels = [f"<={b}ms" for b in self.BOUNDS_MS] + [f">{self.BOUNDS_MS[-1]}ms"]
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ms / self.count, 1) if self.count else None,
+            "p50_ms": self.quantile(0.5),
+            "p99_ms": self.quantile(0.99),
+            "max_ms": round(self.max_ms, 1),
+            "buckets": dict(zip(labels, self.buckets)),
+        }
+
+
+class Delivery:
+    """One broadcast in flight; records its latency once every recipient is done."""
+
+    __slots__ = ("started", "pending", "histogram")
+
+    def __init__(self, recipients: int, histogram: LatencyHistogram):
+        self.started = time.perf_counter()
+        self.pending = recipients
+        self.histogram = histogram
+
+    def done(self):
+        self.pending -= 1
+        if self.pending == 0:
+            self.histogram.record((time.perf_counter() - self.started) * 1000)
+
+
+class Outgoing:
+    """A broadcast message, encoded at most once per wire format however many sockets get it."""
+
+    __slots__ = ("message", "key", "_text", "_wire", "_frame")
+
+    def __init__(self, message: dict):
+        self.message = message
+        self.key = message.get("user_id")
+        self._text = self._wire = self._frame = None
+
+    def text(self) -> str:
+        if self._text is None:
+            self._text = json.dumps(self.message)
+        return self._text
+
+    def wire(self) -> dict:
+        if self._wire is None:
+            self._wire = encode_wire(flatten(self.message))
+        return self._wire
+
+    def frame(self) -> bytes:
+        if self._frame is None:
+            self._frame = encode_frame(self.wire())
+        return self._frame
+
+
+# === WebSocket Connection ===
+# The event loop only keeps weak references to tasks, so fire-and-forget
+# ones are held here until they finish
+background_tasks: set[asyncio.Task] = set()
+
+
+def spawn(coro) -> asyncio.Task:
+    task = asyncio.create_task(coro)
+    background_tasks.add(task)
+    task.add_done_callback(_background_task_done)
+    return task
+
+
+def _background_task_done(task: asyncio.Task):
+    background_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        print(f"⚠️ Background task {task.get_coro().__qualname__} failed: {task.exception()!r}")
+
+
+class ClientConnection:
+    """A connected socket with its own bounded send queue and writer task."""
+
+    def __init__(self, websocket: WebSocket, role: str, manager: "ConnectionManager"):
+        self.websocket = websocket
+        self.role = role
+        self.manager = manager
+        self.topics: set[str] = set()
+        self.queue: deque = deque()
+        self.ready = asyncio.Event()
+        self.closed = asyncio.Event()
+        self.dropped = 0
+        self.writer = None
+
+        self.coalesce_interval = 0.0
+        self.pending: dict[str, Outgoing] = {}  # user_id -> newest unsent update
+        self.flush_handle = None
+
+        self.encoding = "json"
+        self.delta: DeltaEncoder | None = None
+
+    def start(self):
+        self.writer = asyncio.create_task(self._write_loop())
+
+    def enqueue(self, item, delivery: Delivery):
+        """Queue a message without waiting; applies the slow-client policy.
+
+        `item` is control-message text, an Outgoing broadcast or a list of
+        them (a coalesced batch); the writer encodes it for this socket.
+        """
+        if self.closed.is_set():
+            delivery.done()
+            return
+        if len(self.queue) >= SEND_QUEUE_SIZE:
+            if SLOW_CLIENT_POLICY == "disconnect":
+                delivery.done()
+                self.manager.stats["slow_disconnects"] += 1
+                self._shutdown()
+                spawn(self._close_socket())
+                return
+            _, dropped_delivery = self.queue.popleft()
+            dropped_delivery.done()
+            self.dropped += 1
+            self.manager.stats["dropped"] += 1
+        self.queue.append((item, delivery))
+        self.ready.set()
+
+    def coalesce(self, key: str, outgoing: Outgoing, delivery: Delivery):
+        """Hold `outgoing` as the newest update for `key`, replacing any unsent one."""
+        delivery.done()
+        if self.closed.is_set():
+            return
+        if key in self.pending:
+            self.manager.stats["coalesced"] += 1
+        self.pending[key] = outgoing
+        if self.flush_handle is None:
+            # Timers exist only while something is pending
+            self.flush_handle = asyncio.get_running_loop().call_later(self.coalesce_interval, self.flush)
+
+    def discard_pending(self, key: str):
+        """Forget an unsent update that a newer, immediate message supersedes."""
+        if self.pending.pop(key, None) is not None:
+            self.manager.stats["coalesced"] += 1
+
+    def flush(self):
+        self.flush_handle = None
+        if not self.pending or self.closed.is_set():
+            return
+        updates = list(self.pending.values())
+        self.pending.clear()
+        self.manager.stats["batches"] += 1
+        self.enqueue(updates, Delivery(1, LatencyHistogram()))
+
+    def render(self, item):
+        """The text or bytes to send for a queued item, in this socket's encoding."""
+        if isinstance(item, str):
+            return item
+        if self.encoding == "json":
+            if isinstance(item, Outgoing):
+                return item.text()
+            # Each update is already JSON, so the batch frame is just concatenated
+            return f'{{"type": "batch", "count": {len(item)}, "updates": [{", ".join(o.text() for o in item)}]}}'
+        if isinstance(item, Outgoing):
+            return self._frame(item)
+        return encode_batch([self._frame(outgoing) for outgoing in item])
+
+    def _frame(self, outgoing: Outgoing) -> bytes:
+        if self.delta is not None:
+            return self.delta.encode(outgoing.key, outgoing.wire())
+        return outgoing.frame()
+
+    async def _write_loop(self):
+        try:
+            while not self.closed.is_set():
+                if not self.queue:
+                    self.ready.clear()
+                    await self.ready.wait()
+                    continue
+                item, delivery = self.queue.popleft()
+                try:
+                    # Rendered at send time so deltas follow exactly what this socket received
+                    data = self.render(item)
+                    if isinstance(data, bytes):
+                        await asyncio.wait_for(self.websocket.send_bytes(data), SEND_TIMEOUT)
+                    else:
+                        await asyncio.wait_for(self.websocket.send_text(data), SEND_TIMEOUT)
+                    self.manager.stats["sent"] += 1
+                    self.manager.stats["bytes_sent"] += len(data)  # JSON text is ASCII-only
+                finally:
+                    delivery.done()
+        except asyncio.CancelledError:
+            pass
+        except asyncio.TimeoutError:
+            if self.closed.is_set():
+                return  # already dropped by the disconnect policy
+            self.manager.stats["slow_disconnects"] += 1
+            print(f"🐢 Closing slow {self.role} client: send took over {SEND_TIMEOUT}s")
+        except Exception as e:
+            print(f"⚠️ Error sending to {self.role}: {e!r}")
+        finally:
+            await self.close()
+
+    def _shutdown(self):
+        """Stop accepting messages, release queued ones and leave the manager."""
+        if self.closed.is_set():
+            return False
+        self.closed.set()
+        self.ready.set()
+        if self.flush_handle is not None:
+            self.flush_handle.cancel()
+            self.flush_handle = None
+        self.pending.clear()
+        while self.queue:
+            _, delivery = self.queue.popleft()
+            delivery.done()
+        self.manager.disconnect(self)
+        return True
+
+    async def _close_socket(self):
+        try:
+            await self.websocket.close()
+        except Exception:
+            pass
+
+    async def close(self):
+        if self._shutdown():
+            await self._close_socket()
+
+    async def wait_closed(self):
+        await self.closed.wait()
+
+
 # === WebSocket Connection Manager ===
 class ConnectionManager:
     def __init__(self):
-        self.active_connections: dict[str, list[WebSocket]] = {}
+        self.connections: set[ClientConnection] = set()
+        self.topics: dict[str, set[ClientConnection]] = {}
+        self.histogram = LatencyHistogram()
+        self.stats = {"broadcasts": 0, "sent": 0, "dropped": 0, "slow_disconnects": 0, "idle_disconnects": 0,
+                      "coalesced": 0, "batches": 0, "bytes_sent": 0}
 
-    async def connect(self, websocket: WebSocket, role: str):
+    async def connect(self, websocket: WebSocket, role: str, topics=(), coalesce=None,
+                      encoding="json", delta=False) -> ClientConnection:
         await websocket.accept()
-        if role not in self.active_connections:
-            self.active_connections[role] = []
-        self.active_connections[role].append(websocket)
-        print(f"🔗 WebSocket connected: {role} - {len(self.active_connections[role])} active connections")
+        connection = ClientConnection(websocket, role, self)
+        connection.encoding = encoding
+        if encoding == "binary" and delta:
+            connection.delta = DeltaEncoder()
+        if coalesce is None:
+            coalesce = COALESCE_INTERVAL if role in COALESCE_ROLES else 0.0
+        if coalesce > 0:
+            connection.coalesce_interval = min(max(coalesce, MIN_COALESCE_INTERVAL), MAX_COALESCE_INTERVAL)
+        self.connections.add(connection)
+        self.subscribe(connection, [f"role:{role}", *topics])
+        connection.start()
+        print(f"🔗 WebSocket connected: {role} - {len(self.topics[f'role:{role}'])} active connections")
 
         # Send welcome status
-        await websocket.send_json({"status": "connected", "role": role})
+        self.send(connection, {"status": "connected", "role": role, "topics": sorted(connection.topics),
+                               "coalesce": connection.coalesce_interval, "encoding": connection.encoding,
+                               "delta": connection.delta is not None})
+        return connection
 
-    def disconnect(self, websocket: WebSocket, role: str):
-        if role in self.active_connections and websocket in self.active_connections[role]:
-            self.active_connections[role].remove(websocket)
-            print(f"❌ WebSocket disconnected: {role} - {len(self.active_connections[role])} active connections")
+    def disconnect(self, connection: ClientConnection):
+        if connection not in self.connections:
+            return
+        self.connections.discard(connection)
+        self.unsubscribe(connection, list(connection.topics))
+        role_count = len(self.topics.get(f"role:{connection.role}", ()))
+        print(f"❌ WebSocket disconnected: {connection.role} - {role_count} active connections")
 
-    async def broadcast(self, message: dict, target_role: str = None):
-        disconnected = []
+    def subscribe(self, connection: ClientConnection, topics):
+        """Add topics to a connection; returns the ones that were rejected."""
+        rejected = []
+        for topic in topics:
+            if not is_valid_topic(topic) or (
+                    topic not in connection.topics and len(connection.topics) >= MAX_TOPICS_PER_CONNECTION):
+                rejected.append(topic)
+                continue
+            connection.topics.add(topic)
+            self.topics.setdefault(topic, set()).add(connection)
+        return rejected
 
-        # Target specific role or all roles
-        roles = [target_role] if target_role else self.active_connections.keys()
+    def unsubscribe(self, connection: ClientConnection, topics):
+        for topic in topics:
+            connection.topics.discard(topic)
+            subscribers = self.topics.get(topic)
+            if subscribers is not None:
+                subscribers.discard(connection)
+                if not subscribers:
+                    del self.topics[topic]
 
-        for role in roles:
-            for websocket in self.active_connections.get(role, []):
-                try:
-                    await websocket.send_json(message)
-                except Exception as e:
-                    print(f"⚠️ Error sending to {role}: {e}")
-                    disconnected.append((websocket, role))
+    def handle_message(self, connection: ClientConnection, text: str):
+        """Apply a client message: {"action": "subscribe" | "unsubscribe", "topics": [...]} or {"action": "ping"}."""
+        try:
+            data = json.loads(text)
+            action, topics = data.get("action"), data.get("topics", [])
+        except (ValueError, AttributeError):
+            self.send(connection, {"status": "error", "message": "Invalid JSON message"})
+            return
+        if isinstance(topics, str):
+            topics = [topics]
+
+        if action == "ping":
+            reply = {"type": "pong", "time": time.time()}
+        elif action == "subscribe":
+            rejected = self.subscribe(connection, topics)
+            reply = {"status": "subscribed", "topics": sorted(connection.topics)}
+            if rejected:
+                reply["rejected"] = rejected
+        elif action == "unsubscribe":
+            # The role topic stays; it's what the socket connected as
+            self.unsubscribe(connection, [t for t in topics if t != f"role:{connection.role}"])
+            reply = {"status": "unsubscribed", "topics": sorted(connection.topics)}
+        else:
+            reply = {"status": "error", "message": f"Unknown action: {action}"}
+        self.send(connection, reply)
+
+    def send(self, connection: ClientConnection, message: dict):
+        connection.enqueue(json.dumps(message), Delivery(1, LatencyHistogram()))
 
-        # Remove disconnected websockets
-        for websocket, role in disconnected:
-            self.disconnect(websocket, role)
+    def subscribers(self, topics=None):
+        """Connections subscribed to any of `topics`, or every connection when None."""
+        if topics is None:
+            return self.connections
+        topics = list(dict.fromkeys(topics))
+        if len(topics) == 1:
+            return self.topics.get(topics[0], set())
+        return set().union(*(self.topics.get(topic, ()) for topic in topics))
 
-        print(f"📢 Broadcasted: {message} to role: {target_role if target_role else 'ALL'}")
+    def broadcast(self, message: dict, topics=None):
+        """Queue `message` for every subscriber of `topics` (all sockets if None); it's encoded once per format.
+
+        Only the topics' own subscriber sets are visited, and nothing waits
+        on a socket: each connection's writer task sends at its own pace, so
+        a slow client only delays (or loses) its own messages.
+        """
+        recipients = list(self.subscribers(topics))
+
+        self.stats["broadcasts"] += 1
+        if not recipients:
+            return 0
+        outgoing = Outgoing(message)
+        delivery = Delivery(len(recipients), self.histogram)
+        key = outgoing.key
+        urgent = key is None or message.get("risk_level") == "Unsafe"
+        for connection in recipients:
+            if not connection.coalesce_interval:
+                connection.enqueue(outgoing, delivery)
+            elif urgent:
+                if key is not None:
+                    connection.discard_pending(key)
+                connection.enqueue(outgoing, delivery)
+            else:
+                connection.coalesce(key, outgoing, delivery)
+        return len(recipients)
+
+    def metrics(self):
+        return {
+            **self.stats,
+            "connections": {topic[5:]: len(c) for topic, c in self.topics.items() if topic.startswith("role:")},
+            "topics": len(self.topics),
+            "queued": sum(len(c.queue) for c in self.connections),
+            "pending_coalesced": sum(len(c.pending) for c in self.connections),
+            "send_queue_size": SEND_QUEUE_SIZE,
+            "slow_client_policy": SLOW_CLIENT_POLICY,
+            "ping_interval": PING_INTERVAL,
+            "ping_timeout": PING_TIMEOUT,
+            "idle_timeout": IDLE_TIMEOUT,
+            "broadcast_latency": self.histogram.to_dict(),
+        }
 
 
 # === Instantiate Manager ===
@@ -63,17 +479,53 @@ manager = ConnectionManager()
 # === WebSocket Endpoint ===
 @app.websocket("/ws/{role}")
 async def websocket_endpoint(websocket: WebSocket, role: str):
-    await manager.connect(websocket, role)
+    """
+    /ws/worker?user_id=W17 subscribes to "role:worker" and "user:W17";
+    zone and device_id work the same way. Clients can change their
+    topics later by sending subscribe/unsubscribe messages.
+    ?coalesce=1 batches this socket's per-user updates once a second.
+    ?encoding=binary (optionally with &delta=1) switches broadcasts to
+    wire_format frames.
+    """
+    params = websocket.query_params
+    topics = [f"{kind}:{params[name]}" for name, kind in TOPIC_QUERY_PARAMS.items() if params.get(name)]
     try:
-        while True:
-            await asyncio.sleep(1)  # Keep connection alive
-    except WebSocketDisconnect:
-        manager.disconnect(websocket, role)
+        coalesce = float(params["coalesce"]) if params.get("coalesce") else None
+    except ValueError:
+        coalesce = None
+    encoding = params.get("encoding", "json")
+    if encoding not in ENCODINGS:
+        encoding = "json"
+    delta = params.get("delta") in ("1", "true")
+    connection = await manager.connect(websocket, role, topics, coalesce, encoding, delta)
+    try:
+        # Driven by the socket: wakes only for client messages and the
+        # disconnect event, which arrives as soon as the peer goes away or
+        # misses a pong
+        while not connection.closed.is_set():
+            message = await asyncio.wait_for(websocket.receive(), IDLE_TIMEOUT or None)
+            if message["type"] == "websocket.disconnect":
+                break
+            if message.get("text") is not None:
+                manager.handle_message(connection, message["text"])
+    except asyncio.TimeoutError:
+        manager.stats["idle_disconnects"] += 1
+        print(f"💤 Closing idle {role} client: nothing received for {IDLE_TIMEOUT}s")
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        await connection.close()
+
+
+# === Metrics ===
+@app.get("/metrics")
+async def get_metrics():
+    return manager.metrics()
 
 
 # === POST Endpoint to Trigger Alert Broadcast ===
 @app.post("/broadcast")
-async def broadcast_alert(data: dict):
+async def broadcast_alert(request: Request):
     """
     Expected POST JSON:
     {
@@ -81,12 +533,61 @@ async def broadcast_alert(data: dict):
         "type": "alert",
         "target_role": "worker"  # or "admin" or null for all
     }
+
+    The ingest service sends its live payload once with
+    "target_roles": ["worker", "admin"] instead of one POST per role; any
+    extra fields in the body are forwarded to the clients unchanged.
+
+    "topics": ["user:W17", "zone:B"] sends only to sockets subscribed to
+    one of those topics; target roles given alongside are added as
+    "role:<name>" topics.
+
+    The same body can be sent as a full wire_format frame with
+    Content-Type: application/vnd.smart-industry.frame.
     """
-    target_role = data.get("target_role")  # Optional
+    body = await request.body()
+    try:
+        if request.headers.get("content-type", "").startswith(CONTENT_TYPE):
+            data = Decoder().decode(body)
+        else:
+            data = json.loads(body)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid body: {e}")
+    if not isinstance(data, dict):
+        raise HTTPException(status_code=400, detail="Body must be a single message object")
+
+    topics = data.pop("topics", None)
+    target_roles = data.pop("target_roles", None)
+    target_role = data.pop("target_role", None)  # Optional
+    if target_roles is None:
+        target_roles = [target_role] if target_role or topics is None else []
+
+    if topics is not None:
+        if isinstance(topics, str):
+            topics = [topics]
+        invalid = [topic for topic in topics if not is_valid_topic(topic)]
+        if invalid:
+            raise HTTPException(status_code=400, detail=f"Invalid topics: {invalid}")
+
+    if None in target_roles:
+        targets = None  # every connection
+    else:
+        targets = [*(topics or []), *(f"role:{role}" for role in target_roles)]
+
     message = {
+        **data,
         "type": data.get("type", "alert"),
-        "message": data.get("message", "No message provided"),
+        "message": data.get("message", data.get("alert", "No message provided")),
         "timestamp": data.get("timestamp", None)
     }
-    await manager.broadcast(message, target_role)
-    return {"status": "Broadcast sent", "sent_to": target_role or "all"}
+    recipients = manager.broadcast(message, targets)
+    sent_to = targets if targets is not None else "all"
+    return {"status": "Broadcast sent", "sent_to": sent_to, "recipients": recipients}
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # Equivalent to: uvicorn ws_server:app --ws-ping-interval 20 --ws-ping-timeout 20
+    uvicorn.run(app, host=os.getenv("WS_HOST", "0.0.0.0"), port=int(os.getenv("WS_PORT", "8000")),
+                ws_ping_interval=PING_INTERVAL, ws_ping_timeout=PING_TIMEOUT)
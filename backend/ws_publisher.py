@@ -0,0 +1,132 @@
+# backend/ws_publisher.py
+
+import threading
+import time
+from collections import deque
+
+
+class WebSocketPublisher:
+    """Forwards live payloads to the WebSocket broadcast server.
+
+    publish() only appends to a bounded in-process queue; a background
+    thread posts each payload once over a keep-alive session, with every
+    target role listed in the same message. When the queue is full the
+    overflow policy decides whether the oldest or the newest payload is
+    dropped, so a hung WS server can never block ingestion.
+    """
+
+    OVERFLOW_POLICIES = ('drop_oldest', 'drop_newest')
+    # 'binary' posts websocket_server/wire_format.py frames instead of JSON
+    ENCODINGS = ('json', 'binary')
+
+    def __init__(self, url, max_queue=1000, overflow='drop_oldest', timeout=2.0, encoding='json'):
+        if overflow not in self.OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {self.OVERFLOW_POLICIES}")
+        if encoding not in self.ENCODINGS:
+            raise ValueError(f"encoding must be one of {self.ENCODINGS}")
+
+        self.url = url
+        self.max_queue = max_queue
+        self.overflow = overflow
+        self.timeout = timeout
+        self.encoding = encoding
+
+        self._session = None
+        self._queue = deque()
+        self._cond = threading.Condition()
+        self._thread = None
+        self._running = False
+        self._stats = {'published': 0, 'sent': 0, 'failed': 0, 'dropped': 0}
+        self._latency = {'count': 0, 'total': 0.0, 'max': 0.0, 'last': 0.0}
+
+    def start(self):
+        with self._cond:
+            if self._running:
+                return
+            self._running = True
+            if self._session is None:
+                # requests is imported on first publish to keep app startup light
+                import requests
+                from requests.adapters import HTTPAdapter
+                self._session = requests.Session()
+                self._session.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=1))
+                self._session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=1))
+        self._thread = threading.Thread(target=self._run, name="ws-publisher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        with self._cond:
+            self._running = False
+            self._cond.notify_all()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+        if self._session is not None:
+            self._session.close()
+            self._session = None
+
+    def publish(self, payload, target_roles=('worker', 'admin'), topics=None):
+        """Queue a payload for delivery. Returns False if it was dropped.
+
+        With `topics` (e.g. ["user:W17"]) the server only delivers to sockets
+        subscribed to one of them, plus any `target_roles` given.
+        """
+        self.start()
+        message = {**payload, "target_roles": list(target_roles)}
+        if topics is not None:
+            message["topics"] = list(topics)
+
+        with self._cond:
+            self._stats['published'] += 1
+            if len(self._queue) >= self.max_queue:
+                self._stats['dropped'] += 1
+                if self.overflow == 'drop_newest':
+                    return False
+                self._queue.popleft()
+            self._queue.append(message)
+            self._cond.notify()
+        return True
+
+    def stats(self):
+        with self._cond:
+            stats = dict(self._stats)
+            latency = dict(self._latency)
+            stats['queue_depth'] = len(self._queue)
+        latency['avg'] = latency['total'] / latency['count'] if latency['count'] else 0.0
+        del latency['total']
+        stats['queue_capacity'] = self.max_queue
+        stats['overflow'] = self.overflow
+        stats['latency_seconds'] = latency
+        return stats
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._running and not self._queue:
+                    self._cond.wait()
+                if not self._running and not self._queue:
+                    return
+                message = self._queue.popleft()
+
+            started = time.perf_counter()
+            try:
+                if self.encoding == 'binary':
+                    from websocket_server.wire_format import CONTENT_TYPE, encode_message
+                    response = self._session.post(self.url, data=encode_message(message),
+                                                  headers={'Content-Type': CONTENT_TYPE}, timeout=self.timeout)
+                else:
+                    response = self._session.post(self.url, json=message, timeout=self.timeout)
+                response.raise_for_status()
+            except Exception as e:
+                with self._cond:
+                    self._stats['failed'] += 1
+                print(f"❌ Failed to send WebSocket data: {e}")
+                continue
+
+            elapsed = time.perf_counter() - started
+            with self._cond:
+                self._stats['sent'] += 1
+                self._latency['count'] += 1
+                self._latency['total'] += elapsed
+                self._latency['last'] = elapsed
+                self._latency['max'] = max(self._latency['max'], elapsed)
@@ -28,7 +28,9 @@ const AlertPage = () => {
   const bottomRef = useRef(null);
 
   useEffect(() => {
-    const ws = new WebSocket('ws://localhost:8000/ws/worker');
+    const workerId = localStorage.getItem('worker_id');
+    const query = workerId ? `?user_id=${encodeURIComponent(workerId)}` : '';
+    const ws = new WebSocket(`ws://localhost:8000/ws/worker${query}`);
 
     ws.onmessage = (event) => {
       try {
@@ -34,20 +34,28 @@ const Dashboard = ({ darkMode }) => {
   const [error, setError] = useState('');
 
   useEffect(() => {
+    const workerId = localStorage.getItem('role') === 'worker' ? localStorage.getItem('worker_id') : null;
+
+    const addReading = (reading) => {
+      const newEntry = {
+        ...reading,
+        id: Date.now(),
+        timestamp: reading.timestamp || new Date().toISOString()
+      };
+
+      setSensorData(reading);
+      setHistory(prev => [...prev.slice(-19), newEntry]);
+      setLoading(false);
+    };
+
     const fetchData = async () => {
       try {
-        const res = await axios.get('http://10.22.200.148:5001/api/latest');
+        const res = await axios.get('http://10.22.200.148:5001/api/latest', {
+          params: workerId ? { user_id: workerId } : {}
+        });
 
         if (res.data && res.data.temperature !== undefined) {
-          const newEntry = {
-            ...res.data,
-            id: Date.now(),
-            timestamp: res.data.timestamp || new Date().toISOString()
-          };
-
-          setSensorData(res.data);
-          setHistory(prev => [...prev.slice(-19), newEntry]);
-          setLoading(false);
+          addReading(res.data);
         } else {
           throw new Error('No sensor data found');
         }
@@ -58,9 +66,15 @@ const Dashboard = ({ darkMode }) => {
       }
     };
 
+    // Initial reading, then live updates pushed by the server
     fetchData();
-    const interval = setInterval(fetchData, 5000);
-    return () => clearInterval(interval);
+    const query = workerId ? `?user_id=${encodeURIComponent(workerId)}` : '';
+    const source = new EventSource(`http://10.22.200.148:5001/api/stream${query}`);
+    source.addEventListener('reading', (event) => {
+      setError('');
+      addReading(JSON.parse(event.data));
+    });
+    return () => source.close();
   }, []);
 
   const renderCard = (label, value, unit, color) => (
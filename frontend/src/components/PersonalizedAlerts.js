@@ -43,7 +43,8 @@ const PersonalizedAlerts = () => {
     let reconnectTimeout;
 
     const connect = () => {
-      ws = new WebSocket("ws://10.22.200.148:8000/ws/worker");
+      // Subscribing to our own user topic means the server only sends our readings
+      ws = new WebSocket(`ws://10.22.200.148:8000/ws/worker?user_id=${encodeURIComponent(workerId || "")}`);
       wsRef.current = ws;
 
       ws.onopen = () => {
@@ -54,7 +55,7 @@ const PersonalizedAlerts = () => {
       ws.onmessage = (event) => {
         const data = JSON.parse(event.data);
 
-        if (data.worker_id === workerId) {
+        if ((data.user_id ?? data.worker_id) === workerId) {
           setWorkerProfile(data.worker_profile);
           setAlerts((prev) => [data, ...prev.slice(0, 9)]); // limit to last 10 alerts
           setSensorTrend((prev) => [...prev.slice(-29), { ...data.sensor_data, timestamp: data.timestamp }]);
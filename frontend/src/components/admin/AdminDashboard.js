@@ -29,17 +29,23 @@ const AdminDashboard = () => {
       .then(res => setWorkers(res.data))
       .catch(console.error);
 
-    const ws = new WebSocket('ws://192.168.118.148:8000/ws/admin'); // make sure the /admin role matches
+    // coalesce=1: routine updates arrive as one batch per second (latest per worker);
+    // Unsafe readings are still sent immediately
+    const ws = new WebSocket('ws://192.168.118.148:8000/ws/admin?coalesce=1'); // make sure the /admin role matches
 
     ws.onopen = () => console.log('✅ WebSocket connected');
 
     ws.onmessage = (event) => {
-      const alert = JSON.parse(event.data);
+      const data = JSON.parse(event.data);
       const role = localStorage.getItem('user_role');
-
-      if (role === 'admin' && alert.risk_level === 'Unsafe') {
-        setAlerts(prev => [alert, ...prev]);
-        setSnackbarMessage(`⚠️ ALERT: ${alert.alert} for ${alert.user_name}`);
+      const unsafe = (data.type === 'batch' ? data.updates : [data]).filter(alert => alert.risk_level === 'Unsafe');
+
+      if (role === 'admin' && unsafe.length > 0) {
+        // Newest first; built once, outside the updater, which React may call twice
+        const ordered = [...unsafe].reverse();
+        setAlerts(prev => [...ordered, ...prev]);
+        const latest = ordered[0];
+        setSnackbarMessage(`⚠️ ALERT: ${latest.alert} for ${latest.user_name}`);
         setSnackbarOpen(true);
       }
     };
@@ -22,9 +22,14 @@ const GlobalTrends = () => {
       }
     };
 
+    // Last 100 readings once, then live updates pushed by the server
     fetchSensorData();
-    const interval = setInterval(fetchSensorData, 5000);
-    return () => clearInterval(interval);
+    const source = new EventSource('http://10.22.200.148:5001/api/stream?role=admin');
+    source.addEventListener('reading', (event) => {
+      const reading = JSON.parse(event.data);
+      setData(prev => [...prev.slice(-99), reading]);
+    });
+    return () => source.close();
   }, []);
 
   // Worker-wise average calculation